@@ -1,8 +1,74 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import movies, categories, languages
+from app.routers import movies, categories, languages, metrics
+from app.utils.tmdb_client import UpstreamUnavailable, tmdb_client
+from app.utils.feeds import feeds
+from app.utils.search_index import get_search_index, refresh_search_index
+from app.utils.metrics import end_trace, histogram, increment, render_prometheus, server_timing, start_trace
 
-app = FastAPI(title="Movie Recommender API", description="An API for recommending movies based on user preferences.", version="1.0.0")
+# How often each worker checks for a feature store generation published by
+# ml_model/src/ingest.py or train.py; 0 disables hot reloading.
+MODEL_RELOAD_INTERVAL = float(os.getenv("MODEL_RELOAD_INTERVAL", "30"))
+# Requests sending this header get their stage breakdown back in a
+# Server-Timing response header; REQUEST_TRACING=0 ignores it.
+TRACE_HEADER = "X-Trace"
+REQUEST_TRACING = os.getenv("REQUEST_TRACING", "1") == "1"
+
+logger = logging.getLogger(__name__)
+
+async def watch_model_generations(interval):
+  while True:
+    await asyncio.sleep(interval)
+    try:
+      # Loading happens in a worker thread; requests keep using the old model
+      # until the new one is fully built and swapped in.
+      if await run_in_threadpool(movies.recommender.reload_if_changed):
+        await run_in_threadpool(refresh_search_index)
+        logger.info("Loaded feature store generation %s", movies.recommender.current.generation)
+    except Exception:
+      logger.exception("Model reload failed; still serving generation %s", movies.recommender.current.generation)
+
+# Seconds each artefact took to load in this worker; /ready reports 200 once
+# all of them are in.
+readiness = {"ready": False, "load_seconds": {}}
+
+async def warm_up():
+  # Runs after the worker starts accepting connections, so /health answers
+  # immediately while the model and search index load in a thread.
+  loaders = [
+    ("recommender", lambda: movies.recommender.current),
+    ("search_index", get_search_index),
+    ("result_cache", lambda: movies.recommender.current.warm_result_cache()),
+  ]
+  try:
+    for name, load in loaders:
+      start = time.perf_counter()
+      await run_in_threadpool(load)
+      readiness["load_seconds"][name] = round(time.perf_counter() - start, 3)
+    readiness["ready"] = True
+  except Exception:
+    logger.exception("Warm-up failed; artefacts will load on first use")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+  tasks = [asyncio.create_task(warm_up())]
+  if MODEL_RELOAD_INTERVAL > 0:
+    tasks.append(asyncio.create_task(watch_model_generations(MODEL_RELOAD_INTERVAL)))
+  tasks.append(asyncio.create_task(feeds.run()))
+  yield
+  for task in tasks:
+    task.cancel()
+  await tmdb_client.aclose()
+
+app = FastAPI(title="Movie Recommender API", description="An API for recommending movies based on user preferences.", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -10,13 +76,67 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing"],
 )
 
+@app.exception_handler(UpstreamUnavailable)
+async def upstream_unavailable(request: Request, exc: UpstreamUnavailable):
+  # Reached only when neither the cache nor the local catalogue could answer.
+  return JSONResponse(
+    {"detail": "Movie data is temporarily unavailable, retry shortly"},
+    status_code=503,
+    headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+  )
+
+def route_label(scope):
+  route = scope.get("route")
+  if route is None:
+    return "unmatched"
+  # Routes of included routers match the path below their prefix; put the
+  # prefix back so labels read "/api/movies/{movie_id}". Templates, not raw
+  # paths, so every movie id does not become its own series.
+  path = scope["path"]
+  for i, char in enumerate(path):
+    if char == "/" and route.path_regex.match(path[i:]):
+      return path[:i] + route.path
+  return route.path
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+  token = start_trace() if REQUEST_TRACING and request.headers.get(TRACE_HEADER) else None
+  start = time.perf_counter()
+  try:
+    response = await call_next(request)
+  finally:
+    entries = end_trace(token) if token is not None else None
+  elapsed = time.perf_counter() - start
+
+  labels = {"method": request.method, "route": route_label(request.scope)}
+  histogram("http_request_duration_seconds", **labels).observe(elapsed)
+  increment("http_requests_total", status=str(response.status_code), **labels)
+  if entries is not None:
+    response.headers["Server-Timing"] = server_timing(entries + [("total", elapsed)])
+  return response
+
 app.include_router(movies.router, prefix="/api/movies", tags=["Movies"])
 app.include_router(categories.router, prefix="/api/categories", tags=["Categories"])
 app.include_router(languages.router, prefix="/api/languages", tags=["Languages"])
+app.include_router(metrics.router, prefix="/api/metrics", tags=["Metrics"])
 
 @app.get("/")
 def root():
   return {"message": "Welcome to the Movie Recommender API! Use the /movies/recommend endpoint to get movie recommendations based on your preferences."}
 
+@app.get("/health")
+def health():
+  return {"status": "ok"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+  return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.get("/ready")
+def ready(response: Response):
+  if not readiness["ready"]:
+    response.status_code = 503
+  return {"status": "ready" if readiness["ready"] else "starting", **readiness}
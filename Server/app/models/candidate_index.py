@@ -0,0 +1,73 @@
+import bisect
+
+import numpy as np
+
+
+# Maps (release_year, language) partitions of the feature store to contiguous
+# row ranges. The store is written sorted by year then language, so a year
+# range is one contiguous block and a (year range, languages) query is a short
+# list of blocks; candidate selection never scans rows outside the answer.
+class CandidateIndex:
+    def __init__(self, release_year, language):
+        release_year = np.asarray(release_year)
+        language = np.asarray(language)
+        n = len(release_year)
+        if n and np.any(release_year[1:] < release_year[:-1]):
+            raise ValueError("Feature store rows must be sorted by release year")
+
+        self.release_year = release_year
+        self.blocks = {}
+        self.language_blocks = {}
+
+        if n == 0:
+            return
+        boundaries = np.flatnonzero(
+            (release_year[1:] != release_year[:-1]) | (language[1:] != language[:-1])
+        ) + 1
+        starts = np.concatenate(([0], boundaries))
+        stops = np.concatenate((boundaries, [n]))
+        for start, stop in zip(starts.tolist(), stops.tolist()):
+            key = (int(release_year[start]), str(language[start]))
+            if key in self.blocks:
+                raise ValueError(f"Partition {key} is not contiguous in the feature store")
+            self.blocks[key] = (start, stop)
+            self.language_blocks.setdefault(key[1], []).append((key[0], start, stop))
+
+        # Years inside each language list are already ascending; keep a parallel
+        # list of years so range lookups can bisect.
+        self.language_years = {
+            lang: [year for year, _, _ in entries] for lang, entries in self.language_blocks.items()
+        }
+
+    def year_range(self, year_from=None, year_to=None):
+        start = 0 if year_from is None else int(np.searchsorted(self.release_year, year_from, side="left"))
+        stop = len(self.release_year) if year_to is None else int(np.searchsorted(self.release_year, year_to, side="right"))
+        return start, max(start, stop)
+
+    def select(self, year_from=None, year_to=None, languages=None):
+        """Return sorted, non-overlapping (start, stop) row ranges matching the filters.
+
+        ``languages=None`` means any language; an empty collection matches nothing.
+        """
+        if languages is None:
+            start, stop = self.year_range(year_from, year_to)
+            return [(start, stop)] if stop > start else []
+
+        ranges = []
+        for lang in set(languages):
+            entries = self.language_blocks.get(lang)
+            if not entries:
+                continue
+            years = self.language_years[lang]
+            lo = 0 if year_from is None else bisect.bisect_left(years, year_from)
+            hi = len(years) if year_to is None else bisect.bisect_right(years, year_to)
+            ranges.extend((start, stop) for _, start, stop in entries[lo:hi])
+
+        ranges.sort()
+        merged = []
+        for start, stop in ranges:
+            if merged and merged[-1][1] == start:
+                merged[-1] = (merged[-1][0], stop)
+            else:
+                merged.append((start, stop))
+        return merged
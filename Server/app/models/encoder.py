@@ -0,0 +1,54 @@
+import numpy as np
+
+from app.models.feature_store import PREPROCESS_COLUMNS
+
+
+# Pure-NumPy replacement for the fitted sklearn pipeline on the request path:
+# StandardScaler on Runtime/Vote_average, Adult passed through, then the
+# MultiLabelBinarizer genre columns. The arithmetic mirrors sklearn's
+# (float64, subtract mean then divide by scale in place), so vectors are
+# bit-identical to preprocessor.transform + mlb.transform, without pandas
+# DataFrames, input validation or an sklearn import.
+class QueryEncoder:
+    def __init__(self, classes, mean, scale):
+        self.classes = tuple(str(c) for c in classes)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.columns = {genre: len(PREPROCESS_COLUMNS) + i for i, genre in enumerate(self.classes)}
+        self.dim = len(PREPROCESS_COLUMNS) + len(self.classes)
+
+    @classmethod
+    def from_sklearn(cls, mlb, preprocessor):
+        from app.models.preprocess import NUMERIC_COLUMNS, fitted_scaler
+
+        scaler, columns = fitted_scaler(preprocessor)
+        if columns != NUMERIC_COLUMNS:
+            raise ValueError(f"preprocessor scales {columns}, expected {NUMERIC_COLUMNS}")
+        return cls(mlb.classes_, scaler.mean_, scaler.scale_)
+
+    @classmethod
+    def from_manifest(cls, manifest):
+        return cls(manifest["genres"], manifest["scaler"]["mean"], manifest["scaler"]["scale"])
+
+    def to_manifest(self):
+        # Python's JSON floats round-trip exactly, so the manifest copy is as
+        # precise as the joblib artefacts it was exported from.
+        return {"mean": self.mean.tolist(), "scale": self.scale.tolist()}
+
+    def encode(self, runtime, vote_average, adult, genres):
+        """Encode parallel sequences of query fields into an (n, dim) float64 matrix."""
+        n = len(genres)
+        out = np.zeros((n, self.dim), dtype=np.float64)
+        numeric = np.empty((n, len(self.mean)), dtype=np.float64)
+        numeric[:, 0] = runtime
+        numeric[:, 1] = vote_average
+        numeric -= self.mean
+        numeric /= self.scale
+        out[:, :len(self.mean)] = numeric
+        out[:, len(self.mean)] = adult
+
+        # Unknown genres are ignored, as MultiLabelBinarizer.transform does.
+        rows = [i for i, names in enumerate(genres) for name in names if name in self.columns]
+        cols = [self.columns[name] for names in genres for name in names if name in self.columns]
+        out[rows, cols] = 1
+        return out
@@ -0,0 +1,277 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: store writers are not serialised across processes.
+    fcntl = None
+
+from app.models.candidate_index import CandidateIndex
+
+# Bump whenever the on-disk layout or the feature encoding changes so that
+# stores written by an older build are rebuilt instead of silently reused.
+STORE_VERSION = 4
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+# Everything the encoded matrix is derived from. If any of these change
+# (new CSV export, retrained scalers) the persisted store is stale.
+SOURCE_FILES = [
+    "movie_data.csv",
+    "movie_genres.csv",
+    "movie_titles.csv",
+    os.path.join("scalers", "mlb.joblib"),
+    os.path.join("scalers", "preprocessor.joblib"),
+]
+
+MANIFEST_NAME = "manifest.json"
+CURRENT_NAME = "CURRENT"
+LOCK_NAME = ".lock"
+# Superseded generations kept on disk (besides the current one).
+KEEP_GENERATIONS = 2
+ARRAY_NAMES = ["features", "features_normed", "movie_ids", "release_year", "language", "source_row"]
+PREPROCESS_COLUMNS = ["Runtime", "Vote_average", "Adult"]
+
+# movie_genres.csv stores each row's genres as a Python list literal, e.g.
+# "['Action', 'Science Fiction']"; names are pulled out with one regex pass
+# over the whole column instead of evaluating every row. pandas is imported
+# inside the encoding helpers only: serving a built store needs just NumPy.
+_GENRE_PATTERN = r"'([^']*)'|\"([^\"]*)\""
+
+
+def _file_fingerprint(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+
+
+def source_fingerprints(data_dir=DATA_DIR, staged=None):
+    # ``staged`` maps source names to files about to be renamed over them; a
+    # rename keeps size and mtime, so their fingerprints stay valid.
+    staged = staged or {}
+    return {name: _file_fingerprint(staged.get(name, os.path.join(data_dir, name))) for name in SOURCE_FILES}
+
+
+def parse_genres(column):
+    """(row position, genre name) pairs for a column of genre list literals."""
+    import pandas as pd
+
+    # Catalogues repeat a small set of genre combinations, so each distinct
+    # string is parsed once and the result is expanded back onto the rows.
+    codes, uniques = pd.factorize(column)
+    found = pd.Series(uniques, dtype=object).astype(str).str.extractall(_GENRE_PATTERN)
+    names = found[0].fillna(found[1]).to_numpy(dtype=object)
+    # A trailing zero count doubles as the entry for missing values (code -1).
+    counts = np.append(np.bincount(found.index.get_level_values(0), minlength=len(uniques)), 0)
+    ptr = np.concatenate(([0], np.cumsum(counts)))
+
+    lengths = counts[codes]
+    starts = ptr[codes]
+    positions = np.repeat(np.arange(len(codes), dtype=np.int64), lengths)
+    flat = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(int(lengths.sum()))
+    return positions, names[flat]
+
+
+def encode_genres(positions, names, n_rows, classes):
+    # Same 0/1 layout as MultiLabelBinarizer.transform; unknown names are ignored.
+    import pandas as pd
+
+    codes = pd.Categorical(names, categories=classes).codes
+    known = codes >= 0
+    encoded = np.zeros((n_rows, len(classes)), dtype=np.float32)
+    encoded[positions[known], codes[known]] = 1
+    return encoded
+
+
+def encode_catalogue(movie_data, genre_data, mlb, preprocessor):
+    encoded_genres = encode_genres(*parse_genres(genre_data["Genres"]), len(genre_data), mlb.classes_)
+    preprocessed_data = preprocessor.transform(movie_data[PREPROCESS_COLUMNS])
+
+    if hasattr(preprocessed_data, "toarray"):
+        preprocessed_data = preprocessed_data.toarray()
+    return np.hstack((preprocessed_data, encoded_genres)).astype(np.float32)
+
+
+def normalise_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def build_feature_store(data_dir=DATA_DIR):
+    # Re-encodes the CSVs with the scalers already on disk; train.py runs the
+    # same streaming pipeline with fit=True to refit them first.
+    from app.models.preprocess import run_pipeline
+
+    return run_pipeline(data_dir)
+
+
+def store_root(data_dir=DATA_DIR):
+    return os.path.join(data_dir, "feature_store", f"v{STORE_VERSION}")
+
+
+_lock_depth = threading.local()
+
+
+@contextmanager
+def store_lock(data_dir=DATA_DIR, shared=False):
+    """File lock on the store: writers (build, ingest, publish) take it
+    exclusively, readers hold it shared from resolving CURRENT until the
+    arrays are mapped, so a generation is never pruned under a loading worker.
+    Nested calls in the same thread are no-ops."""
+    depth = getattr(_lock_depth, "value", 0)
+    if depth or fcntl is None:
+        _lock_depth.value = depth + 1
+        try:
+            yield
+        finally:
+            _lock_depth.value = depth
+        return
+    root = store_root(data_dir)
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, LOCK_NAME), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        _lock_depth.value = 1
+        try:
+            yield
+        finally:
+            _lock_depth.value = 0
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def current_generation(data_dir=DATA_DIR):
+    try:
+        with open(os.path.join(store_root(data_dir), CURRENT_NAME)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def store_path(data_dir=DATA_DIR):
+    generation = current_generation(data_dir)
+    return os.path.join(store_root(data_dir), generation) if generation else None
+
+
+def new_generation_dir(data_dir=DATA_DIR):
+    # Every build or ingest writes a complete new generation directory and then
+    # repoints CURRENT with an atomic rename (publish_generation), so readers
+    # see either the old or the new store and never a mix.
+    root = store_root(data_dir)
+    os.makedirs(root, exist_ok=True)
+    generation = (read_manifest(data_dir) or {}).get("generation", 0) + 1
+    name = f"gen-{generation:06d}-{os.getpid()}"
+    tmp_dir = os.path.join(root, f".tmp-{name}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    return tmp_dir, name
+
+
+def publish_generation(tmp_dir, name, manifest, data_dir=DATA_DIR):
+    root = store_root(data_dir)
+    manifest = {**manifest, "generation": int(name.split("-")[1])}
+    # The manifest is written last so a half-written store never looks valid.
+    with open(os.path.join(tmp_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    with store_lock(data_dir):
+        previous = current_generation(data_dir)
+        os.rename(tmp_dir, os.path.join(root, name))
+
+        pointer_tmp = os.path.join(root, f"{CURRENT_NAME}.tmp-{os.getpid()}")
+        with open(pointer_tmp, "w") as f:
+            f.write(name)
+        os.replace(pointer_tmp, os.path.join(root, CURRENT_NAME))
+
+        # Older generations stay on disk briefly for workers that still have
+        # them memory-mapped; the one just replaced is always kept.
+        keep = {name, previous}
+        for old in sorted(d for d in os.listdir(root) if d.startswith("gen-") and d not in keep)[:-KEEP_GENERATIONS]:
+            shutil.rmtree(os.path.join(root, old), ignore_errors=True)
+    return os.path.join(root, name)
+
+
+def write_generation(arrays, manifest, data_dir=DATA_DIR):
+    tmp_dir, name = new_generation_dir(data_dir)
+    for array_name, array in arrays.items():
+        np.save(os.path.join(tmp_dir, f"{array_name}.npy"), array)
+    return publish_generation(tmp_dir, name, manifest, data_dir)
+
+
+def _manifest_at(path):
+    if path is None or not os.path.exists(os.path.join(path, MANIFEST_NAME)):
+        return None
+    with open(os.path.join(path, MANIFEST_NAME)) as f:
+        return json.load(f)
+
+
+def read_manifest(data_dir=DATA_DIR):
+    return _manifest_at(store_path(data_dir))
+
+
+def is_stale(data_dir=DATA_DIR):
+    manifest = read_manifest(data_dir)
+    if manifest is None or manifest.get("version") != STORE_VERSION:
+        return True
+    recorded = manifest.get("sources") or {}
+    for name in SOURCE_FILES:
+        path = os.path.join(data_dir, name)
+        entry = recorded.get(name)
+        if entry is None or not os.path.exists(path):
+            return True
+        stat = os.stat(path)
+        if stat.st_size != entry["size"]:
+            return True
+        # Untouched since the build: skip hashing, which would otherwise read
+        # every source file on each worker start.
+        if stat.st_mtime_ns == entry.get("mtime_ns"):
+            continue
+        if _file_fingerprint(path)["sha256"] != entry["sha256"]:
+            return True
+    return False
+
+
+class FeatureStore:
+    def __init__(self, path, manifest):
+        self.path = path
+        self.manifest = manifest
+        self.genres = manifest["genres"]
+        # Identifies this exact store build; derived indexes record it so they
+        # are rebuilt whenever the rows they point at change.
+        self.key = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode()).hexdigest()
+        # Memory-mapped read-only so forked uvicorn workers share the same pages.
+        for name in ARRAY_NAMES:
+            setattr(self, name, np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r"))
+        self.index = CandidateIndex(self.release_year, self.language)
+
+    def __len__(self):
+        return self.manifest["rows"]
+
+
+def _open_current(data_dir):
+    # Resolve CURRENT once so the arrays and manifest come from one generation
+    # even if an ingest repoints it meanwhile.
+    path = store_path(data_dir)
+    return FeatureStore(path, _manifest_at(path))
+
+
+def load_feature_store(data_dir=DATA_DIR, rebuild_if_stale=True):
+    with store_lock(data_dir, shared=True):
+        if not is_stale(data_dir):
+            return _open_current(data_dir)
+    if not rebuild_if_stale:
+        raise RuntimeError(f"Feature store under {store_root(data_dir)} is missing or stale; run ml_model/src/train.py")
+    with store_lock(data_dir):
+        # Another worker may have rebuilt it while this one waited for the lock.
+        if is_stale(data_dir):
+            build_feature_store(data_dir)
+        return _open_current(data_dir)
@@ -0,0 +1,197 @@
+import csv
+import os
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+RATINGS_PATH = os.path.join(BASE_DIR, "ml_model", "data", "movie_ratings.csv")
+HYBRID_SIGNALS_PATH = os.path.join(BASE_DIR, "data", "scalers", "hybrid_signals.npz")
+
+# Defaults for ranking="hybrid"; requests may override both weights.
+HYBRID_POPULARITY_WEIGHT = float(os.getenv("HYBRID_POPULARITY_WEIGHT", "0.2"))
+HYBRID_COOCCURRENCE_WEIGHT = float(os.getenv("HYBRID_COOCCURRENCE_WEIGHT", "0.2"))
+# Vote count at which a film's own rating and the catalogue mean weigh the
+# same in the prior, as a quantile of the catalogue's vote counts.
+HYBRID_PRIOR_QUANTILE = float(os.getenv("HYBRID_PRIOR_QUANTILE", "0.5"))
+# Co-occurrence re-ranks this many content/popularity candidates per result.
+HYBRID_POOL_FACTOR = int(os.getenv("HYBRID_POOL_FACTOR", "10"))
+
+
+def read_ratings(path=RATINGS_PATH):
+    movie_ids, averages, counts = [], [], []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            movie_ids.append(int(row["Movie_id"]))
+            averages.append(float(row["Vote_average"] or 0))
+            counts.append(int(float(row["Vote_count"] or 0)))
+    movie_ids = np.array(movie_ids, dtype=np.int64)
+    # The ratings file repeats some movies; keep the first row of each.
+    movie_ids, first = np.unique(movie_ids, return_index=True)
+    return movie_ids, np.array(averages)[first], np.array(counts, dtype=np.int32)[first]
+
+
+def bayesian_prior(averages, counts, quantile=HYBRID_PRIOR_QUANTILE):
+    """Weighted rating (v*R + m*C) / (v + m), scaled to [0, 1].
+
+    R is a film's vote average, v its vote count, C the mean rating across
+    rated films and m the ``quantile`` of their vote counts, so films with
+    few votes are pulled towards the catalogue mean instead of outranking
+    well-established ones on a handful of perfect scores.
+    """
+    rated = counts > 0
+    if not rated.any():
+        return np.full(len(counts), 0.5, dtype=np.float32), 0.5
+    mean = float(averages[rated].mean())
+    m = max(float(np.quantile(counts[rated], quantile)), 1.0)
+    weighted = (counts * averages + m * mean) / (counts + m)
+    return (weighted / 10).astype(np.float32), mean / 10
+
+
+def cooccurrence_from_interactions(path, movie_ids, top_m=50):
+    """Sparse item-item cosine co-occurrence from a (user_id, movie_id) CSV.
+
+    Only the ``top_m`` strongest neighbours of each movie are kept. Returns
+    CSR arrays (ptr, idx, val) over positions in ``movie_ids``.
+    """
+    import pandas as pd
+    from scipy import sparse
+
+    events = pd.read_csv(path, usecols=["user_id", "movie_id"])
+    cols = np.searchsorted(movie_ids, events["movie_id"].to_numpy())
+    cols = np.minimum(cols, len(movie_ids) - 1)
+    known = movie_ids[cols] == events["movie_id"].to_numpy()
+    users, _ = pd.factorize(events["user_id"][known])
+    interactions = sparse.csr_matrix(
+        (np.ones(len(users), dtype=np.float32), (users, cols[known])),
+        shape=(users.max() + 1 if len(users) else 0, len(movie_ids)),
+    )
+    interactions.data[:] = 1  # repeated events count once
+
+    counts = (interactions.T @ interactions).tocsr()
+    degree = counts.diagonal()
+    counts.setdiag(0)
+    counts.eliminate_zeros()
+    coo = counts.tocoo()
+    coo.data = coo.data / np.sqrt(degree[coo.row] * degree[coo.col])
+    counts = coo.tocsr()
+
+    ptr = [0]
+    idx, val = [], []
+    for item in range(len(movie_ids)):
+        start, stop = counts.indptr[item], counts.indptr[item + 1]
+        neighbours, weights = counts.indices[start:stop], counts.data[start:stop]
+        if len(weights) > top_m:
+            keep = np.argpartition(-weights, top_m - 1)[:top_m]
+            neighbours, weights = neighbours[keep], weights[keep]
+        order = np.argsort(neighbours)
+        idx.append(neighbours[order])
+        val.append(weights[order])
+        ptr.append(ptr[-1] + len(order))
+    return (
+        np.array(ptr, dtype=np.int64),
+        np.concatenate(idx).astype(np.int32) if idx else np.empty(0, dtype=np.int32),
+        np.concatenate(val).astype(np.float16) if val else np.empty(0, dtype=np.float16),
+    )
+
+
+def build_hybrid_signals(ratings_path=RATINGS_PATH, interactions_path=None, top_m=50):
+    movie_ids, averages, counts = read_ratings(ratings_path)
+    prior, default_prior = bayesian_prior(averages, counts)
+    signals = {
+        "movie_ids": movie_ids,
+        "vote_count": counts,
+        "prior": prior,
+        "default_prior": np.float32(default_prior),
+    }
+    if interactions_path:
+        signals["co_ptr"], signals["co_idx"], signals["co_val"] = cooccurrence_from_interactions(interactions_path, movie_ids, top_m)
+    return signals
+
+
+def save_hybrid_signals(signals, path=HYBRID_SIGNALS_PATH):
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, **signals)
+    os.replace(tmp, path)
+
+
+def load_hybrid_signals(path=HYBRID_SIGNALS_PATH):
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+# Hybrid signals aligned to the rows of one feature store. The arrays are
+# keyed by movie id on disk, so they survive store rebuilds and ingests;
+# movies added since the last offline build get the catalogue-mean prior and
+# no co-occurrence neighbours until it is rerun.
+class HybridSignals:
+    def __init__(self, signals, store_movie_ids):
+        movie_ids = signals["movie_ids"]
+        store_movie_ids = np.asarray(store_movie_ids, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(movie_ids, store_movie_ids), max(len(movie_ids) - 1, 0))
+        found = movie_ids[pos] == store_movie_ids if len(movie_ids) else np.zeros(len(store_movie_ids), dtype=bool)
+        self.prior = np.where(found, signals["prior"][pos] if len(movie_ids) else 0, signals["default_prior"]).astype(np.float32)
+
+        self.co_ptr = self.co_idx = self.co_val = None
+        if "co_ptr" in signals:
+            self._align_cooccurrence(signals, pos, found)
+
+    @property
+    def has_cooccurrence(self):
+        return self.co_ptr is not None
+
+    def _align_cooccurrence(self, signals, pos, found):
+        # Re-index the CSR from positions in the signals file to store rows.
+        n_rows = len(self.prior)
+        row_of = np.full(len(signals["movie_ids"]), -1, dtype=np.int64)
+        row_of[pos[found]] = np.flatnonzero(found)
+
+        ptr = signals["co_ptr"]
+        owners = np.flatnonzero(found)
+        starts, stops = ptr[pos[owners]], ptr[pos[owners] + 1]
+        lengths = stops - starts
+        flat = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        owner_rows = np.repeat(owners, lengths)
+        neighbours = row_of[signals["co_idx"][flat]]
+        keep = neighbours >= 0
+
+        self.co_ptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(owner_rows[keep], minlength=n_rows), out=self.co_ptr[1:])
+        self.co_idx = neighbours[keep].astype(np.int32)
+        self.co_val = signals["co_val"][flat[keep]]
+
+    def cooccurrence_boost(self, rows, scores, seeds):
+        """Co-occurrence support of each pooled row from the ``seeds`` best ones.
+
+        Every seed votes for its neighbours with its own score, and only rows
+        already in the pool (which satisfy the query's filters) can collect
+        votes. The result is scaled to [0, 1].
+        """
+        seed_rows = rows[:seeds]
+        seed_scores = np.maximum(scores[:seeds], 0)
+        starts, stops = self.co_ptr[seed_rows], self.co_ptr[seed_rows + 1]
+        lengths = stops - starts
+        flat = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        neighbours = self.co_idx[flat]
+        votes = self.co_val[flat].astype(np.float32) * np.repeat(seed_scores, lengths)
+
+        order = np.argsort(rows)
+        slot = np.minimum(np.searchsorted(rows[order], neighbours), len(rows) - 1)
+        hit = rows[order][slot] == neighbours
+        boost = np.zeros(len(rows), dtype=np.float32)
+        np.add.at(boost, order[slot[hit]], votes[hit])
+        peak = boost.max() if len(boost) else 0
+        return boost / peak if peak > 0 else boost
+
+
+def make_hybrid_signals(store, path=HYBRID_SIGNALS_PATH):
+    signals = load_hybrid_signals(path)
+    if signals is None:
+        if not os.path.exists(RATINGS_PATH):
+            return None
+        # The popularity prior is cheap to derive; co-occurrence needs the
+        # offline build (ml_model/src/train.py --interactions).
+        signals = build_hybrid_signals()
+        save_hybrid_signals(signals, path)
+    return HybridSignals(signals, store.movie_ids)
@@ -0,0 +1,212 @@
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from app.models.feature_store import (
+    ARRAY_NAMES, DATA_DIR, STORE_VERSION, encode_catalogue, load_feature_store, normalise_rows,
+    source_fingerprints, store_lock, write_generation,
+)
+from app.models.preprocess import fitted_scaler
+from app.models.similarity import load_ivf_index, save_ivf_index, update_ivf_index
+from app.utils.catalogue import CATALOGUE_PATH, SCHEMA, catalogue_row_from_tmdb, upsert_rows
+
+# Thresholds past which the fitted scalers no longer describe the catalogue
+# and ml_model/src/train.py should be rerun instead of ingesting further.
+DRIFT_MEAN_SHIFT = 0.25          # |catalogue mean - fitted mean| in fitted standard deviations
+DRIFT_SCALE_RATIO = (0.8, 1.25)  # catalogue std / fitted std
+DRIFT_UNKNOWN_GENRES = 0.01      # share of ingested movies with a genre the encoder has never seen
+DRIFT_GROWTH = 0.2               # rows added since the last full build, relative to its size
+
+
+def _csv_rows(records):
+    # Latest record per movie wins; movies missing anything the encoder needs
+    # are skipped rather than encoded with made-up values.
+    rows = {}
+    skipped = 0
+    for record in records:
+        row = catalogue_row_from_tmdb(record)
+        if None in (row["title"], row["release_year"], row["runtime"], row["vote_average"], row["language"]):
+            skipped += 1
+            continue
+        rows[row["movie_id"]] = row
+    return rows, skipped
+
+
+def drift_report(movie_data, preprocessor, unknown_genres, unknown_movies, ingested, rows, base_rows):
+    scaler, columns = fitted_scaler(preprocessor)
+    reasons = []
+    numeric = {}
+    for column, mean, scale in zip(columns, scaler.mean_, scaler.scale_):
+        values = movie_data[column].to_numpy(dtype=np.float64)
+        shift = abs(values.mean() - mean) / scale
+        ratio = values.std() / scale
+        numeric[column] = {
+            "fitted_mean": round(float(mean), 4),
+            "fitted_std": round(float(scale), 4),
+            "mean": round(float(values.mean()), 4),
+            "std": round(float(values.std()), 4),
+            "mean_shift": round(float(shift), 4),
+            "std_ratio": round(float(ratio), 4),
+        }
+        if shift > DRIFT_MEAN_SHIFT:
+            reasons.append(f"{column} mean moved {shift:.2f} std from the fitted scaler")
+        if not DRIFT_SCALE_RATIO[0] <= ratio <= DRIFT_SCALE_RATIO[1]:
+            reasons.append(f"{column} spread is {ratio:.2f}x the fitted scaler")
+
+    unknown_share = unknown_movies / max(ingested, 1)
+    if unknown_share > DRIFT_UNKNOWN_GENRES:
+        reasons.append(f"{unknown_share:.1%} of ingested movies have genres the encoder ignores: {sorted(unknown_genres)}")
+    growth = (rows - base_rows) / max(base_rows, 1)
+    if growth > DRIFT_GROWTH:
+        reasons.append(f"catalogue grew {growth:.1%} since the last full build")
+
+    return {
+        "rows": rows,
+        "base_rows": base_rows,
+        "growth": round(growth, 4),
+        "numeric": numeric,
+        "unknown_genres": unknown_genres,
+        "unknown_genre_share": round(unknown_share, 4),
+        "refit_recommended": bool(reasons),
+        "reasons": reasons,
+    }
+
+
+def _stage_csv(frame, path):
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    frame.to_csv(tmp_path, index=False)
+    return tmp_path
+
+
+def ingest_records(records, data_dir=DATA_DIR, catalogue_path=CATALOGUE_PATH):
+    """Add or update movies from TMDB records without refitting or restarting.
+
+    Only the affected rows are encoded, with the scalers already fitted by
+    train.py. The result is published as a new feature store generation, which
+    running servers pick up on their next reload check.
+    """
+    # Serialised with builds and other ingests: each one reads the CSVs and
+    # the current generation and writes both back.
+    with store_lock(data_dir):
+        return _ingest_records(records, data_dir, catalogue_path)
+
+
+def _ingest_records(records, data_dir, catalogue_path):
+    import joblib
+
+    rows, skipped = _csv_rows(records)
+    store = load_feature_store(data_dir)
+    if not rows:
+        return {"added": 0, "updated": 0, "skipped": skipped, "store": store.path, "drift": None}
+
+    mlb = joblib.load(os.path.join(data_dir, "scalers", "mlb.joblib"))
+    preprocessor = joblib.load(os.path.join(data_dir, "scalers", "preprocessor.joblib"))
+
+    movie_data = pd.read_csv(os.path.join(data_dir, "movie_data.csv"))
+    genre_data = pd.read_csv(os.path.join(data_dir, "movie_genres.csv"))
+    movie_titles = pd.read_csv(os.path.join(data_dir, "movie_titles.csv"))
+
+    # Existing movies are updated in place so their source row stays stable;
+    # new ones are appended to the CSVs train.py refits from.
+    positions = {movie_id: i for i, movie_id in enumerate(movie_titles["Movie_id"].tolist())}
+    changed = []
+    appended = []
+    for movie_id, row in rows.items():
+        values = {
+            "data": [float(row["release_year"]), int(row["runtime"]), row["language"], row["adult"], float(row["vote_average"])],
+            "genres": str(list(row["genres"])),
+            "title": [movie_id, row["title"]],
+        }
+        if movie_id in positions:
+            i = positions[movie_id]
+            movie_data.loc[i, ["Release_year", "Runtime", "Language", "Adult", "Vote_average"]] = values["data"]
+            genre_data.loc[i, "Genres"] = values["genres"]
+            movie_titles.loc[i, ["Movie_id", "Title"]] = values["title"]
+            changed.append(i)
+        else:
+            appended.append(values)
+    if appended:
+        start = len(movie_titles)
+        movie_data = pd.concat([movie_data, pd.DataFrame([v["data"] for v in appended], columns=movie_data.columns)], ignore_index=True)
+        genre_data = pd.concat([genre_data, pd.DataFrame({"Genres": [v["genres"] for v in appended]})], ignore_index=True)
+        movie_titles = pd.concat([movie_titles, pd.DataFrame([v["title"] for v in appended], columns=movie_titles.columns)], ignore_index=True)
+        changed.extend(range(start, start + len(appended)))
+    changed = np.asarray(sorted(changed), dtype=np.int32)
+
+    known = set(mlb.classes_)
+    unknown_genres = {}
+    unknown_movies = 0
+    for row in rows.values():
+        missing = [g for g in row["genres"] if g not in known]
+        for genre in missing:
+            unknown_genres[genre] = unknown_genres.get(genre, 0) + 1
+        unknown_movies += bool(missing)
+
+    encoded = encode_catalogue(movie_data.iloc[changed], genre_data.iloc[changed], mlb, preprocessor)
+
+    old = {name: np.asarray(getattr(store, name)) for name in ARRAY_NAMES}
+    keep = ~np.isin(old["source_row"], changed)
+    fresh = {
+        "features": encoded,
+        "features_normed": normalise_rows(encoded),
+        "movie_ids": movie_titles["Movie_id"].to_numpy(dtype=np.int64)[changed],
+        "release_year": movie_data["Release_year"].to_numpy(dtype=np.int32)[changed],
+        "language": movie_data["Language"].astype(str).to_numpy(dtype="U8")[changed],
+        "source_row": changed,
+    }
+    merged = {name: np.concatenate([old[name][keep], fresh[name]]) for name in ARRAY_NAMES}
+    # Same (year, language, source row) order a full build would produce.
+    order = np.lexsort((merged["source_row"], merged["language"], merged["release_year"]))
+    arrays = {name: merged[name][order] for name in ARRAY_NAMES}
+    is_changed = np.concatenate([np.zeros(int(keep.sum()), dtype=bool), np.ones(len(changed), dtype=bool)])[order]
+
+    # The new generation is published before the updated CSVs are renamed
+    # into place, with the staged files' fingerprints. If the job dies in
+    # between, the old CSVs stay and the next load rebuilds from them instead
+    # of serving a store that does not match its sources.
+    staged = {
+        name: _stage_csv(frame, os.path.join(data_dir, name))
+        for name, frame in (("movie_data.csv", movie_data), ("movie_genres.csv", genre_data), ("movie_titles.csv", movie_titles))
+    }
+    try:
+        manifest = {
+            "version": STORE_VERSION,
+            "rows": int(len(arrays["movie_ids"])),
+            "dim": int(arrays["features"].shape[1]),
+            "genres": store.genres,
+            "scaler": store.manifest["scaler"],
+            "sources": source_fingerprints(data_dir, staged),
+            "base_rows": store.manifest.get("base_rows", len(store)),
+        }
+        path = write_generation(arrays, manifest, data_dir)
+        for name, tmp_path in staged.items():
+            os.replace(tmp_path, os.path.join(data_dir, name))
+    finally:
+        for tmp_path in staged.values():
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    index = load_ivf_index(store.key)
+    if index is not None:
+        new_store = load_feature_store(data_dir, rebuild_if_stale=False)
+        index = update_ivf_index(index, old["source_row"], arrays["source_row"], arrays["features_normed"], is_changed)
+        save_ivf_index(index, new_store.key)
+
+    if os.path.exists(catalogue_path):
+        conn = sqlite3.connect(catalogue_path)
+        try:
+            conn.execute(SCHEMA)
+            with conn:
+                upsert_rows(conn, rows.values())
+        finally:
+            conn.close()
+
+    return {
+        "added": len(appended),
+        "updated": len(rows) - len(appended),
+        "skipped": skipped,
+        "store": path,
+        "drift": drift_report(movie_data, preprocessor, unknown_genres, unknown_movies, len(rows), manifest["rows"], manifest["base_rows"]),
+    }
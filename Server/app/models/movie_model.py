@@ -1,71 +1,245 @@
-import pandas as pd
 import numpy as np
-import joblib
-from sklearn.metrics.pairwise import cosine_similarity
 
 import os
+import threading
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from app.models.encoder import QueryEncoder
+from app.models.feature_store import current_generation, load_feature_store, normalise_rows
+from app.models.hybrid import HYBRID_COOCCURRENCE_WEIGHT, HYBRID_POOL_FACTOR, HYBRID_POPULARITY_WEIGHT, make_hybrid_signals
+from app.models.neighbours import load_neighbour_table
+from app.models.result_cache import (
+    RECOMMEND_CACHE_RUNTIME_STEP, RECOMMEND_CACHE_VOTE_STEP, WARM_QUERIES_PATH, ResultCache, canonical_query,
+    load_warm_queries, query_from_json,
+)
+from app.models.scoring import score_ranges, top_k
+from app.models.similarity import make_backend
+from app.utils.lookups import language_code
+from app.utils.metrics import timed, trace
+
+
+# Everything a single recommendation depends on. Queries are immutable and the
+# recommender keeps no per-request state, so one shared MovieRecommender can be
+# driven from any number of threads without locking.
+@dataclass(frozen=True)
+class RecommendationQuery:
+    genres: Tuple[str, ...]
+    runtime: float
+    vote_average: float
+    adult: int = 0
+    # Inclusive release year bounds; None leaves that side open.
+    year_from: Optional[int] = None
+    year_to: Optional[int] = None
+    # Language names as listed in language_codes.csv; empty means any language.
+    languages: Tuple[str, ...] = ()
+    # "content" ranks on feature similarity alone; "hybrid" blends in the
+    # popularity prior and, when built, item-item co-occurrence. None weights
+    # fall back to the HYBRID_* defaults.
+    ranking: str = "content"
+    popularity_weight: Optional[float] = None
+    cooccurrence_weight: Optional[float] = None
 
-class MovieRecommender:
-  def __init__(self, genres, release_year, runtime, vote_average, language,adult=0):
-      self.genres = genres
-      self.release_year = release_year
-      self.runtime = runtime
-      self.vote_average = vote_average
-      self.language = language
-      self.adult = adult
-      BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-
-      data_path = os.path.join(BASE_DIR, "..", "..", "data", "movie_data.csv")
-
-      self.movie_data = pd.read_csv(data_path)
-      self.language_data = pd.read_csv(os.path.join(BASE_DIR, "..","..","data", "language_codes.csv"))
-
-      self.genre_data = pd.read_csv(os.path.join(BASE_DIR, "..","..","data", "movie_genres.csv"))
-
-      self.movie_titles = pd.read_csv(os.path.join(BASE_DIR, "..","..","data", "movie_titles.csv"))
-
-      self.mlb = joblib.load(os.path.join(BASE_DIR,"..","..","data","scalers","mlb.joblib"))
-      self.preprocessor = joblib.load(os.path.join(BASE_DIR,"..","..","data","scalers","preprocessor.joblib"))
-
-
-  def recommend_movies(self):
-    genres = self.genre_data["Genres"].apply(lambda x: eval(x) if pd.notnull(x) else [])
-    encoded_genres = self.mlb.transform(genres)
-    preprocessed_data = self.preprocessor.transform(self.movie_data[["Runtime", "Vote_average", "Adult"]])
-
-    if hasattr(preprocessed_data, "toarray"):
-        preprocessed_data = preprocessed_data.toarray()
-    final_data = np.hstack((preprocessed_data, encoded_genres))
 
-    genres_encoded = self.mlb.transform([self.genres])
-
-    language_code = self.language_data[self.language_data["Language_name"] == self.language.lower()]["Language_code"].values
-
-    user_input = pd.DataFrame({
-        "Runtime": [self.runtime],
-        "Vote_average": [self.vote_average],
-        "Adult": [self.adult],
-    })
-    user_preprocessed = self.preprocessor.transform(user_input)
-
-    if hasattr(user_preprocessed, "toarray"):
-        user_preprocessed = user_preprocessed.toarray()
-    user_final = np.hstack((user_preprocessed, genres_encoded))
-
-    filtered_indices = self.movie_data[
-        (self.movie_data["Release_year"] == self.release_year) &
-        (self.movie_data["Language"] == language_code[0] if len(language_code) > 0 else "Unknown")
-    ].index
-    filtered_final_data = final_data[filtered_indices]
-
-    similarities = cosine_similarity(user_final, filtered_final_data)
-
-    top5_local = similarities.argsort()[0][-5:][::-1]
-    top5_idx = filtered_indices[top5_local]
-    movie_list = []
-    for idx in top5_idx:
-        movie_list.append({
-            "Movie_id": self.movie_titles.iloc[idx]['Movie_id'].item(),
-        })
-
-    return movie_list
+class MovieRecommender:
+    def __init__(self, store=None):
+        # Benchmarks pass a synthetic store; the API always loads the current one.
+        self.store = store if store is not None else load_feature_store()
+        self.generation = os.path.basename(self.store.path)
+        # Exact brute force by default; RECOMMENDER_BACKEND=ivf switches to the
+        # approximate inverted-file index for very large catalogues.
+        self.backend = make_backend(self.store)
+
+        # Scaler statistics and genre classes travel with the store, so the
+        # encoder always matches the rows it is compared against and sklearn
+        # is never imported while serving.
+        self.encoder = QueryEncoder.from_manifest(self.store.manifest)
+        self.hybrid = make_hybrid_signals(self.store)
+        # Precomputed by ml_model/src/build_neighbours.py; movies it does not
+        # cover are scored on demand.
+        self.neighbours = load_neighbour_table()
+        # Answers to /recommend by canonical query; it lives and dies with
+        # this generation, so a reload never serves stale results.
+        self.result_cache = ResultCache()
+        self.known_genres = frozenset(self.encoder.columns)
+
+    def encode_queries(self, queries: List[RecommendationQuery]):
+        return self.encoder.encode(
+            [query.runtime for query in queries],
+            [query.vote_average for query in queries],
+            [query.adult for query in queries],
+            [query.genres for query in queries],
+        )
+
+    def candidate_ranges(self, query: RecommendationQuery):
+        languages = None
+        if query.languages:
+            # Unknown names simply match nothing rather than widening the search.
+            languages = [code for code in map(language_code, query.languages) if code is not None]
+        return self.store.index.select(query.year_from, query.year_to, languages)
+
+    def ranking_weights(self, query: RecommendationQuery):
+        if query.ranking != "hybrid" or self.hybrid is None:
+            return 0.0, 0.0
+        popularity = HYBRID_POPULARITY_WEIGHT if query.popularity_weight is None else query.popularity_weight
+        cooccurrence = HYBRID_COOCCURRENCE_WEIGHT if query.cooccurrence_weight is None else query.cooccurrence_weight
+        if not self.hybrid.has_cooccurrence:
+            cooccurrence = 0.0
+        return float(popularity), float(cooccurrence)
+
+    def cached(self, query: RecommendationQuery, k: int = 5):
+        """The cached answer for ``query``'s bucket, or None. Cheap enough for the event loop."""
+        if not self.result_cache.enabled:
+            return None
+        cached = self.result_cache.get((canonical_query(query, self.known_genres), k))
+        if cached is None:
+            return None
+        trace("recommend.cache_hit")
+        return [{"Movie_id": movie_id, "Score": score} for movie_id, score in cached]
+
+    def recommend(self, query: RecommendationQuery, k: int = 5):
+        cached = self.cached(query, k)
+        if cached is not None:
+            return cached
+        return self.compute(query, k)
+
+    def compute(self, query: RecommendationQuery, k: int = 5):
+        """Score ``query`` and cache the answer, without a cache lookup."""
+        if self.result_cache.enabled:
+            # With the cache on, a query is scored at its bucket centre so
+            # every query in the bucket gets the answer it would be served
+            # from cache. RECOMMEND_CACHE_SIZE=0 (or steps of 0) scores the
+            # exact values.
+            query = canonical_query(query, self.known_genres)
+        results = self.recommend_batch([query], k)[0]
+        self.result_cache.set((query, k), results)
+        return results
+
+    def warm_result_cache(self, path=WARM_QUERIES_PATH):
+        """Preload the answers listed by ml_model/src/warm_recommend_cache.py."""
+        warm = load_warm_queries(path)
+        if warm is None or not self.result_cache.enabled:
+            return 0
+        k = warm["k"]
+        entries = warm["entries"][:self.result_cache.maxsize]
+        queries = [canonical_query(query_from_json(entry["query"], RecommendationQuery), self.known_genres) for entry in entries]
+        reusable = (
+            warm["store_key"] == self.store.key
+            and warm.get("runtime_step") == RECOMMEND_CACHE_RUNTIME_STEP
+            and warm.get("vote_step") == RECOMMEND_CACHE_VOTE_STEP
+        )
+        if reusable:
+            results = [[{"Movie_id": movie_id, "Score": score} for movie_id, score in entry["results"]] for entry in entries]
+        else:
+            # Built against another generation or bucketing: the query list is
+            # still good, so recompute its answers in one batch.
+            results = self.recommend_batch(queries, k)
+        for query, result in zip(queries, results):
+            self.result_cache.set((query, k), result)
+        return len(queries)
+
+    def recommend_batch(self, queries: List[RecommendationQuery], k: int = 5):
+        results = [[] for _ in queries]
+        if not queries:
+            return results
+
+        # Queries that filter to the same partitions and rank the same way
+        # share one matrix product.
+        groups = {}
+        with timed("recommend.candidates"):
+            for position, query in enumerate(queries):
+                ranges = tuple(self.candidate_ranges(query))
+                if ranges:
+                    groups.setdefault((ranges, self.ranking_weights(query)), []).append(position)
+        if not groups:
+            return results
+
+        with timed("recommend.encode"):
+            user_vectors = normalise_rows(self.encode_queries(queries))
+        for (ranges, (popularity, cooccurrence)), positions in groups.items():
+            # Rows of the store are already unit length, so cosine similarity is a
+            # dot product, and only the matching partitions are ever touched.
+            # The popularity prior is added inside the same pass.
+            prior = self.hybrid.prior if popularity else None
+            pool = k * HYBRID_POOL_FACTOR if cooccurrence else k
+            with timed(f"recommend.search.{self.backend.name}"):
+                rows, scores = self.backend.search(list(ranges), user_vectors[positions], pool, prior, popularity)
+            if cooccurrence:
+                with timed("recommend.cooccurrence"):
+                    rows, scores = self.rerank_cooccurrence(rows, scores, k, cooccurrence)
+            for position, row_ids, row_scores in zip(positions, rows, scores):
+                results[position] = [
+                    {"Movie_id": self.store.movie_ids[idx].item(), "Score": float(score)}
+                    for idx, score in zip(row_ids, row_scores)
+                ]
+        return results
+
+    def similar(self, movie_id: int, k: int = 10):
+        """Movies closest to ``movie_id`` in feature space, or None if unknown."""
+        if self.neighbours is not None and movie_id in self.neighbours:
+            ids, scores = self.neighbours.lookup(movie_id, self.neighbours.scores.shape[1])
+            ids, scores = ids.tolist(), scores.tolist()
+        else:
+            rows = np.flatnonzero(self.store.movie_ids == movie_id)
+            if len(rows) == 0:
+                return None
+            # Duplicate catalogue rows of the same movie are dropped below.
+            rows, scores = score_ranges(self.store.features_normed, [(0, len(self.store))],
+                                        self.store.features_normed[rows[0]], k + len(rows))
+            ids, scores = self.store.movie_ids[rows[0]].tolist(), scores[0].tolist()
+
+        results = []
+        seen = {movie_id}
+        for neighbour, score in zip(ids, scores):
+            if neighbour not in seen:
+                seen.add(neighbour)
+                results.append({"Movie_id": neighbour, "Score": float(score)})
+        return results[:k]
+
+    def rerank_cooccurrence(self, rows, scores, k, weight):
+        out_rows, out_scores = [], []
+        for pool_rows, pool_scores in zip(rows, scores):
+            boost = self.hybrid.cooccurrence_boost(pool_rows, pool_scores, seeds=k)
+            blended = (1 - weight) * pool_scores + weight * boost
+            local = top_k(blended, k)[0]
+            out_rows.append(pool_rows[local])
+            out_scores.append(blended[local])
+        return out_rows, out_scores
+
+
+# Owns the recommender the API serves. Requests read `current` once and use
+# that instance throughout, so swapping in a freshly loaded generation is a
+# single reference assignment: in-flight requests finish on the old model,
+# new ones see the new one, and nothing waits on the load.
+class RecommenderHolder:
+    def __init__(self):
+        # Nothing is loaded at import time; the app warms this up in the
+        # background after startup (see /ready), or the first request does.
+        self._current = None
+        self._reload_lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._current is not None
+
+    @property
+    def current(self) -> MovieRecommender:
+        current = self._current
+        if current is None:
+            with self._reload_lock:
+                if self._current is None:
+                    self._current = MovieRecommender()
+                current = self._current
+        return current
+
+    def reload_if_changed(self):
+        with self._reload_lock:
+            if self._current is None:
+                return False
+            generation = current_generation()
+            if generation is None or generation == self._current.generation:
+                return False
+            model = MovieRecommender()
+            model.warm_result_cache()
+            self._current = model
+            return True
@@ -0,0 +1,121 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+NEIGHBOUR_TABLE_PATH = os.path.join(BASE_DIR, "data", "scalers", "neighbours.npz")
+
+# Neighbours kept per movie; /similar can return at most this many.
+NEIGHBOURS = int(os.getenv("NEIGHBOURS", "50"))
+# Row and column block of each matrix product. A (256 x 8192) float32 block
+# is 8 MB and stays cache friendly, and per-worker memory does not grow with
+# the catalogue.
+ROW_BLOCK = 256
+COLUMN_BLOCK = 8192
+
+
+def _candidates(scores, threshold, col, inclusive):
+    # Entries of each row above its threshold, packed left in column order
+    # and padded with -inf.
+    mask = scores >= threshold[:, None] if inclusive else scores > threshold[:, None]
+    hits = np.flatnonzero(mask)
+    hit_rows, hit_cols = np.divmod(hits, scores.shape[1])
+    counts = np.bincount(hit_rows, minlength=len(scores))
+    width = counts.max() if len(hits) else 0
+    slot = np.arange(len(hits)) - np.repeat(np.cumsum(counts) - counts, counts)
+    out_scores = np.full((len(scores), width), -np.inf, dtype=scores.dtype)
+    out_rows = np.zeros((len(scores), width), dtype=np.int64)
+    out_scores[hit_rows, slot] = scores.ravel()[hits]
+    out_rows[hit_rows, slot] = hit_cols + col
+    return out_rows, out_scores
+
+
+def _neighbour_block(matrix, start, stop, n):
+    # Running top-n over column blocks, ties broken by the lower row like
+    # scoring.top_k. Only entries that can still enter a row's top n are
+    # gathered from each block: for the first block those at or above its
+    # n-th best score, afterwards those strictly above the current n-th best
+    # (an equal score loses the tie to the lower row already kept). That is
+    # one comparison pass per block instead of a partition or sort.
+    queries = matrix[start:stop]
+    best_rows = np.empty((stop - start, 0), dtype=np.int64)
+    best_scores = np.empty((stop - start, 0), dtype=np.float32)
+    for col in range(0, len(matrix), COLUMN_BLOCK):
+        scores = queries @ matrix[col:col + COLUMN_BLOCK].T
+        own = np.arange(max(start, col), min(stop, col + COLUMN_BLOCK))
+        scores[own - start, own - col] = -np.inf
+        if best_rows.shape[1] < n:
+            width = scores.shape[1]
+            if width > n:
+                kth = np.partition(scores, width - n, axis=1)[:, width - n]
+            else:
+                kth = np.full(len(scores), -np.inf, dtype=scores.dtype)
+            new_rows, new_scores = _candidates(scores, kth, col, inclusive=True)
+        else:
+            new_rows, new_scores = _candidates(scores, best_scores[:, -1], col, inclusive=False)
+        if new_rows.shape[1] == 0:
+            continue
+        rows = np.concatenate((best_rows, new_rows), axis=1)
+        scores = np.concatenate((best_scores, new_scores), axis=1)
+        order = np.lexsort((rows, -scores), axis=1)[:, :n]
+        best_rows = np.take_along_axis(rows, order, axis=1)
+        best_scores = np.take_along_axis(scores, order, axis=1)
+    return start, best_rows, best_scores
+
+
+def build_neighbour_table(matrix, n=NEIGHBOURS, workers=None):
+    """Top-n cosine neighbours of every row of the row-normalised ``matrix``.
+
+    Row blocks are scored in a thread pool: the matrix products and
+    partitions run in NumPy without the GIL, so the build uses every core.
+    Returns (rows, scores) as int32 and float16 arrays of shape (len, n).
+    """
+    n = min(n, len(matrix) - 1)
+    rows = np.zeros((len(matrix), max(n, 0)), dtype=np.int32)
+    scores = np.zeros((len(matrix), max(n, 0)), dtype=np.float16)
+    if n <= 0:
+        return rows, scores
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        blocks = [pool.submit(_neighbour_block, matrix, start, min(start + ROW_BLOCK, len(matrix)), n)
+                  for start in range(0, len(matrix), ROW_BLOCK)]
+        for block in blocks:
+            start, block_rows, block_scores = block.result()
+            rows[start:start + len(block_rows)] = block_rows
+            scores[start:start + len(block_rows)] = block_scores
+    return rows, scores
+
+
+def save_neighbour_table(store, rows, scores, path=NEIGHBOUR_TABLE_PATH):
+    # Neighbours are stored as movie ids, so the table stays usable (if
+    # slightly out of date) after ingests publish new store generations.
+    ids = np.asarray(store.movie_ids, dtype=np.int32)
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, store_key=np.array(store.key), movie_ids=ids, neighbour_ids=ids[rows], scores=scores)
+    os.replace(tmp, path)
+
+
+class NeighbourTable:
+    def __init__(self, data):
+        self.store_key = str(data["store_key"])
+        self.neighbour_ids = data["neighbour_ids"]
+        self.scores = data["scores"]
+        # First row wins when the catalogue lists a movie more than once.
+        movie_ids = data["movie_ids"].tolist()
+        self.positions = {}
+        for position, movie_id in enumerate(movie_ids):
+            self.positions.setdefault(movie_id, position)
+
+    def __contains__(self, movie_id):
+        return movie_id in self.positions
+
+    def lookup(self, movie_id, k):
+        position = self.positions[movie_id]
+        return self.neighbour_ids[position, :k], self.scores[position, :k]
+
+
+def load_neighbour_table(path=NEIGHBOUR_TABLE_PATH):
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return NeighbourTable({name: data[name] for name in data.files})
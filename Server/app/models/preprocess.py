@@ -0,0 +1,226 @@
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from app.models.encoder import QueryEncoder
+from app.models.feature_store import (
+    DATA_DIR, PREPROCESS_COLUMNS, STORE_VERSION, new_generation_dir, normalise_rows, parse_genres,
+    publish_generation, source_fingerprints, store_lock, store_root,
+)
+
+# Streaming preprocessing: the catalogue CSVs are read once, in chunks, and
+# the encoded store is written block by block into memory-mapped files, so
+# only the per-row keys (year, language, id, sort order) are ever held in
+# memory as a whole. Used by train.py (fit=True refits the scalers during the
+# same pass) and whenever the server finds its feature store stale.
+
+CHUNKSIZE = int(os.getenv("PREPROCESS_CHUNKSIZE", "100000"))
+NUMERIC_COLUMNS = ["Runtime", "Vote_average"]
+CSV_FILES = ["movie_data.csv", "movie_genres.csv", "movie_titles.csv"]
+
+
+@contextmanager
+def stage(timings, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+# Append-only column files for values whose total row count is only known
+# once the scan has finished.
+class _Spool:
+    def __init__(self, directory):
+        self.directory = directory
+        self.files = {}
+        self.layout = {}
+
+    def append(self, name, array):
+        array = np.ascontiguousarray(array)
+        if name not in self.files:
+            self.files[name] = open(os.path.join(self.directory, f"{name}.bin"), "wb")
+            self.layout[name] = (array.dtype, array.shape[1:])
+        array.tofile(self.files[name])
+
+    def load(self, name):
+        self.files[name].close()
+        dtype, shape = self.layout[name]
+        path = os.path.join(self.directory, f"{name}.bin")
+        if os.path.getsize(path) == 0:
+            return np.empty((0,) + shape, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r").reshape((-1,) + shape)
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+
+
+def fitted_scaler(preprocessor):
+    transformer = preprocessor.named_steps["preprocessor"] if hasattr(preprocessor, "named_steps") else preprocessor
+    for name, scaler, columns in transformer.transformers_:
+        if name == "num":
+            return scaler, list(columns)
+    raise ValueError("preprocessor has no fitted 'num' scaler")
+
+
+def scan_catalogue(data_dir, spool, chunksize=CHUNKSIZE, on_chunk=None):
+    # One pass over the three row-aligned CSVs. Genre names get provisional
+    # codes in first-seen order; they are mapped onto the encoder's classes
+    # once every name is known.
+    readers = [pd.read_csv(os.path.join(data_dir, name), chunksize=chunksize) for name in CSV_FILES]
+    genre_codes = {}
+    rows = 0
+    while True:
+        chunks = [next(reader, None) for reader in readers]
+        if all(chunk is None for chunk in chunks):
+            break
+        if any(chunk is None for chunk in chunks) or len({len(chunk) for chunk in chunks}) != 1:
+            raise ValueError("movie_data.csv, movie_genres.csv and movie_titles.csv must have the same number of rows")
+        movie_data, genre_data, movie_titles = chunks
+        positions, names = parse_genres(genre_data["Genres"])
+        unique, inverse = np.unique(names.astype(str), return_inverse=True)
+        lookup = np.array([genre_codes.setdefault(name, len(genre_codes)) for name in unique], dtype=np.int32)
+
+        spool.append("preprocess", movie_data[PREPROCESS_COLUMNS].to_numpy(dtype=np.float64))
+        spool.append("release_year", movie_data["Release_year"].to_numpy(dtype=np.int32))
+        spool.append("language", movie_data["Language"].astype(str).to_numpy(dtype="U8"))
+        spool.append("movie_ids", movie_titles["Movie_id"].to_numpy(dtype=np.int64))
+        spool.append("genre_rows", positions + rows)
+        spool.append("genre_codes", lookup[inverse])
+        if on_chunk is not None:
+            on_chunk(movie_data)
+        rows += len(movie_data)
+    return rows, list(genre_codes)
+
+
+def write_store(data_dir, spool, rows, seen_genres, mean, scale, classes, block=CHUNKSIZE):
+    tmp_dir, name = new_generation_dir(data_dir)
+    release_year = np.array(spool.load("release_year"))
+    language = np.array(spool.load("language"))
+    movie_ids = np.array(spool.load("movie_ids"))
+    preprocess = spool.load("preprocess")
+
+    # Genre pairs were written in row order, so a running count gives each
+    # row's slice of them (CSR), and provisional codes map onto class columns.
+    genre_rows = spool.load("genre_rows")
+    class_index = {genre: i for i, genre in enumerate(classes)}
+    code_to_class = np.array([class_index.get(genre, -1) for genre in seen_genres] or [-1], dtype=np.int64)
+    genre_columns = code_to_class[spool.load("genre_codes")]
+    genre_ptr = np.concatenate(([0], np.cumsum(np.bincount(genre_rows, minlength=rows)))).astype(np.int64)
+
+    # Rows are stored sorted by (release year, language) so every partition the
+    # recommender filters on is a contiguous block (see CandidateIndex).
+    order = np.lexsort((language, release_year))
+    dim = len(PREPROCESS_COLUMNS) + len(classes)
+    features = np.lib.format.open_memmap(os.path.join(tmp_dir, "features.npy"), mode="w+", dtype=np.float32, shape=(rows, dim))
+    normed = np.lib.format.open_memmap(os.path.join(tmp_dir, "features_normed.npy"), mode="w+", dtype=np.float32, shape=(rows, dim))
+    n_numeric = len(mean)
+    for start in range(0, rows, block):
+        idx = order[start:start + block]
+        numeric = np.array(preprocess[idx])
+        # Same in-place arithmetic as StandardScaler.transform, so the result is
+        # bit-identical to the sklearn pipeline.
+        numeric[:, :n_numeric] -= mean
+        numeric[:, :n_numeric] /= scale
+
+        starts = genre_ptr[idx]
+        lengths = genre_ptr[idx + 1] - starts
+        owner = np.repeat(np.arange(len(idx)), lengths)
+        flat = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(int(lengths.sum()))
+        columns = genre_columns[flat]
+        genres = np.zeros((len(idx), len(classes)), dtype=np.float32)
+        genres[owner[columns >= 0], columns[columns >= 0]] = 1
+
+        encoded = np.hstack((numeric, genres)).astype(np.float32)
+        features[start:start + len(idx)] = encoded
+        normed[start:start + len(idx)] = normalise_rows(encoded)
+    features.flush()
+    normed.flush()
+    del features, normed
+
+    for array_name, array in {
+        "movie_ids": movie_ids[order],
+        "release_year": release_year[order],
+        "language": language[order],
+        "source_row": order.astype(np.int32),
+    }.items():
+        np.save(os.path.join(tmp_dir, f"{array_name}.npy"), array)
+
+    manifest = {
+        "version": STORE_VERSION,
+        "rows": int(rows),
+        "dim": int(dim),
+        "genres": [str(g) for g in classes],
+        # Scaler statistics for the NumPy query encoder, so serving never
+        # needs to unpickle the sklearn artefacts.
+        "scaler": QueryEncoder(classes, mean, scale).to_manifest(),
+        "sources": source_fingerprints(data_dir),
+        # Catalogue size at the last full build; incremental ingests carry it
+        # forward so drift reports can tell how far the catalogue has grown.
+        "base_rows": int(rows),
+    }
+    return publish_generation(tmp_dir, name, manifest, data_dir)
+
+
+def run_pipeline(data_dir=DATA_DIR, fit=False, chunksize=CHUNKSIZE, timings=None):
+    """Encode the catalogue CSVs into a new feature store generation.
+
+    With ``fit=True`` the MultiLabelBinarizer and the StandardScaler pipeline
+    are refitted during the same scan (the scaler incrementally, chunk by
+    chunk) and saved to data/scalers before the store is written.
+    """
+    import joblib
+
+    timings = {} if timings is None else timings
+    scalers_dir = os.path.join(data_dir, "scalers")
+    pipeline = None
+    on_chunk = None
+    if fit:
+        from sklearn.compose import ColumnTransformer
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import MultiLabelBinarizer, StandardScaler
+
+        pipeline = Pipeline([
+            ("preprocessor", ColumnTransformer(transformers=[("num", StandardScaler(), NUMERIC_COLUMNS)], remainder="passthrough")),
+        ])
+
+        def on_chunk(movie_data):
+            if not hasattr(pipeline, "n_features_in_"):
+                pipeline.fit(movie_data[PREPROCESS_COLUMNS])
+            else:
+                fitted_scaler(pipeline)[0].partial_fit(movie_data[NUMERIC_COLUMNS])
+
+    # One build or ingest at a time per data directory.
+    with store_lock(data_dir):
+        os.makedirs(store_root(data_dir), exist_ok=True)
+        scratch = tempfile.mkdtemp(prefix=".scratch-", dir=store_root(data_dir))
+        spool = _Spool(scratch)
+        try:
+            with stage(timings, "scan"):
+                rows, seen_genres = scan_catalogue(data_dir, spool, chunksize, on_chunk)
+
+            with stage(timings, "fit" if fit else "load_scalers"):
+                if fit:
+                    mlb = MultiLabelBinarizer()
+                    mlb.fit([sorted(seen_genres)])
+                    joblib.dump(mlb, os.path.join(scalers_dir, "mlb.joblib"))
+                    joblib.dump(pipeline, os.path.join(scalers_dir, "preprocessor.joblib"))
+                    preprocessor = pipeline
+                else:
+                    mlb = joblib.load(os.path.join(scalers_dir, "mlb.joblib"))
+                    preprocessor = joblib.load(os.path.join(scalers_dir, "preprocessor.joblib"))
+                scaler, columns = fitted_scaler(preprocessor)
+                if columns != NUMERIC_COLUMNS:
+                    raise ValueError(f"preprocessor scales {columns}, expected {NUMERIC_COLUMNS}")
+
+            with stage(timings, "encode"):
+                return write_store(data_dir, spool, rows, seen_genres, scaler.mean_, scaler.scale_, list(mlb.classes_), chunksize)
+        finally:
+            spool.close()
+            shutil.rmtree(scratch, ignore_errors=True)
@@ -0,0 +1,104 @@
+import dataclasses
+import json
+import math
+import os
+
+from app.utils.cache import LRUCache
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+WARM_QUERIES_PATH = os.path.join(BASE_DIR, "data", "scalers", "recommend_warm.json")
+
+# Entries kept per model generation; 0 disables the cache.
+RECOMMEND_CACHE_SIZE = int(os.getenv("RECOMMEND_CACHE_SIZE", "20000"))
+# Bucket widths for the numeric query fields. Every query in a bucket is
+# answered with the recommendations for the bucket's centre; 0 keeps the
+# exact value in the key.
+RECOMMEND_CACHE_RUNTIME_STEP = float(os.getenv("RECOMMEND_CACHE_RUNTIME_STEP", "5"))
+RECOMMEND_CACHE_VOTE_STEP = float(os.getenv("RECOMMEND_CACHE_VOTE_STEP", "0.5"))
+
+
+def _bucket(value, step):
+    if not step:
+        return value
+    # Round half up, so 117.5 and 122.4 both land on 120 with a step of 5.
+    return round(math.floor(value / step + 0.5) * step, 6)
+
+
+def canonical_query(query, known_genres=None, runtime_step=RECOMMEND_CACHE_RUNTIME_STEP, vote_step=RECOMMEND_CACHE_VOTE_STEP):
+    """The representative of ``query``'s cache bucket.
+
+    Genres become a sorted set (unknown ones are dropped, as the encoder
+    ignores them anyway), languages a sorted lower-case set, and runtime and
+    vote average are rounded to their bucket centre.
+    """
+    genres = set(query.genres)
+    if known_genres is not None:
+        genres &= known_genres
+    return dataclasses.replace(
+        query,
+        genres=tuple(sorted(genres)),
+        runtime=_bucket(float(query.runtime), runtime_step),
+        vote_average=_bucket(float(query.vote_average), vote_step),
+        adult=int(query.adult),
+        languages=tuple(sorted({language.strip().lower() for language in query.languages})),
+    )
+
+
+# Top-k answers keyed by canonical query. One instance belongs to one
+# MovieRecommender, so a new model generation always starts from an empty
+# (or freshly warmed) cache and stale answers are never served.
+class ResultCache:
+    def __init__(self, maxsize=RECOMMEND_CACHE_SIZE):
+        self.enabled = maxsize > 0
+        self.maxsize = maxsize
+        self._lru = LRUCache(max(maxsize, 1))
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        return self._lru.get(key)
+
+    def set(self, key, results):
+        if self.enabled:
+            # Stored as tuples so callers can never mutate a cached answer.
+            self._lru.set(key, tuple((rec["Movie_id"], rec["Score"]) for rec in results), math.inf)
+
+    def stats(self):
+        return dict(self._lru.stats.as_dict(), size=len(self._lru), maxsize=self.maxsize)
+
+
+def query_to_json(query):
+    return dataclasses.asdict(query)
+
+
+def query_from_json(data, query_type):
+    fields = {field.name for field in dataclasses.fields(query_type)}
+    data = {key: value for key, value in data.items() if key in fields}
+    for key in ("genres", "languages"):
+        data[key] = tuple(data.get(key) or ())
+    return query_type(**data)
+
+
+def save_warm_queries(entries, store_key, k, path=WARM_QUERIES_PATH):
+    # ``entries`` is a list of (canonical query, request count, results).
+    payload = {
+        "store_key": store_key,
+        "runtime_step": RECOMMEND_CACHE_RUNTIME_STEP,
+        "vote_step": RECOMMEND_CACHE_VOTE_STEP,
+        "k": k,
+        "entries": [
+            {"query": query_to_json(query), "count": count, "results": [[rec["Movie_id"], rec["Score"]] for rec in results]}
+            for query, count, results in entries
+        ],
+    }
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)
+
+
+def load_warm_queries(path=WARM_QUERIES_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
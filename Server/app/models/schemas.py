@@ -1,14 +1,22 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import List, Literal
 from typing import Optional
 
 class MovieRequest(BaseModel):
     genres: List[str]
-    release_year: int
+    release_year: Optional[int] = None
+    release_year_from: Optional[int] = None
+    release_year_to: Optional[int] = None
     runtime: int
     vote_average: float
-    language: str
+    language: Optional[str] = ""
+    languages: Optional[List[str]] = None
     adult: int
+    # "hybrid" blends a vote-count weighted popularity prior (and item-item
+    # co-occurrence, when built) into the content similarity.
+    ranking: Literal["content", "hybrid"] = "content"
+    popularity_weight: Optional[float] = Field(None, ge=0, le=1)
+    cooccurrence_weight: Optional[float] = Field(None, ge=0, le=1)
 
 class MovieDetails(BaseModel):
     movie_id: int
@@ -24,6 +32,21 @@ class MovieDetails(BaseModel):
 
 class MovieResponse(BaseModel):
     recommended_movies: List[MovieDetails]
+    # Ids whose TMDB lookup missed the hydration deadline or failed; they are
+    # either omitted or filled from the local catalogue only.
+    partial: bool = False
+    missing_movie_ids: List[int] = []
+
+class BatchMovieRequest(BaseModel):
+    queries: List[MovieRequest] = Field(..., max_length=10000)
+    k: int = Field(5, ge=1, le=100)
+
+class RecommendationResult(BaseModel):
+    movie_ids: List[int]
+    scores: List[float]
+
+class BatchMovieResponse(BaseModel):
+    results: List[RecommendationResult]
 
 class MovieCardDetails(BaseModel):
     movie_id: int
@@ -0,0 +1,91 @@
+import time
+
+import numpy as np
+
+from app.utils.metrics import observe
+
+# Upper bound on queries scored in one matrix product, so a large batch never
+# materialises a (queries x candidates) score matrix bigger than a few hundred MB.
+QUERY_CHUNK = 512
+
+
+def top_k(scores, k):
+    """Indices of the k highest scores in each row, best first.
+
+    Ties are broken by the lower column index so results are reproducible no
+    matter how argpartition happens to order equal values.
+    """
+    scores = np.atleast_2d(scores)
+    n_queries, n_items = scores.shape
+    k = min(k, n_items)
+    if k <= 0:
+        return np.empty((n_queries, 0), dtype=np.intp)
+
+    if k < n_items:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        part = np.broadcast_to(np.arange(n_items), (n_queries, n_items))
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    threshold = part_scores.min(axis=1)
+
+    result = np.empty((n_queries, k), dtype=np.intp)
+    # Rows whose k-th score is tied with values outside the partition need the
+    # full tie set to pick the lowest indices; every other row sorts only k items.
+    tied = (scores >= threshold[:, None]).sum(axis=1) > k
+    for i in range(n_queries):
+        if tied[i]:
+            cols = np.flatnonzero(scores[i] >= threshold[i])
+            vals = scores[i, cols]
+        else:
+            cols = part[i]
+            vals = part_scores[i]
+        order = np.lexsort((cols, -vals))[:k]
+        result[i] = cols[order]
+    return result
+
+
+def blend(scores, rows, prior, prior_weight):
+    """(1 - w) * cosine + w * prior[rows], in place on ``scores``."""
+    if prior is None or not prior_weight:
+        return scores
+    scores *= 1 - prior_weight
+    scores += prior_weight * prior[rows]
+    return scores
+
+
+def score_ranges(matrix, ranges, query_vectors, k, prior=None, prior_weight=0.0):
+    """Cosine top-k of unit-length query vectors against the given row ranges.
+
+    ``matrix`` must already be row-normalised. With a per-row ``prior`` and a
+    non-zero ``prior_weight`` the scores are blended with it before ranking.
+    Returns (rows, scores) arrays of shape (n_queries, <=k) where rows index
+    into ``matrix``.
+    """
+    query_vectors = np.atleast_2d(np.asarray(query_vectors, dtype=matrix.dtype))
+    n_queries = query_vectors.shape[0]
+    if not ranges:
+        return np.empty((n_queries, 0), dtype=np.intp), np.empty((n_queries, 0), dtype=np.float32)
+
+    if len(ranges) == 1:
+        start, stop = ranges[0]
+        candidates = matrix[start:stop]
+        rows = np.arange(start, stop)
+    else:
+        candidates = np.concatenate([matrix[start:stop] for start, stop in ranges])
+        rows = np.concatenate([np.arange(start, stop) for start, stop in ranges])
+
+    out_rows = []
+    out_scores = []
+    matmul_seconds = select_seconds = 0.0
+    for offset in range(0, n_queries, QUERY_CHUNK):
+        start = time.perf_counter()
+        scores = blend(query_vectors[offset:offset + QUERY_CHUNK] @ candidates.T, rows, prior, prior_weight)
+        scored = time.perf_counter()
+        local = top_k(scores, k)
+        out_rows.append(rows[local])
+        out_scores.append(np.take_along_axis(scores, local, axis=1))
+        matmul_seconds += scored - start
+        select_seconds += time.perf_counter() - scored
+    observe("scoring.matmul", matmul_seconds)
+    observe("scoring.top_k", select_seconds)
+    return np.concatenate(out_rows), np.concatenate(out_scores)
@@ -0,0 +1,173 @@
+import os
+
+import numpy as np
+
+from app.models.scoring import QUERY_CHUNK, blend, score_ranges, top_k
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+IVF_INDEX_PATH = os.path.join(BASE_DIR, "data", "scalers", "ivf_index.npz")
+
+RECOMMENDER_BACKEND = os.getenv("RECOMMENDER_BACKEND", "exact")
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "16"))
+# Candidate slices at or below this many rows are always scored exactly; the
+# inverted file only pays off on wide, catalogue-scale queries.
+IVF_EXACT_THRESHOLD = int(os.getenv("IVF_EXACT_THRESHOLD", "20000"))
+
+
+# Reference backend: brute-force cosine over every candidate row.
+class ExactBackend:
+    name = "exact"
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+
+    def search(self, ranges, query_vectors, k, prior=None, prior_weight=0.0):
+        return score_ranges(self.matrix, ranges, query_vectors, k, prior, prior_weight)
+
+
+def _kmeans(sample, nlist, iterations, seed):
+    # Spherical k-means: vectors and centroids are unit length, so assignment
+    # is an argmax of dot products, matching the cosine scoring it accelerates.
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = _assign(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        counts = np.bincount(assign, minlength=nlist)
+        empty = counts == 0
+        # Re-seed empty lists from random points so no centroid is wasted.
+        sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+    return centroids
+
+
+def _assign(matrix, centroids, chunk=65536):
+    out = np.empty(len(matrix), dtype=np.int32)
+    for start in range(0, len(matrix), chunk):
+        out[start:start + chunk] = np.argmax(matrix[start:start + chunk] @ centroids.T, axis=1)
+    return out
+
+
+def build_ivf_index(matrix, nlist=None, iterations=20, sample_size=200000, seed=0):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    n = len(matrix)
+    if nlist is None:
+        nlist = int(np.clip(4 * np.sqrt(n), 1, 65536))
+    nlist = min(nlist, n)
+    rng = np.random.default_rng(seed)
+    sample = matrix if n <= sample_size else matrix[np.sort(rng.choice(n, size=sample_size, replace=False))]
+    centroids = _kmeans(sample, nlist, iterations, seed)
+
+    return _group_lists(centroids, _assign(matrix, centroids))
+
+
+def _group_lists(centroids, assign):
+    # Rows grouped by list and ascending within each list, so a list can be
+    # intersected with the candidate row ranges by binary search.
+    order = np.lexsort((np.arange(len(assign)), assign))
+    list_ptr = np.concatenate(([0], np.cumsum(np.bincount(assign, minlength=len(centroids))))).astype(np.int64)
+    return {"centroids": centroids, "list_ptr": list_ptr, "list_rows": order.astype(np.int32)}
+
+
+def update_ivf_index(index, old_source_row, source_row, matrix, changed):
+    """Carry an index over to a new store generation without re-clustering.
+
+    Unchanged rows keep their list (matched through ``source_row``, which is
+    stable across ingests); rows flagged in ``changed`` are assigned to the
+    nearest existing centroid.
+    """
+    centroids = index["centroids"]
+    old_assign = np.empty(len(old_source_row), dtype=np.int32)
+    old_assign[index["list_rows"]] = np.repeat(np.arange(len(centroids), dtype=np.int32), np.diff(index["list_ptr"]))
+    by_source = np.full(max(int(np.max(source_row, initial=-1)), int(np.max(old_source_row, initial=-1))) + 1, -1, dtype=np.int32)
+    by_source[old_source_row] = old_assign
+
+    assign = by_source[source_row]
+    changed = np.asarray(changed) | (assign < 0)
+    if changed.any():
+        assign[changed] = _assign(np.asarray(matrix)[changed], centroids)
+    return _group_lists(centroids, assign)
+
+
+def save_ivf_index(index, store_key, path=IVF_INDEX_PATH):
+    tmp_path = f"{path}.tmp-{os.getpid()}.npz"
+    np.savez(tmp_path, store_key=np.array(store_key), **index)
+    os.replace(tmp_path, path)
+
+
+def load_ivf_index(store_key, path=IVF_INDEX_PATH):
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        if str(data["store_key"]) != store_key:
+            return None
+        return {name: data[name] for name in ("centroids", "list_ptr", "list_rows")}
+
+
+def _in_ranges(rows, starts, stops):
+    slot = np.searchsorted(starts, rows, side="right") - 1
+    valid = slot >= 0
+    valid[valid] = rows[valid] < stops[slot[valid]]
+    return valid
+
+
+# Inverted-file (IVF) approximate backend. Each query is compared with the
+# list centroids, and only rows in the nprobe closest lists that also fall
+# inside the candidate ranges are scored exactly.
+class IVFBackend:
+    name = "ivf"
+
+    def __init__(self, matrix, index, nprobe=IVF_NPROBE, exact_threshold=IVF_EXACT_THRESHOLD):
+        self.matrix = matrix
+        self.centroids = index["centroids"]
+        self.list_ptr = index["list_ptr"]
+        self.list_rows = index["list_rows"]
+        self.nprobe = min(nprobe, len(self.centroids))
+        self.exact = ExactBackend(matrix)
+        self.exact_threshold = exact_threshold
+
+    def search(self, ranges, query_vectors, k, prior=None, prior_weight=0.0):
+        query_vectors = np.atleast_2d(np.asarray(query_vectors, dtype=self.matrix.dtype))
+        total = sum(stop - start for start, stop in ranges)
+        if total <= self.exact_threshold:
+            return self.exact.search(ranges, query_vectors, k, prior, prior_weight)
+
+        starts = np.array([start for start, _ in ranges])
+        stops = np.array([stop for _, stop in ranges])
+        n_queries = len(query_vectors)
+        k = min(k, total)
+        out_rows = np.full((n_queries, k), -1, dtype=np.intp)
+        out_scores = np.full((n_queries, k), -np.inf, dtype=np.float32)
+
+        for offset in range(0, n_queries, QUERY_CHUNK):
+            chunk = query_vectors[offset:offset + QUERY_CHUNK]
+            probes = top_k(chunk @ self.centroids.T, self.nprobe)
+            for i, (query, lists) in enumerate(zip(chunk, probes)):
+                rows = np.concatenate([self.list_rows[self.list_ptr[l]:self.list_ptr[l + 1]] for l in lists])
+                rows = np.sort(rows[_in_ranges(rows, starts, stops)])
+                if len(rows) < k:
+                    # Too few neighbours in the probed lists for this filter.
+                    r, s = self.exact.search(ranges, query[None, :], k, prior, prior_weight)
+                    out_rows[offset + i], out_scores[offset + i] = r[0], s[0]
+                    continue
+                scores = blend(self.matrix[rows] @ query, rows, prior, prior_weight)
+                local = top_k(scores[None, :], k)[0]
+                out_rows[offset + i] = rows[local]
+                out_scores[offset + i] = scores[local]
+        return out_rows, out_scores
+
+
+def make_backend(store, name=RECOMMENDER_BACKEND):
+    if name == "exact":
+        return ExactBackend(store.features_normed)
+    if name == "ivf":
+        index = load_ivf_index(store.key)
+        if index is None:
+            # Missing or built for another store generation: rebuild and persist.
+            index = build_ivf_index(store.features_normed)
+            save_ivf_index(index, store.key)
+        return IVFBackend(store.features_normed, index)
+    raise ValueError(f"Unknown recommender backend '{name}'")
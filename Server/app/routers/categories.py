@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Request
 from app.models.schemas import CategoryResponse
+from app.utils.categories import get_categories as list_categories
+from app.utils.responses import StaticJSON
 
 router = APIRouter()
 
+# genres_details.csv is read once per process, so the response is validated
+# and encoded once too.
+categories_response = StaticJSON(CategoryResponse(categories=list_categories()).model_dump())
+
 @router.get("/list", response_model=CategoryResponse)
-def get_categories():
-  from app.utils.categories import get_categories
-  return {"categories": get_categories()}
\ No newline at end of file
+async def get_categories(request: Request):
+  return categories_response.response(request)
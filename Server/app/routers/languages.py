@@ -1,15 +1,14 @@
-import pandas as pd
-from fastapi import APIRouter
-import os
+from fastapi import APIRouter, Request
 from app.models.schemas import LanguageResponse
+from app.utils.lookups import LANGUAGE_RECORDS
+from app.utils.responses import StaticJSON
 
 router = APIRouter()
 
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-languages_file = os.path.join(BASE_DIR,"data/language_codes.csv")
-languages_df = pd.read_csv(languages_file)
+# language_codes.csv is read once per process, so the response is validated
+# and encoded once too.
+languages_response = StaticJSON(LanguageResponse(languages=[dict(record) for record in LANGUAGE_RECORDS]).model_dump())
 
 @router.get("/list", response_model=LanguageResponse)
-def get_languages():
-    languages_list = languages_df.to_dict(orient="records")
-    return {"languages": languages_list}
\ No newline at end of file
+async def get_languages(request: Request):
+    return languages_response.response(request)
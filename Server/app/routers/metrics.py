@@ -0,0 +1,23 @@
+from fastapi import APIRouter
+
+from app.routers.movies import recommender
+from app.utils.feeds import feeds
+from app.utils.metrics import latency_summary
+from app.utils.tmdb_client import tmdb_client
+
+router = APIRouter()
+
+@router.get("/latency")
+def get_latency():
+    return {"stages": latency_summary()}
+
+@router.get("/cache")
+def get_cache_stats():
+    stats = {"tmdb": tmdb_client.cache_stats()}
+    if recommender.loaded:
+        stats["recommend"] = recommender.current.result_cache.stats()
+    return stats
+
+@router.get("/feeds")
+def get_feed_stats():
+    return {"feeds": feeds.stats()}
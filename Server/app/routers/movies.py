@@ -1,101 +1,205 @@
-from fastapi import APIRouter, Query
-from app.models.schemas import MovieRequest, MovieResponse, MovieCardDetails, MovieDetails, CastDetails
-from app.models.movie_model import MovieRecommender
-from dotenv import load_dotenv
-import os
+from fastapi import APIRouter, HTTPException, Query, Response
+from app.models.schemas import MovieRequest, MovieResponse, MovieCardDetails, MovieDetails, CastDetails, BatchMovieRequest, BatchMovieResponse
+from app.models.movie_model import RecommenderHolder, RecommendationQuery
+from app.models.neighbours import NEIGHBOURS
+from fastapi.concurrency import run_in_threadpool
+from app.utils.admission import RouteLimiter
+from app.utils.metrics import add_collector, timed
+from app.utils.responses import json_response
 from typing import List, Optional 
-import pandas as pd
-
-load_dotenv()
-TMDB_API_KEY = os.getenv("TMDB_API_KEY")
+import logging
+import os
 
 router = APIRouter()
 
-recommender = MovieRecommender(
-    genres=[],
-    release_year=0,
-    runtime=0,
-    vote_average=0.0,
-    language="",
-    adult=0
-)
-
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-language_path = os.path.join(BASE_DIR, "../../data/language_codes.csv")
-genre_path = os.path.join(BASE_DIR, "../../data/genres_details.csv")
-
-language_details = pd.read_csv(language_path)
-genre_details = pd.read_csv(genre_path)
+recommender = RecommenderHolder()
+
+# Concurrency caps for the routes that may call TMDB, one pool each so a
+# spike on one route cannot starve the others.
+limits = {name: RouteLimiter(name) for name in ("recommend", "trending", "new_releases", "search", "details", "cast", "similar")}
+
+def _result_cache_metrics():
+    if not recommender.loaded:
+        return
+    stats = recommender.current.result_cache.stats()
+    for field in ("hits", "misses", "evictions"):
+        yield f"recommend_cache_{field}_total", "counter", {}, stats[field]
+    yield "recommend_cache_entries", "gauge", {}, stats["size"]
+
+add_collector(_result_cache_metrics)
+
+# With RECOMMEND_QUERY_LOG set, every /recommend body is appended to that file
+# as one JSON line; ml_model/src/warm_recommend_cache.py turns the log into
+# the list of query buckets preloaded into the result cache.
+query_log = logging.getLogger("app.recommend_queries")
+if os.getenv("RECOMMEND_QUERY_LOG"):
+    _handler = logging.FileHandler(os.getenv("RECOMMEND_QUERY_LOG"))
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    query_log.addHandler(_handler)
+    query_log.setLevel(logging.INFO)
+    query_log.propagate = False
+
+async def current_model():
+    # Until the warm-up has loaded it, the first requests load (or wait for)
+    # the model in a worker thread rather than blocking the event loop.
+    if recommender.loaded:
+        return recommender.current
+    return await run_in_threadpool(lambda: recommender.current)
+
+def to_recommendation_query(request: MovieRequest) -> RecommendationQuery:
+    # An explicit year range wins over the single release_year the client sends;
+    # an empty language (the client's "Any Language") leaves languages open.
+    languages = list(request.languages or [])
+    if request.language:
+        languages.append(request.language)
+    return RecommendationQuery(
+        genres=tuple(request.genres),
+        runtime=request.runtime,
+        vote_average=request.vote_average,
+        adult=request.adult,
+        year_from=request.release_year_from if request.release_year_from is not None else request.release_year,
+        year_to=request.release_year_to if request.release_year_to is not None else request.release_year,
+        languages=tuple(languages),
+        ranking=request.ranking,
+        popularity_weight=request.popularity_weight,
+        cooccurrence_weight=request.cooccurrence_weight,
+    )
 
 @router.post("/recommend", response_model=MovieResponse)
-def recommend_movies(request: MovieRequest):
-    recommender.genres = request.genres
-    recommender.release_year = request.release_year
-    recommender.runtime = request.runtime
-    recommender.vote_average = request.vote_average
-    recommender.language = request.language
-    recommender.adult = request.adult
-    recommendations = recommender.recommend_movies()
-    print(recommendations)
-
-    movie_details = []
-    from app.utils.movies import get_model_movie_details
-    for rec in recommendations:
-        details = get_model_movie_details(rec["Movie_id"])
-        if details:
-            movie_details.append(details)
-        
-    return {"recommended_movies": movie_details}
-
+async def recommend_movies(request: MovieRequest):
+    if query_log.handlers:
+        query_log.info(request.model_dump_json())
+    # Cache hits are answered inline; scoring is CPU-bound numpy work, so a
+    # miss runs off the event loop.
+    model = await current_model()
+    query = to_recommendation_query(request)
+    with timed("recommend.scoring"):
+        recommendations = model.cached(query)
+        if recommendations is None:
+            recommendations = await run_in_threadpool(model.compute, query)
+
+    from app.utils.movies import get_movie_details_batch
+    async with limits["recommend"]:
+        with timed("recommend.hydration"):
+            movie_details, missing = await get_movie_details_batch([rec["Movie_id"] for rec in recommendations])
+
+    return {
+        "recommended_movies": movie_details,
+        "partial": bool(missing),
+        "missing_movie_ids": missing
+    }
+
+@router.post("/recommend/batch", response_model=BatchMovieResponse)
+def recommend_movies_batch(request: BatchMovieRequest):
+    # Ids and scores only: batch callers are precompute jobs that hydrate
+    # details themselves, so no TMDB lookups happen on this path.
+    queries = [to_recommendation_query(q) for q in request.queries]
+    results = recommender.current.recommend_batch(queries, request.k)
+    return {
+        "results": [
+            {
+                "movie_ids": [rec["Movie_id"] for rec in recs],
+                "scores": [rec["Score"] for rec in recs],
+            }
+            for recs in results
+        ]
+    }
+
+
+# Card lists are built in MovieCardDetails shape by app.utils.movies, so the
+# routes below encode them directly instead of validating every card against
+# the response_model.
+def feed_response(feed):
+    body, next_cursor = feed.payload
+    headers = {"Age": str(int(feed.age()))}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @router.get("/trending", response_model=List[MovieCardDetails])
-def get_trending_movies():
+async def get_trending_movies():
+    from app.utils.feeds import feeds
     from app.utils.movies import get_trending_movies
-    return get_trending_movies()
-    
+
+    feed = feeds.get(("trending",))
+    if feed is not None:
+        return feed_response(feed)
+    async with limits["trending"]:
+        return json_response(await get_trending_movies())
 
 
 @router.get("/new_releases", response_model=List[MovieCardDetails])
-def filtered_movies(
+async def filtered_movies(
     genres: Optional[List[str]] = Query(None),
     release_year: Optional[int] = Query(None, ge=1900),
     min_vote: Optional[float] = Query(None, ge=0, le=10),
     sort_by: Optional[str] = Query("Latest"),
     language: Optional[str] = Query(None),
     limit: int = Query(20, ge=1, le=100),
-    page: int = Query(1, ge=1)
+    page: int = Query(1, ge=1),
+    cursor: Optional[str] = Query(None)
 ):
-    from app.utils.movies import get_filtered_movies
-
-    return get_filtered_movies(
-        genres=genres,
-        release_year=release_year,
-        min_vote=min_vote,
-        sort_by=sort_by,
-        language=language,
-        limit=limit,
-        page=page
-    )
+    from app.utils.feeds import discover_feed_key, feeds
+    from app.utils.movies import get_filtered_movies_page, InvalidCursorError
+
+    # Unfiltered pages are shared by every visitor and kept warm in the
+    # background; serve them as built, even while a refresh is running.
+    if not (genres or release_year or min_vote or language or cursor):
+        feed = feeds.get(discover_feed_key(sort_by, limit, page))
+        if feed is not None:
+            return feed_response(feed)
+
+    try:
+        async with limits["new_releases"]:
+            movies, next_cursor = await get_filtered_movies_page(
+                genres=genres,
+                release_year=release_year,
+                min_vote=min_vote,
+                sort_by=sort_by,
+                language=language,
+                limit=limit,
+                page=page,
+                cursor=cursor
+            )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Pass back as ?cursor= to continue exactly where this response stopped.
+    return json_response(movies, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
 
 @router.get("/search", response_model=List[MovieCardDetails])
-def search_movies(query: str, limit: int = Query(10, ge=1, le=100), page: int = Query(1, ge=1)):
+async def search_movies(query: str, limit: int = Query(10, ge=1, le=100), page: int = Query(1, ge=1)):
     from app.utils.movies import search_movies
 
-    return search_movies(query=query, limit=limit, page=page)
+    async with limits["search"]:
+        return json_response(await search_movies(query=query, limit=limit, page=page))
 
 @router.get("/{movie_id}", response_model=MovieDetails)
-def get_movie_details(movie_id: int):
+async def get_movie_details(movie_id: int):
     from app.utils.movies import get_model_movie_details
 
-    details = get_model_movie_details(movie_id)
+    async with limits["details"]:
+        details = await get_model_movie_details(movie_id)
     if details:
         return details
     else:
         return None
 
 @router.get("/{movie_id}/cast", response_model=List[CastDetails])
-def get_movie_cast(movie_id: int):
+async def get_movie_cast(movie_id: int):
     from app.utils.movies import get_movie_cast
 
-    cast = get_movie_cast(movie_id)
-    return cast
\ No newline at end of file
+    async with limits["cast"]:
+        cast = await get_movie_cast(movie_id)
+    return cast
+
+@router.get("/{movie_id}/similar", response_model=List[MovieCardDetails])
+async def get_similar_movies(movie_id: int, limit: int = Query(10, ge=1, le=NEIGHBOURS)):
+    from app.utils.movies import get_similar_movies
+
+    model = await current_model()
+    async with limits["similar"]:
+        similar = await get_similar_movies(model, movie_id, limit)
+    if similar is None:
+        raise HTTPException(status_code=404, detail="Movie not found")
+    return json_response(similar)
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import time
+
+from fastapi import HTTPException
+
+from app.utils.metrics import add_collector, histogram, increment
+
+# Defaults for every limited route; ROUTE_MAX_CONCURRENCY_<NAME> (e.g.
+# ROUTE_MAX_CONCURRENCY_SEARCH) overrides the limit of one route.
+ROUTE_MAX_CONCURRENCY = int(os.getenv("ROUTE_MAX_CONCURRENCY", "32"))
+# Requests allowed to wait for a slot, and for how long, before they are
+# turned away with a 503.
+ROUTE_MAX_QUEUE = int(os.getenv("ROUTE_MAX_QUEUE", "64"))
+ROUTE_QUEUE_TIMEOUT = float(os.getenv("ROUTE_QUEUE_TIMEOUT", "0.5"))
+ROUTE_RETRY_AFTER = 1
+
+_limiters = []
+
+
+# Bounds how many requests of one route run at once. Excess requests queue
+# briefly, and are rejected with 503 + Retry-After once the queue is full or
+# their deadline passes, so an overloaded route answers quickly instead of
+# stacking up work (and upstream calls) that would time out anyway.
+class RouteLimiter:
+    def __init__(self, name, limit=None, max_queue=ROUTE_MAX_QUEUE, queue_timeout=ROUTE_QUEUE_TIMEOUT):
+        if limit is None:
+            limit = int(os.getenv(f"ROUTE_MAX_CONCURRENCY_{name.upper()}", ROUTE_MAX_CONCURRENCY))
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self._semaphore = None
+        self._loop = None
+        _limiters.append(self)
+
+    def _ensure_semaphore(self):
+        # Like the TMDB client's pool, the semaphore belongs to one event loop.
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.limit)
+            self._loop = loop
+            self.active = self.waiting = 0
+        return self._semaphore
+
+    def _reject(self, reason):
+        increment("route_rejected_total", route=self.name, reason=reason)
+        raise HTTPException(status_code=503, detail="Server busy, retry shortly", headers={"Retry-After": str(ROUTE_RETRY_AFTER)})
+
+    async def __aenter__(self):
+        semaphore = self._ensure_semaphore()
+        if semaphore.locked():
+            if self.waiting >= self.max_queue:
+                self._reject("queue_full")
+            self.waiting += 1
+            start = time.perf_counter()
+            try:
+                await asyncio.wait_for(semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._reject("deadline")
+            finally:
+                self.waiting -= 1
+                histogram("route_queue_wait_seconds", route=self.name).observe(time.perf_counter() - start)
+        else:
+            await semaphore.acquire()
+        self.active += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        self.active -= 1
+        self._semaphore.release()
+
+
+def _admission_metrics():
+    for limiter in _limiters:
+        yield "route_inflight", "gauge", {"route": limiter.name}, limiter.active
+        yield "route_queued", "gauge", {"route": limiter.name}, limiter.waiting
+
+
+add_collector(_admission_metrics)
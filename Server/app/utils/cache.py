@@ -0,0 +1,190 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+def cache_key(namespace: str, params: Optional[dict] = None):
+    # Parameter order, None values and the case/whitespace of free-text search
+    # queries must not split one logical request across several cache entries.
+    normalised = {}
+    for key, value in (params or {}).items():
+        if value is None or key == "api_key":
+            continue
+        value = str(value).strip()
+        if key == "query":
+            value = " ".join(value.lower().split())
+        normalised[key] = value
+    return f"{namespace}?{json.dumps(normalised, sort_keys=True, separators=(',', ':'))}"
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def as_dict(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round(self.hits / total, 4) if total else None,
+        }
+
+
+# In-process LRU with a per-entry expiry time. Thread-safe so it can be shared
+# by the event loop and threadpool handlers alike. Expired entries stay until
+# they are replaced or evicted, so get_stale can still serve them when
+# upstream is unavailable.
+class LRUCache:
+    def __init__(self, maxsize: int = 2048):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = CacheStats()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def get_stale(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+        return None if entry is None else entry[1]
+
+    def set(self, key, value, ttl: float):
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Optional second tier that survives restarts. Values are stored as JSON, so
+# it only suits the plain dict/list payloads TMDB returns.
+class SqliteCache:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value TEXT NOT NULL)"
+        )
+        self.stats = CacheStats()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT expires_at, value FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return None
+            if row[0] < time.time():
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+            self.stats.hits += 1
+            return json.loads(row[1])
+
+    def get_with_expiry(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT expires_at, value FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None or row[0] < time.time():
+            return None, None
+        return json.loads(row[1]), row[0]
+
+    def get_stale(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def set(self, key, value, ttl: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, expires_at, value) VALUES (?, ?, ?)",
+                (key, time.time() + ttl, json.dumps(value)),
+            )
+
+    def purge_expired(self):
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+            self.stats.evictions += cursor.rowcount
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+
+class TieredCache:
+    def __init__(self, memory: LRUCache, disk: Optional[SqliteCache] = None):
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None or self.disk is None:
+            return value
+        value, expires_at = self.disk.get_with_expiry(key)
+        if value is None:
+            self.disk.stats.misses += 1
+            return None
+        self.disk.stats.hits += 1
+        # Promote into memory for the remainder of its original lifetime.
+        self.memory.set(key, value, max(0.0, expires_at - time.time()))
+        return value
+
+    def get_stale(self, key):
+        # Any stored value, however old; only for when a fresh one cannot be fetched.
+        value = self.memory.get_stale(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get_stale(key)
+        return value
+
+    def set(self, key, value, ttl: float):
+        self.memory.set(key, value, ttl)
+        if self.disk is not None:
+            self.disk.set(key, value, ttl)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self):
+        stats = {"memory": dict(self.memory.stats.as_dict(), size=len(self.memory), maxsize=self.memory.maxsize)}
+        if self.disk is not None:
+            stats["disk"] = dict(self.disk.stats.as_dict(), path=self.disk.path)
+        return stats
+
+
+def build_cache_from_env():
+    memory = LRUCache(int(os.getenv("TMDB_CACHE_SIZE", "2048")))
+    sqlite_path = os.getenv("TMDB_CACHE_SQLITE")
+    return TieredCache(memory, SqliteCache(sqlite_path) if sqlite_path else None)
@@ -0,0 +1,179 @@
+import json
+import os
+import sqlite3
+import threading
+
+from app.utils.lookups import genre_names
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CATALOGUE_PATH = os.getenv("CATALOGUE_PATH", os.path.join(BASE_PATH, "data", "catalogue.sqlite"))
+ML_DATA_PATH = os.path.join(BASE_PATH, "ml_model", "data")
+
+# Every field MovieDetails needs. A catalogue row with all of them set can be
+# served without touching TMDB; anything less is topped up from the network.
+DETAIL_FIELDS = ["title", "overview", "genres", "poster_path", "release_date", "runtime", "vote_average", "vote_count", "language"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS movies (
+    movie_id INTEGER PRIMARY KEY,
+    title TEXT,
+    overview TEXT,
+    genres TEXT,
+    poster_path TEXT,
+    backdrop_path TEXT,
+    release_date TEXT,
+    release_year INTEGER,
+    runtime INTEGER,
+    vote_average REAL,
+    vote_count INTEGER,
+    language TEXT,
+    adult INTEGER
+)
+"""
+COLUMNS = ["movie_id", "title", "overview", "genres", "poster_path", "backdrop_path", "release_date",
+           "release_year", "runtime", "vote_average", "vote_count", "language", "adult"]
+
+
+def _none_if_missing(value):
+    if value is None:
+        return None
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def catalogue_rows_from_csv(ml_data_path=ML_DATA_PATH):
+    import pandas as pd
+
+    movies = pd.read_csv(os.path.join(ml_data_path, "movie_data.csv")).drop_duplicates("Movie_id")
+    ratings = pd.read_csv(os.path.join(ml_data_path, "movie_ratings.csv")).drop_duplicates("Movie_id")
+    links = pd.read_csv(os.path.join(ml_data_path, "movie_links.csv")).drop_duplicates("Movie_id")
+    merged = movies.merge(ratings, on="Movie_id", how="left").merge(links, on="Movie_id", how="left")
+    for record in merged.to_dict(orient="records"):
+        genre_ids = json.loads(record["Genres"]) if isinstance(record["Genres"], str) else []
+        year = _none_if_missing(record["Release_year"])
+        yield {
+            "movie_id": int(record["Movie_id"]),
+            "title": record["Title"],
+            "overview": None,
+            "genres": genre_names(genre_ids),
+            "poster_path": _none_if_missing(record["Poster_path"]),
+            "backdrop_path": _none_if_missing(record["Backdrop_path"]),
+            "release_date": None,
+            "release_year": int(year) if year is not None else None,
+            "runtime": int(record["Runtime"]),
+            "vote_average": _none_if_missing(record["Vote_average"]),
+            "vote_count": int(record["Vote_count"]) if _none_if_missing(record["Vote_count"]) is not None else None,
+            "language": record["Language"],
+            "adult": int(bool(record["Adult"])),
+        }
+
+
+def catalogue_row_from_tmdb(data):
+    # Accepts both /movie/{id} payloads (genres as objects) and list payloads
+    # (genre_ids), as found in TMDB JSONL dumps.
+    genres = data.get("genres")
+    if genres is None:
+        genres = genre_names(data.get("genre_ids", []))
+    else:
+        genres = [g["name"] if isinstance(g, dict) else g for g in genres]
+    release_date = data.get("release_date") or None
+    return {
+        "movie_id": int(data["id"]),
+        "title": data.get("title"),
+        "overview": data.get("overview"),
+        "genres": genres,
+        "poster_path": data.get("poster_path"),
+        "backdrop_path": data.get("backdrop_path"),
+        "release_date": release_date,
+        "release_year": int(release_date[:4]) if release_date else None,
+        "runtime": data.get("runtime"),
+        "vote_average": data.get("vote_average"),
+        "vote_count": data.get("vote_count"),
+        "language": data.get("original_language"),
+        "adult": int(bool(data.get("adult", False))),
+    }
+
+
+def upsert_rows(conn, rows):
+    # Newer values win, but a NULL never overwrites something we already know.
+    placeholders = ", ".join("?" for _ in COLUMNS)
+    updates = ", ".join(f"{c} = COALESCE(excluded.{c}, movies.{c})" for c in COLUMNS[1:])
+    sql = f"INSERT INTO movies ({', '.join(COLUMNS)}) VALUES ({placeholders}) ON CONFLICT(movie_id) DO UPDATE SET {updates}"
+    count = 0
+    for row in rows:
+        values = [json.dumps(row[c]) if c == "genres" and row[c] is not None else row[c] for c in COLUMNS]
+        conn.execute(sql, values)
+        count += 1
+    return count
+
+
+def build_catalogue(path=CATALOGUE_PATH, tmdb_records=(), ml_data_path=ML_DATA_PATH):
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute(SCHEMA)
+        with conn:
+            count = upsert_rows(conn, catalogue_rows_from_csv(ml_data_path))
+            count += upsert_rows(conn, (catalogue_row_from_tmdb(r) for r in tmdb_records))
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    return count
+
+
+# Read-only view of the catalogue used on the request path. If the file has not
+# been built yet every lookup misses and callers fall back to TMDB.
+class Catalogue:
+    def __init__(self, path=CATALOGUE_PATH):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        if self._conn is None and os.path.exists(self.path):
+            self._conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+        return self._conn
+
+    def get_movie(self, movie_id: int):
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return None
+            row = conn.execute("SELECT * FROM movies WHERE movie_id = ?", (movie_id,)).fetchone()
+        if row is None:
+            return None
+        movie = dict(row)
+        movie["genres"] = json.loads(movie["genres"]) if movie["genres"] else []
+        return movie
+
+    def get_movies(self, movie_ids):
+        with self._lock:
+            conn = self._connection()
+            if conn is None or not movie_ids:
+                return {}
+            placeholders = ", ".join("?" for _ in movie_ids)
+            rows = conn.execute(f"SELECT * FROM movies WHERE movie_id IN ({placeholders})", list(movie_ids)).fetchall()
+        movies = {}
+        for row in rows:
+            movie = dict(row)
+            movie["genres"] = json.loads(movie["genres"]) if movie["genres"] else []
+            movies[movie["movie_id"]] = movie
+        return movies
+
+    def reload(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+            self._conn = None
+
+
+def is_complete(movie):
+    return all(movie.get(field) is not None for field in DETAIL_FIELDS)
+
+
+catalogue = Catalogue()
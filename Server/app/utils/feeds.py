@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import os
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.models.schemas import MovieCardDetails
+from app.utils.metrics import add_collector, histogram, increment
+from app.utils.movies import get_filtered_movies_page, get_trending_movies
+from app.utils.tmdb_client import UpstreamUnavailable
+
+# Refresh intervals (seconds) for the feeds every visitor shares; 0 turns the
+# background refresher off and every request goes to TMDB (through the cache)
+# as before.
+FEED_REFRESH_INTERVAL_TRENDING = float(os.getenv("FEED_REFRESH_INTERVAL_TRENDING", "600"))
+FEED_REFRESH_INTERVAL_DISCOVER = float(os.getenv("FEED_REFRESH_INTERVAL_DISCOVER", "300"))
+# A failed refresh is retried sooner than a full interval.
+FEED_RETRY_INTERVAL = float(os.getenv("FEED_RETRY_INTERVAL", "30"))
+# Unfiltered /new_releases pages kept warm for each sort order, at the
+# Movies page's page size.
+FEED_DISCOVER_PAGES = int(os.getenv("FEED_DISCOVER_PAGES", "3"))
+FEED_DISCOVER_SORTS = ("Latest", "Top Rated", "Popularity", "A-Z")
+FEED_PAGE_SIZE = 20
+
+logger = logging.getLogger(__name__)
+
+_cards = TypeAdapter(List[MovieCardDetails])
+
+
+class Feed:
+    def __init__(self, name, build, interval):
+        self.name = name
+        self.build = build
+        self.interval = interval
+        # (response body, next cursor); replaced in one assignment, so readers
+        # keep the previous version while a refresh is running.
+        self.payload = None
+        self.updated = None
+        self.failures = 0
+        self.next_refresh = 0.0
+
+    def age(self):
+        return None if self.updated is None else time.time() - self.updated
+
+    async def refresh(self):
+        start = time.perf_counter()
+        status = "error"
+        try:
+            cards, next_cursor = await self.build()
+            # An empty shared feed means TMDB failed (unfiltered lists are
+            # never empty), so the previous payload is kept.
+            if cards:
+                self.payload = (_cards.dump_json(_cards.validate_python(cards)), next_cursor)
+                self.updated = time.time()
+                status = "ok"
+        except UpstreamUnavailable:
+            logger.warning("Refreshing feed %s skipped: TMDB request budget exhausted", self.name)
+        except Exception:
+            logger.exception("Refreshing feed %s failed", self.name)
+        elapsed = time.perf_counter() - start
+        histogram("feed_refresh_duration_seconds", feed=self.name).observe(elapsed)
+        increment("feed_refreshes_total", feed=self.name, status=status)
+        if status == "ok":
+            self.failures = 0
+            self.next_refresh = time.monotonic() + self.interval
+        else:
+            self.failures += 1
+            self.next_refresh = time.monotonic() + min(self.interval, FEED_RETRY_INTERVAL)
+
+    def stats(self):
+        age = self.age()
+        return {
+            "age_s": None if age is None else round(age, 1),
+            "interval_s": self.interval,
+            "failures": self.failures,
+            "bytes": len(self.payload[0]) if self.payload else 0,
+        }
+
+
+# Shared feeds rebuilt in the background on their own schedule and served
+# from memory, however old, whenever a request matches one. Until a feed's
+# first refresh succeeds, requests for it take the normal TMDB path.
+class FeedRefresher:
+    def __init__(self):
+        self.feeds = {}
+
+    def add(self, key, name, build, interval):
+        if interval > 0:
+            self.feeds[key] = Feed(name, build, interval)
+
+    def get(self, key):
+        feed = self.feeds.get(key)
+        if feed is None or feed.payload is None:
+            return None
+        return feed
+
+    async def run(self):
+        # Refreshes run one at a time so the refresher never adds a burst of
+        # its own to TMDB.
+        while self.feeds:
+            for feed in self.feeds.values():
+                if feed.next_refresh <= time.monotonic():
+                    await feed.refresh()
+            wake = min(feed.next_refresh for feed in self.feeds.values())
+            await asyncio.sleep(max(wake - time.monotonic(), 1.0))
+
+    def stats(self):
+        return {feed.name: feed.stats() for feed in self.feeds.values()}
+
+
+def discover_feed_key(sort_by, limit, page):
+    return ("discover", sort_by, limit, page)
+
+
+async def _trending():
+    return await get_trending_movies(fresh=True), None
+
+
+def _discover(sort_by, limit, page):
+    async def build():
+        cards, next_cursor = await get_filtered_movies_page(sort_by=sort_by, limit=limit, page=page, fresh=True)
+        if len(cards) < limit and next_cursor:
+            # Cut short by an upstream failure; keep the previous page.
+            return [], None
+        return cards, next_cursor
+    return build
+
+
+feeds = FeedRefresher()
+feeds.add(("trending",), "trending", _trending, FEED_REFRESH_INTERVAL_TRENDING)
+# The home page's "New Releases" row.
+feeds.add(discover_feed_key("Latest", 10, 1), "discover:Latest:10:1", _discover("Latest", 10, 1), FEED_REFRESH_INTERVAL_DISCOVER)
+for _sort_by in FEED_DISCOVER_SORTS:
+    for _page in range(1, FEED_DISCOVER_PAGES + 1):
+        feeds.add(
+            discover_feed_key(_sort_by, FEED_PAGE_SIZE, _page),
+            f"discover:{_sort_by}:{FEED_PAGE_SIZE}:{_page}",
+            _discover(_sort_by, FEED_PAGE_SIZE, _page),
+            FEED_REFRESH_INTERVAL_DISCOVER,
+        )
+
+
+def _feed_metrics():
+    for feed in feeds.feeds.values():
+        yield "feed_age_seconds", "gauge", {"feed": feed.name}, feed.age()
+        yield "feed_consecutive_failures", "gauge", {"feed": feed.name}, feed.failures
+
+
+add_collector(_feed_metrics)
@@ -0,0 +1,54 @@
+import csv
+import os
+from types import MappingProxyType
+
+# Genre and language reference tables, read once per process and exposed as
+# read-only dicts. Every router/util that turns TMDB ids or codes into display
+# names (or user-supplied names back into ids) uses these instead of scanning
+# the CSVs with pandas per movie card.
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+GENRES_FILE = os.path.join(BASE_PATH, "data", "genres_details.csv")
+LANGUAGES_FILE = os.path.join(BASE_PATH, "data", "language_codes.csv")
+
+
+def _read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+_genre_rows = _read_csv(GENRES_FILE)
+_language_rows = _read_csv(LANGUAGES_FILE)
+
+# Records in file order, shaped like the CategoryDetails/LanguageDetails schemas.
+GENRE_RECORDS = tuple(
+    MappingProxyType({"Genre_id": int(row["Genre_id"]), "Genre_name": row["Genre_name"]}) for row in _genre_rows
+)
+LANGUAGE_RECORDS = tuple(
+    MappingProxyType({"Language_code": row["Language_code"], "Language_name": row["Language_name"]}) for row in _language_rows
+)
+
+# id -> name and normalised name -> id. Where a table repeats a key the first
+# row wins, matching the previous `.values[0]` lookups.
+GENRE_NAMES = MappingProxyType({r["Genre_id"]: r["Genre_name"] for r in reversed(GENRE_RECORDS)})
+GENRE_IDS = MappingProxyType({r["Genre_name"].strip().lower(): r["Genre_id"] for r in reversed(GENRE_RECORDS)})
+LANGUAGE_NAMES = MappingProxyType({r["Language_code"]: r["Language_name"] for r in reversed(LANGUAGE_RECORDS)})
+LANGUAGE_CODES = MappingProxyType({r["Language_name"].strip().lower(): r["Language_code"] for r in reversed(LANGUAGE_RECORDS)})
+
+
+def genre_names(genre_ids):
+    return [GENRE_NAMES[g] for g in genre_ids if g in GENRE_NAMES]
+
+
+def genre_id(name):
+    return GENRE_IDS.get(str(name).strip().lower())
+
+
+def language_name(code, default="Unknown"):
+    return LANGUAGE_NAMES.get(code, default)
+
+
+def language_code(name):
+    if name is None:
+        return None
+    return LANGUAGE_CODES.get(name.strip().lower())
@@ -0,0 +1,205 @@
+import bisect
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import numpy as np
+
+# Rolling latency samples per named stage (e.g. "recommend.scoring"). Each
+# recorder keeps the most recent WINDOW observations so percentiles track
+# current behaviour rather than the whole process lifetime, plus cumulative
+# histogram buckets for the Prometheus export on /metrics.
+WINDOW = 4096
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+STAGE_HISTOGRAM = "app_stage_duration_seconds"
+
+
+class LatencyRecorder:
+    def __init__(self, window: int = WINDOW, buckets=BUCKETS):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.sum = 0.0
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            self.sum += seconds
+            self.bucket_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+
+    def snapshot(self):
+        with self._lock:
+            samples = np.fromiter(self._samples, dtype=np.float64)
+            count = self.count
+        if samples.size == 0:
+            return {"count": count, "window": 0, "p50_ms": None, "p99_ms": None, "mean_ms": None}
+        p50, p99 = np.percentile(samples, [50, 99]) * 1000
+        return {
+            "count": count,
+            "window": int(samples.size),
+            "p50_ms": round(float(p50), 3),
+            "p99_ms": round(float(p99), 3),
+            "mean_ms": round(float(samples.mean() * 1000), 3),
+        }
+
+    def histogram(self):
+        with self._lock:
+            counts = list(self.bucket_counts)
+            total, count = self.sum, self.count
+        cumulative = np.cumsum(counts).tolist()
+        return list(zip(self.buckets + (float("inf"),), cumulative)), total, count
+
+
+_histograms = {}
+_counters = {}
+_collectors = []
+_registry_lock = threading.Lock()
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def histogram(name: str, **labels) -> LatencyRecorder:
+    key = _key(name, labels)
+    rec = _histograms.get(key)
+    if rec is None:
+        with _registry_lock:
+            rec = _histograms.setdefault(key, LatencyRecorder())
+    return rec
+
+
+def recorder(stage: str) -> LatencyRecorder:
+    return histogram(STAGE_HISTOGRAM, stage=stage)
+
+
+def increment(name: str, value: float = 1, **labels):
+    key = _key(name, labels)
+    with _registry_lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def add_collector(collect):
+    # ``collect()`` is called on every /metrics scrape and yields
+    # (name, type, labels, value) tuples for values owned elsewhere, such as
+    # cache statistics.
+    _collectors.append(collect)
+
+
+# Stage breakdown of the current request, when it asked for one (see the
+# middleware in app/main.py). Handlers, threadpool work and tasks spawned by
+# the request all run in a copy of its context, so they append to the same
+# list.
+_trace = ContextVar("trace", default=None)
+
+
+def start_trace():
+    return _trace.set([])
+
+
+def end_trace(token):
+    entries = _trace.get()
+    _trace.reset(token)
+    return entries or []
+
+
+def trace(stage: str, seconds: float = 0.0):
+    entries = _trace.get()
+    if entries is not None:
+        entries.append((stage, seconds))
+
+
+def observe(stage: str, seconds: float):
+    recorder(stage).observe(seconds)
+    trace(stage, seconds)
+
+
+@contextmanager
+def timed(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start)
+
+
+def latency_summary():
+    return {
+        dict(labels)["stage"]: rec.snapshot()
+        for (name, labels), rec in sorted(_histograms.items())
+        if name == STAGE_HISTOGRAM
+    }
+
+
+def server_timing(entries):
+    """Aggregate trace entries into a Server-Timing header value."""
+    totals = {}
+    for stage, seconds in entries:
+        total, calls = totals.get(stage, (0.0, 0))
+        totals[stage] = (total + seconds, calls + 1)
+    return ", ".join(
+        f'{stage};dur={total * 1000:.3f}' + (f';desc="x{calls}"' if calls > 1 else "")
+        for stage, (total, calls) in totals.items()
+    )
+
+
+_NAME_INVALID = re.compile(r"[^a-zA-Z0-9_:]")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus():
+    """Every histogram, counter and collected value in the Prometheus text format."""
+    lines = []
+    with _registry_lock:
+        histograms = sorted(_histograms.items())
+        counters = sorted(_counters.items())
+
+    seen = set()
+    for (name, labels), rec in histograms:
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# TYPE {name} histogram")
+        buckets, total, count = rec.histogram()
+        for bound, cumulative in buckets:
+            lines.append(f"{name}_bucket{_labels(labels + (('le', _number(bound)),))} {cumulative}")
+        lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+        lines.append(f"{name}_count{_labels(labels)} {count}")
+
+    for (name, labels), value in counters:
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+    for collect in _collectors:
+        for name, kind, labels, value in collect():
+            if value is None:
+                continue
+            name = _NAME_INVALID.sub("_", name)
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name}{_labels(tuple(sorted(labels.items())))} {_number(value)}")
+    return "\n".join(lines) + "\n"
@@ -1,101 +1,207 @@
-import requests
+import asyncio
+import base64
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
+import hashlib
+import json
 import os
-import pandas as pd
 from typing import List, Optional
 import math
 
-load_dotenv()
-TMDB_API_KEY = os.getenv("TMDB_API_KEY")
-TMDB_BASE_URL = os.getenv("TMDB_BASE_URL")
-
-BASE_PATH = os.path.dirname(os.path.abspath(__file__))
-csv_path = os.path.join(BASE_PATH, "../../data/genres_details.csv")
-genre_details = pd.read_csv(csv_path)
+from fastapi.concurrency import run_in_threadpool
+from app.utils.tmdb_client import UpstreamUnavailable, tmdb_client
+from app.utils.catalogue import catalogue, is_complete
+from app.utils.lookups import genre_id, genre_names, language_code, language_name
+from app.utils.metrics import timed
+from app.utils.search_index import get_search_index
+
+RECOMMEND_HYDRATION_DEADLINE = float(os.getenv("RECOMMEND_HYDRATION_DEADLINE", "3.0"))
+# Discover pages fetched speculatively ahead of the one being consumed.
+DISCOVER_PREFETCH = int(os.getenv("DISCOVER_PREFETCH", "4"))
+# Upstream pages one /new_releases request may scan while looking for cards
+# with posters; past it the response is cut short and the cursor resumes.
+DISCOVER_MAX_PAGES = int(os.getenv("DISCOVER_MAX_PAGES", "10"))
+# TMDB refuses discover pages beyond this.
+TMDB_MAX_PAGE = 500
+
+class InvalidCursorError(ValueError):
+    pass
+
+def movie_card(movie):
+    # Shape one TMDB list result (trending/discover/search) as MovieCardDetails.
+    return {
+        "movie_id": movie.get("id"),
+        "title": movie.get("title") or "",
+        "genres": genre_names(movie.get("genre_ids", [])),
+        "poster_path": movie.get("poster_path"),
+        "release_date": movie.get("release_date") or "",
+        "language": language_name(movie.get("original_language"))
+    }
 
-language_path = os.path.join(BASE_PATH, "../../data/language_codes.csv")
-language_details = pd.read_csv(language_path)
+def _details_from_catalogue(local):
+    # Incomplete rows still make a usable card: the year stands in for the
+    # full release date and a missing overview is left empty.
+    release_date = local["release_date"]
+    if release_date is None and local["release_year"] is not None:
+        release_date = str(local["release_year"])
+    return {
+        "movie_id": local["movie_id"],
+        "title": local["title"],
+        "overview": local["overview"] or "",
+        "genres": local["genres"],
+        "poster_path": local["poster_path"],
+        "release_date": release_date or "",
+        "runtime": local["runtime"] or 0,
+        "vote_average": local["vote_average"] or 0.0,
+        "vote_count": local["vote_count"],
+        "language": language_name(local["language"])
+    }
 
-def get_model_movie_details(movie_id: int):
-    url = f"{TMDB_BASE_URL}movie/{movie_id}"
+async def _fetch_tmdb_movie_details(movie_id: int, local=None):
     params = {
-        "api_key": TMDB_API_KEY,
         "language": "en-US"
     }
-    response = requests.get(url, params=params)
-    if response.status_code == 200:
-        data = response.json()
-        lang_code = data.get("original_language")
-        lang_name = "Unknown"
-        if not language_details.loc[language_details["Language_code"] == lang_code].empty:
-            lang_name = language_details.loc[language_details["Language_code"] == lang_code, "Language_name"].values[0]
+    try:
+        data = await tmdb_client.get(f"movie/{movie_id}", params, cache_kind="details")
+    except UpstreamUnavailable:
+        if local is None:
+            raise
+        data = None
+    if data is not None:
         movie = {
             "movie_id": data.get("id"),
             "title": data.get("title"),
             "overview": data.get("overview"),
-            "genres": [
-                genre_details.loc[genre_details["Genre_id"] == genre["id"], "Genre_name"].values[0]
-                for genre in data.get("genres", [])
-                if not genre_details.loc[genre_details["Genre_id"] == genre["id"]].empty
-            ],
+            "genres": genre_names(genre["id"] for genre in data.get("genres", [])),
             "poster_path": data.get("poster_path"),
             "release_date": data.get("release_date"),
             "runtime": data.get("runtime"),
             "vote_average": data.get("vote_average"),
             "vote_count": data.get("vote_count"),
-            "language": lang_name
+            "language": language_name(data.get("original_language")),
+            # Not part of MovieDetails (response models drop it); lets card
+            # lists built from details skip adult titles.
+            "adult": data.get("adult", False)
         }
+        # TMDB is authoritative, but the catalogue fills anything it left out.
+        if local is not None:
+            for key, value in _details_from_catalogue(local).items():
+                if movie.get(key) is None:
+                    movie[key] = value
         return movie
 
+    elif local is not None:
+        return _details_from_catalogue(local)
     else:
         return None
 
-def get_trending_movies():
-    url = f"{TMDB_BASE_URL}trending/movie/week"
+async def get_model_movie_details(movie_id: int):
+    # The local catalogue answers known movies without a network round-trip;
+    # TMDB is only asked for ids it lacks or rows missing detail fields.
+    # SQLite reads run in the threadpool so they never stall the event loop.
+    local = await run_in_threadpool(catalogue.get_movie, movie_id)
+    if local is not None and is_complete(local):
+        return _details_from_catalogue(local)
+    return await _fetch_tmdb_movie_details(movie_id, local)
+
+async def get_movie_details_batch(movie_ids: List[int], deadline: float = RECOMMEND_HYDRATION_DEADLINE):
+    # Serve what the catalogue can, fetch the rest concurrently and return
+    # whatever arrived before the deadline, in the order of movie_ids, plus the
+    # ids that could not be hydrated at all.
+    local_movies = await run_in_threadpool(catalogue.get_movies, movie_ids)
+    tasks = {
+        movie_id: asyncio.ensure_future(_fetch_tmdb_movie_details(movie_id, local_movies.get(movie_id)))
+        for movie_id in movie_ids
+        if not (movie_id in local_movies and is_complete(local_movies[movie_id]))
+    }
+    done = set()
+    if tasks:
+        done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+        for task in pending:
+            task.cancel()
+
+    movies = []
+    missing = []
+    for movie_id in movie_ids:
+        task = tasks.get(movie_id)
+        if task is None:
+            movies.append(_details_from_catalogue(local_movies[movie_id]))
+        elif task in done and task.exception() is None and task.result():
+            movies.append(task.result())
+        elif movie_id in local_movies:
+            # Upstream was too slow or failed; degrade to the local row.
+            movies.append(_details_from_catalogue(local_movies[movie_id]))
+            missing.append(movie_id)
+        else:
+            missing.append(movie_id)
+    return movies, missing
+
+async def get_trending_movies(fresh: bool = False):
     params = {
-        "api_key": TMDB_API_KEY,
         "language": "en-US"
     }
-    response = requests.get(url, params=params)
-    if response.status_code == 200:
-        data = response.json()
+    data = await tmdb_client.get("trending/movie/week", params, cache_kind="trending", fresh=fresh)
+    if data is not None:
         trending_movies = []
         for movie in data.get("results", [])[:10]:  # Get top 10 trending movies
-
-            lang_code = movie.get("original_language")
-            lang_name = "Unknown"
-            if not language_details.loc[language_details["Language_code"] == lang_code].empty:
-                lang_name = language_details.loc[language_details["Language_code"] == lang_code, "Language_name"].values[0]
-
-
-            trending_movies.append({
-                "movie_id": movie.get("id"),
-                "title": movie.get("title", ""),
-                "genres": [
-                    genre_details.loc[genre_details["Genre_id"] == genre_id, "Genre_name"].values[0]
-                    for genre_id in movie.get("genre_ids", [])
-                    if not genre_details.loc[genre_details["Genre_id"] == genre_id].empty
-                ], 
-                "poster_path": movie.get("poster_path", ""),
-                "release_date": movie.get("release_date", ""),
-                "language": lang_name
-            })
+            trending_movies.append(movie_card(movie))
         return trending_movies
     else:
         return []
 
-def get_filtered_movies(
+# Discover params the server sets itself rather than the client's filters.
+# The release date cutoff is carried inside the cursor instead, so a scan
+# resumed after midnight still reads the list it started on.
+_CURSOR_DATE_PARAM = "primary_release_date.lte"
+_SERVER_PARAMS = {"page", _CURSOR_DATE_PARAM}
+
+def _filters_fingerprint(params):
+    filters = {k: str(v) for k, v in params.items() if k not in _SERVER_PARAMS}
+    return hashlib.sha1(json.dumps(filters, sort_keys=True).encode()).hexdigest()[:12]
+
+def encode_cursor(page: int, offset: int, params: dict) -> str:
+    # Opaque resume point: the upstream page and the index of the first result
+    # on it not yet returned, bound to the filters it was issued for.
+    payload = {"p": page, "o": offset, "f": _filters_fingerprint(params)}
+    if _CURSOR_DATE_PARAM in params:
+        payload["d"] = params[_CURSOR_DATE_PARAM]
+    payload = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, params: dict):
+    # Restores the release date cutoff the cursor was issued with into params.
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        page, offset, fingerprint = int(payload["p"]), int(payload["o"]), payload["f"]
+        cutoff = payload.get("d")
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursorError("Malformed cursor")
+    if fingerprint != _filters_fingerprint(params):
+        raise InvalidCursorError("Cursor does not match the requested filters")
+    if page < 1 or offset < 0:
+        raise InvalidCursorError("Malformed cursor")
+    if _CURSOR_DATE_PARAM in params and cutoff is not None:
+        try:
+            params[_CURSOR_DATE_PARAM] = datetime.strptime(str(cutoff), "%Y-%m-%d").strftime("%Y-%m-%d")
+        except ValueError:
+            raise InvalidCursorError("Malformed cursor")
+    return page, offset
+
+async def get_filtered_movies(*args, **kwargs):
+    movies, _ = await get_filtered_movies_page(*args, **kwargs)
+    return movies
+
+async def get_filtered_movies_page(
     genres: Optional[List[str]] = None,
     release_year: Optional[int] = None,
     min_vote: Optional[float] = None,
     sort_by: str = "Latest",
     language: Optional[str] = None,
     limit: int = 20,
-    page: int = 1
+    page: int = 1,
+    cursor: Optional[str] = None,
+    fresh: bool = False
 ):
-    url = f"{TMDB_BASE_URL}discover/movie"
-
     movies = []
     
     # Map frontend sort strings to valid TMDB sort_by parameters
@@ -110,10 +216,8 @@ def get_filtered_movies(
     today = datetime.today().strftime("%Y-%m-%d")
 
     params = {
-        "api_key": TMDB_API_KEY,
         "language": "en-US",
         "sort_by": tmdb_sort_by,
-        "page": page,
     }
 
     if sort_by == "Latest":
@@ -128,10 +232,9 @@ def get_filtered_movies(
             flat_genres.extend([x.strip() for x in g.split(",")])
             
         for g_name in flat_genres:
-            name_str = str(g_name).strip().lower()
-            matching_genre = genre_details[genre_details["Genre_name"].str.strip().str.lower() == name_str]
-            if not matching_genre.empty:
-                genre_ids.append(str(matching_genre["Genre_id"].values[0]))
+            matching_genre = genre_id(g_name)
+            if matching_genre is not None:
+                genre_ids.append(str(matching_genre))
         if genre_ids:
             params["with_genres"] = ",".join(genre_ids)
 
@@ -146,66 +249,158 @@ def get_filtered_movies(
         params["vote_average.gte"] = min_vote
     
     if language:
-        lang_row = language_details[
-            language_details["Language_name"].str.strip().str.lower() == language.strip().lower()
-        ]
+        lang_code = language_code(language)
 
-        if not lang_row.empty:
-            params["with_original_language"] = lang_row["Language_code"].values[0]
+        if lang_code is not None:
+            params["with_original_language"] = lang_code
         else:
             raise ValueError(f"Language '{language}' not found")
 
-    # Fetch pages continuously until we meet the limit of movies that have a poster image
-    while len(movies) < limit:
-        response = requests.get(url, params=params)
-
-        if response.status_code != 200:
-            break
-
-        data = response.json()
-        results = data.get("results", [])
-        
-        if not results:
-            break # No more results from TMDB
+    current_page, offset = page, 0
+    if cursor:
+        current_page, offset = decode_cursor(cursor, params)
+
+    async def fetch(page_number):
+        return await tmdb_client.get("discover/movie", dict(params, page=page_number), cache_kind="discover", fresh=fresh)
+
+    data = await fetch(current_page)
+    if data is None:
+        return movies, None
+    total_pages = min(data.get("total_pages") or current_page, TMDB_MAX_PAGE)
+
+    # Fetch pages until we meet the limit of movies that have a poster image.
+    # A window of upcoming pages is requested concurrently and consumed in
+    # order; whatever is still in flight when the limit is met is cancelled.
+    # The scan stops early after DISCOVER_MAX_PAGES pages, or when a page
+    # cannot be fetched, with a cursor pointing at the first page not read.
+    next_cursor = None
+    prefetched = {}
+    last_page = min(total_pages, current_page + DISCOVER_MAX_PAGES - 1)
+    try:
+        while True:
+            results = data.get("results", [])
+            if not results:
+                break # No more results from TMDB
+
+            for position in range(offset, len(results)):
+                if len(movies) >= limit:
+                    next_cursor = encode_cursor(current_page, position, params)
+                    break
+
+                movie = results[position]
+                # Filter: only include movies with valid images
+                if not movie.get("poster_path"):
+                    continue
+
+                movies.append(movie_card(movie))
 
-        for movie in results:
             if len(movies) >= limit:
+                if next_cursor is None and current_page < total_pages:
+                    next_cursor = encode_cursor(current_page + 1, 0, params)
                 break
-                
-            # Filter: only include movies with valid images
-            if not movie.get("poster_path"):
-                continue
 
-            lang_code = movie.get("original_language")
-            lang_name = "Unknown"
-            if not language_details.loc[language_details["Language_code"] == lang_code].empty:
-                lang_name = language_details.loc[language_details["Language_code"] == lang_code, "Language_name"].values[0]
-
-
-            movies.append({
-                "movie_id": movie.get("id"),
-                "title": movie.get("title"),
-                "genres": [
-                    genre_details.loc[genre_details["Genre_id"] == genre_id, "Genre_name"].values[0]
-                    for genre_id in movie.get("genre_ids", [])
-                    if not genre_details.loc[genre_details["Genre_id"] == genre_id].empty
-                ],
-                "poster_path": movie.get("poster_path"),
-                "release_date": movie.get("release_date"),
-                "language": lang_name
-            })
-            
-        # Increment page parameter to request the next batch if limit hasn't been met yet
-        params["page"] += 1
+            offset = 0
+            current_page += 1
+            if current_page > last_page:
+                if current_page <= total_pages:
+                    next_cursor = encode_cursor(current_page, 0, params)
+                break
+            for ahead in range(current_page, min(current_page + DISCOVER_PREFETCH, last_page + 1)):
+                if ahead not in prefetched:
+                    prefetched[ahead] = asyncio.ensure_future(fetch(ahead))
+            try:
+                data = await prefetched.pop(current_page)
+            except UpstreamUnavailable:
+                data = None
+            if data is None:
+                next_cursor = encode_cursor(current_page, 0, params)
+                break
+    finally:
+        for task in prefetched.values():
+            task.cancel()
+
+    return movies, next_cursor
+
+def _card_from_catalogue(local):
+    return {
+        "movie_id": local["movie_id"],
+        "title": local["title"] or "",
+        "genres": local["genres"],
+        "poster_path": local["poster_path"],
+        "release_date": local["release_date"] or (str(local["release_year"]) if local["release_year"] else ""),
+        "language": language_name(local["language"])
+    }
 
-    return movies
+def _card_from_details(movie):
+    return {
+        "movie_id": movie["movie_id"],
+        "title": movie["title"] or "",
+        "genres": movie["genres"],
+        "poster_path": movie["poster_path"],
+        "release_date": movie["release_date"] or "",
+        "language": movie["language"]
+    }
 
-def search_movies(query: str, limit: int = 10, page: int = 1):
-    url = f"{TMDB_BASE_URL}search/movie"
-    movies = []
-    
+async def get_similar_movies(model, movie_id: int, limit: int = 10):
+    # Neighbours come from the precomputed table (a dict lookup), cards from
+    # the local catalogue; neighbours it does not have (all of them when no
+    # catalogue is built) are hydrated from TMDB like recommendations. Adult
+    # titles are skipped like in search, hence the small over-fetch.
+    if model.neighbours is not None and movie_id in model.neighbours:
+        with timed("similar.table"):
+            neighbours = model.similar(movie_id, limit * 2)
+    else:
+        # Not in the table yet: a scan of the whole catalogue, off the event loop.
+        with timed("similar.scan"):
+            neighbours = await run_in_threadpool(model.similar, movie_id, limit * 2)
+    if neighbours is None:
+        return None
+    with timed("similar.cards"):
+        local_movies = await run_in_threadpool(catalogue.get_movies, [rec["Movie_id"] for rec in neighbours])
+
+    chosen = []
+    for rec in neighbours:
+        local = local_movies.get(rec["Movie_id"])
+        if local is None or not local["adult"]:
+            chosen.append(rec["Movie_id"])
+        if len(chosen) == limit:
+            break
+    hydrated = {}
+    unknown = [neighbour_id for neighbour_id in chosen if neighbour_id not in local_movies]
+    if unknown:
+        with timed("similar.hydration"):
+            details, _ = await get_movie_details_batch(unknown)
+        hydrated = {movie["movie_id"]: movie for movie in details if not movie.get("adult")}
+
+    cards = []
+    for neighbour_id in chosen:
+        if neighbour_id in local_movies:
+            cards.append(_card_from_catalogue(local_movies[neighbour_id]))
+        elif neighbour_id in hydrated:
+            cards.append(_card_from_details(hydrated[neighbour_id]))
+    return cards
+
+def search_local_movies(query: str, limit: int = 10, page: int = 1):
+    # Titles come from the in-process search index; card fields from the local
+    # catalogue. Hits the catalogue cannot describe are left to TMDB.
+    hits = get_search_index().search(query, limit=limit, offset=(page - 1) * limit)
+    local_movies = catalogue.get_movies([movie_id for movie_id, _ in hits])
+    return [
+        _card_from_catalogue(local_movies[movie_id])
+        for movie_id, _ in hits
+        if movie_id in local_movies and not local_movies[movie_id]["adult"]
+    ]
+
+async def search_movies(query: str, limit: int = 10, page: int = 1):
+    # SQLite reads (and, before the warm-up has built it, the index itself)
+    # stay off the event loop.
+    movies = await run_in_threadpool(search_local_movies, query, limit, page)
+    if len(movies) >= limit:
+        return movies
+
+    # Not enough local matches: top up from TMDB, skipping titles already listed.
+    seen = {movie["movie_id"] for movie in movies}
     params = {
-        "api_key": TMDB_API_KEY,
         "language": "en-US",
         "query": query,
         "page": page,
@@ -213,50 +408,37 @@ def search_movies(query: str, limit: int = 10, page: int = 1):
     }
 
     # Fetch exactly the page requested by frontend
-    response = requests.get(url, params=params)
-
-    if response.status_code == 200:
-        data = response.json()
+    try:
+        data = await tmdb_client.get("search/movie", params, cache_kind="search")
+    except UpstreamUnavailable:
+        # Local matches alone are still an answer.
+        if not movies:
+            raise
+        data = None
+
+    if data is not None:
         
         # We enforce limits differently when searching per-page
         # Limit usually applies per page payload constraints now
-        limited_results = data.get("results", [])[:limit]
-
-        for movie in limited_results:
-            lang_code = movie.get("original_language")
-            lang_name = "Unknown"
-            if not language_details.loc[language_details["Language_code"] == lang_code].empty:
-                lang_name = language_details.loc[language_details["Language_code"] == lang_code, "Language_name"].values[0]
-
-            movies.append({
-                "movie_id": movie.get("id"),
-                "title": movie.get("title"),
-                "genres": [
-                    genre_details.loc[genre_details["Genre_id"] == genre_id, "Genre_name"].values[0]
-                    for genre_id in movie.get("genre_ids", [])
-                    if not genre_details.loc[genre_details["Genre_id"] == genre_id].empty
-                ],
-                "poster_path": movie.get("poster_path"),
-                "release_date": movie.get("release_date"),
-                "language": lang_name
-            })
+        for movie in data.get("results", []):
+            if len(movies) >= limit:
+                break
+            if movie.get("id") in seen:
+                continue
+            movies.append(movie_card(movie))
 
     return movies
 
-def get_movie_cast(movie_id: int, limit: int = 5):
-    url = f"{TMDB_BASE_URL}movie/{movie_id}/credits"
-    
+async def get_movie_cast(movie_id: int, limit: int = 5):
     params = {
-        "api_key": TMDB_API_KEY,
         "language": "en-US"
     }
 
-    response = requests.get(url, params=params)
+    data = await tmdb_client.get(f"movie/{movie_id}/credits", params, cache_kind="credits")
 
-    if response.status_code != 200:
+    if data is None:
         return []
 
-    data = response.json()
     cast_list = data.get("cast", [])
 
     cast = []
@@ -0,0 +1,91 @@
+import gzip
+import hashlib
+import os
+
+from fastapi import Request, Response
+from pydantic_core import to_json
+
+try:
+    import orjson
+except ImportError:  # optional; pydantic's encoder gives the same bytes, about half as fast
+    orjson = None
+
+# Browser and proxy lifetime of the static reference lists (genres,
+# languages); they only change with a deploy, and revalidation is a 304.
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", "86400"))
+# Bodies smaller than this are not worth a Content-Encoding.
+GZIP_MIN_BYTES = 512
+
+
+def dumps(content) -> bytes:
+    # Compact separators and UTF-8 rather than \u escapes, like Starlette's
+    # JSONResponse.
+    if orjson is not None:
+        return orjson.dumps(content)
+    return to_json(content)
+
+
+def json_response(content, headers=None) -> Response:
+    """Encode ``content`` straight to a JSON response.
+
+    For routes whose payload is built by this codebase in the shape of its
+    response_model (movie cards), skipping FastAPI's per-item validation.
+    """
+    return Response(content=dumps(content), media_type="application/json", headers=headers)
+
+
+def _etag_matches(header, etag):
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored.
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def _accepts_gzip(header):
+    # Accept-Encoding lists codings with optional q-values ("gzip;q=0" is a
+    # refusal); an explicit gzip entry wins over a "*" wildcard.
+    qualities = {}
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[coding] = q
+    for coding in ("gzip", "x-gzip", "*"):
+        if coding in qualities:
+            return qualities[coding] > 0
+    return False
+
+
+# A payload that never changes while the process runs, rendered once: the
+# JSON body, its gzip encoding and a strong ETag for each.
+class StaticJSON:
+    def __init__(self, content, max_age=STATIC_MAX_AGE):
+        self.body = dumps(content)
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        self.gzip_body = None
+        if len(self.body) >= GZIP_MIN_BYTES:
+            self.gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0)
+            self.gzip_etag = f'"{digest}-gzip"'
+        self.headers = {"Cache-Control": f"public, max-age={max_age}", "Vary": "Accept-Encoding"}
+
+    def response(self, request: Request) -> Response:
+        use_gzip = self.gzip_body is not None and _accepts_gzip(request.headers.get("accept-encoding", ""))
+        etag = self.gzip_etag if use_gzip else self.etag
+        headers = dict(self.headers, ETag=etag)
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and (_etag_matches(if_none_match, self.etag) or (self.gzip_body is not None and _etag_matches(if_none_match, self.gzip_etag))):
+            return Response(status_code=304, headers=headers)
+        if use_gzip:
+            headers["Content-Encoding"] = "gzip"
+            return Response(content=self.gzip_body, media_type="application/json", headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
@@ -0,0 +1,251 @@
+import bisect
+import csv
+import os
+import re
+import threading
+import unicodedata
+
+import numpy as np
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TITLES_FILE = os.path.join(BASE_PATH, "data", "movie_titles.csv")
+RATINGS_FILE = os.path.join(BASE_PATH, "ml_model", "data", "movie_ratings.csv")
+
+# One or two characters match too many tokens to union their postings per
+# keystroke, so the most popular documents for every such prefix are kept.
+SHORT_PREFIX_LEN = 2
+SHORT_PREFIX_TOP = 1000
+# Candidate documents examined per query; beyond this only the most popular
+# are considered, which keeps worst-case latency flat as the catalogue grows.
+MAX_CANDIDATES = 50000
+# Near-miss vocabulary tokens verified with an edit-distance check per query token.
+MAX_FUZZY_CHECKS = 64
+
+EXACT, PREFIX, FUZZY = 3, 2, 1
+
+_non_alnum = re.compile(r"[^0-9a-z]+")
+
+
+def normalise(text):
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode()
+    return _non_alnum.sub(" ", text.lower()).split()
+
+
+def _trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _within_edits(a, b, max_edits):
+    # Banded Levenshtein distance check; returns early once the band is exceeded.
+    if abs(len(a) - len(b)) > max_edits:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+        if min(current) > max_edits:
+            return False
+        previous = current
+    return previous[-1] <= max_edits
+
+
+# In-memory title index. Documents are numbered in descending vote-count order,
+# so every posting list is already sorted by popularity and ties in match
+# quality resolve to the better-known film.
+class TitleSearchIndex:
+    def __init__(self, movie_ids, titles, vote_counts):
+        order = np.lexsort((np.asarray(movie_ids), -np.asarray(vote_counts, dtype=np.int64)))
+        self.movie_ids = np.asarray(movie_ids, dtype=np.int64)[order]
+        self.titles = [titles[i] for i in order]
+        self.vote_counts = np.asarray(vote_counts, dtype=np.int64)[order]
+
+        doc_tokens = [sorted(set(normalise(title))) for title in self.titles]
+        self.vocab = sorted({token for tokens in doc_tokens for token in tokens})
+        token_ids = {token: i for i, token in enumerate(self.vocab)}
+        self.token_len = np.fromiter((len(token) for token in self.vocab), dtype=np.int16, count=len(self.vocab))
+
+        # Forward index (doc -> token ids) in CSR form.
+        lengths = np.fromiter((len(tokens) for tokens in doc_tokens), dtype=np.int64, count=len(doc_tokens))
+        self.doc_ptr = np.concatenate(([0], np.cumsum(lengths)))
+        self.doc_tok = np.fromiter(
+            (token_ids[token] for tokens in doc_tokens for token in tokens), dtype=np.int32, count=int(lengths.sum())
+        )
+
+        # Inverted index (token -> docs), also CSR and laid out in vocabulary
+        # order, so the postings for every token sharing a prefix are one slice.
+        docs = np.repeat(np.arange(len(doc_tokens), dtype=np.int32), lengths)
+        by_token = np.lexsort((docs, self.doc_tok))
+        self.post_doc = docs[by_token]
+        counts = np.bincount(self.doc_tok, minlength=len(self.vocab))
+        self.post_ptr = np.concatenate(([0], np.cumsum(counts)))
+
+        self.trigram_tokens = {}
+        for i, token in enumerate(self.vocab):
+            for gram in _trigrams(token):
+                self.trigram_tokens.setdefault(gram, []).append(i)
+        self.trigram_tokens = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in self.trigram_tokens.items()}
+
+        self.short_prefix_docs = {}
+        for prefix in {token[:n] for token in self.vocab for n in range(1, SHORT_PREFIX_LEN + 1)}:
+            lo, hi = self._prefix_range(prefix)
+            self.short_prefix_docs[prefix] = np.unique(self.post_doc[self.post_ptr[lo]:self.post_ptr[hi]])[:SHORT_PREFIX_TOP]
+
+    def __len__(self):
+        return len(self.titles)
+
+    def _prefix_range(self, prefix):
+        lo = bisect.bisect_left(self.vocab, prefix)
+        hi = bisect.bisect_left(self.vocab, prefix + "\uffff", lo)
+        return lo, hi
+
+    def _fuzzy_tokens(self, token):
+        if len(token) < 3:
+            return np.empty(0, dtype=np.int32)
+        max_edits = 1 if len(token) <= 5 else 2
+        grams = [self.trigram_tokens[g] for g in _trigrams(token) if g in self.trigram_tokens]
+        if not grams:
+            return np.empty(0, dtype=np.int32)
+        candidates, shared = np.unique(np.concatenate(grams), return_counts=True)
+        # Each edit can destroy at most three trigrams.
+        needed = max(1, len(_trigrams(token)) - 3 * max_edits)
+        keep = (shared >= needed) & (np.abs(self.token_len[candidates] - len(token)) <= max_edits)
+        candidates, shared = candidates[keep], shared[keep]
+        # Check the tokens sharing the most trigrams first.
+        candidates = candidates[np.argsort(-shared, kind="stable")[:MAX_FUZZY_CHECKS]]
+        return np.asarray(
+            [i for i in candidates.tolist() if _within_edits(token, self.vocab[i], max_edits)], dtype=np.int32
+        )
+
+    def _match(self, token, allow_prefix):
+        # Describe how a query token may match: exact token id, a contiguous
+        # range of token ids sharing the prefix, or a set of near-miss tokens.
+        exact = None
+        position = bisect.bisect_left(self.vocab, token)
+        if position < len(self.vocab) and self.vocab[position] == token:
+            exact = position
+        prefix = self._prefix_range(token) if allow_prefix else None
+        if prefix is not None and prefix[0] == prefix[1]:
+            prefix = None
+        fuzzy = None
+        if exact is None and prefix is None:
+            fuzzy = self._fuzzy_tokens(token)
+            if fuzzy.size == 0:
+                return None
+        return {"token": token, "exact": exact, "prefix": prefix, "fuzzy": fuzzy}
+
+    def _postings_size(self, match):
+        if match["prefix"] is not None:
+            lo, hi = match["prefix"]
+        elif match["exact"] is not None:
+            lo, hi = match["exact"], match["exact"] + 1
+        else:
+            return int(sum(self.post_ptr[i + 1] - self.post_ptr[i] for i in match["fuzzy"].tolist()))
+        return int(self.post_ptr[hi] - self.post_ptr[lo])
+
+    def _candidate_docs(self, match):
+        if match["prefix"] is not None:
+            token = match["token"]
+            if len(token) <= SHORT_PREFIX_LEN:
+                return self.short_prefix_docs.get(token, np.empty(0, dtype=np.int32))
+            lo, hi = match["prefix"]
+            docs = self.post_doc[self.post_ptr[lo]:self.post_ptr[hi]]
+            if hi - lo > 1:
+                docs = np.unique(docs)
+        elif match["exact"] is not None:
+            docs = self.post_doc[self.post_ptr[match["exact"]]:self.post_ptr[match["exact"] + 1]]
+        else:
+            docs = np.unique(np.concatenate([self.post_doc[self.post_ptr[i]:self.post_ptr[i + 1]] for i in match["fuzzy"].tolist()]))
+        return docs[:MAX_CANDIDATES]
+
+    def _quality(self, match, tokens):
+        quality = np.zeros(tokens.shape, dtype=np.int8)
+        if match["fuzzy"] is not None:
+            quality[np.isin(tokens, match["fuzzy"])] = FUZZY
+        if match["prefix"] is not None:
+            lo, hi = match["prefix"]
+            quality[(tokens >= lo) & (tokens < hi)] = PREFIX
+        if match["exact"] is not None:
+            quality[tokens == match["exact"]] = EXACT
+        return quality
+
+    def search(self, query, limit=10, offset=0):
+        """Ranked (movie_id, title) pairs for a free-text or partially typed query.
+
+        Every query token must match a title token exactly, by prefix (last
+        token only, for autocomplete) or within one/two edits. Results are
+        ordered by match quality, then by vote count.
+        """
+        tokens = normalise(query)
+        if not tokens or limit <= 0:
+            return []
+        matches = []
+        for position, token in enumerate(tokens):
+            match = self._match(token, allow_prefix=position == len(tokens) - 1)
+            if match is None:
+                return []
+            matches.append(match)
+
+        driver = min(matches, key=self._postings_size)
+        candidates = self._candidate_docs(driver)
+        if candidates.size == 0:
+            return []
+
+        # Gather every token of every candidate document in one flat array.
+        starts = self.doc_ptr[candidates]
+        lengths = self.doc_ptr[candidates + 1] - starts
+        owner = np.repeat(np.arange(candidates.size), lengths)
+        within = np.arange(int(lengths.sum())) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        doc_tokens = self.doc_tok[np.repeat(starts, lengths) + within]
+
+        score = np.zeros(candidates.size, dtype=np.int32)
+        keep = np.ones(candidates.size, dtype=bool)
+        for match in matches:
+            best = np.zeros(candidates.size, dtype=np.int8)
+            np.maximum.at(best, owner, self._quality(match, doc_tokens))
+            keep &= best > 0
+            score += best
+
+        candidates, score = candidates[keep], score[keep]
+        order = np.lexsort((candidates, -score))[offset:offset + limit]
+        return [(int(self.movie_ids[doc]), self.titles[doc]) for doc in candidates[order]]
+
+
+def _first_rows(path, key):
+    # First row per key, like DataFrame.drop_duplicates; read with the csv
+    # module so building the index does not pull pandas into the worker.
+    rows = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            rows.setdefault(int(row[key]), row)
+    return rows
+
+
+def build_search_index(titles_file=TITLES_FILE, ratings_file=RATINGS_FILE):
+    titles = _first_rows(titles_file, "Movie_id")
+    ratings = _first_rows(ratings_file, "Movie_id")
+    vote_counts = [int(float(ratings[movie_id]["Vote_count"] or 0)) if movie_id in ratings else 0 for movie_id in titles]
+    return TitleSearchIndex(list(titles), [row["Title"] for row in titles.values()], vote_counts)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_search_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = build_search_index()
+    return _index
+
+
+def refresh_search_index():
+    # Rebuilt off to the side and swapped in, e.g. after new titles are ingested.
+    global _index
+    index = build_search_index()
+    with _index_lock:
+        _index = index
+    return index
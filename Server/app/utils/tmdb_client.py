@@ -0,0 +1,315 @@
+import asyncio
+import os
+import random
+import re
+import time
+from typing import Optional
+
+import httpx
+from dotenv import load_dotenv
+
+from app.utils.cache import build_cache_from_env, cache_key
+from app.utils.metrics import add_collector, histogram, increment, trace
+
+load_dotenv()
+TMDB_API_KEY = os.getenv("TMDB_API_KEY")
+TMDB_BASE_URL = os.getenv("TMDB_BASE_URL")
+
+TMDB_TIMEOUT = float(os.getenv("TMDB_TIMEOUT", "10"))
+TMDB_CONNECT_TIMEOUT = float(os.getenv("TMDB_CONNECT_TIMEOUT", "3"))
+TMDB_MAX_CONNECTIONS = int(os.getenv("TMDB_MAX_CONNECTIONS", "100"))
+TMDB_MAX_CONCURRENCY = int(os.getenv("TMDB_MAX_CONCURRENCY", "64"))
+TMDB_MAX_RETRIES = int(os.getenv("TMDB_MAX_RETRIES", "3"))
+TMDB_BACKOFF = float(os.getenv("TMDB_BACKOFF", "0.25"))
+# Upstream call budget of this worker (requests per second, with bursts of up
+# to TMDB_RATE_BURST); 0 disables it. Split TMDB's limit across workers. A
+# call that would wait longer than TMDB_BUDGET_WAIT for its turn fails fast
+# instead, and is answered from stale cache or degraded by the caller.
+TMDB_RATE_LIMIT = float(os.getenv("TMDB_RATE_LIMIT", "40"))
+TMDB_RATE_BURST = int(os.getenv("TMDB_RATE_BURST", "20"))
+TMDB_BUDGET_WAIT = float(os.getenv("TMDB_BUDGET_WAIT", "0.5"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_ID_SEGMENT = re.compile(r"(?<=/)\d+(?=/|$)|^\d+(?=/|$)")
+
+
+class UpstreamUnavailable(Exception):
+    """TMDB cannot be called right now; ``retry_after`` is a hint in seconds."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"TMDB request budget exhausted; retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, max_wait: float):
+        # Tokens may go negative: each caller reserves the next free slot, so
+        # waiters are served in arrival order without a queue. Returns whether
+        # a slot was taken and how long until it is due.
+        self._refill()
+        wait = max(0.0, (1 - self.tokens) / self.rate)
+        if wait > max_wait:
+            return False, wait
+        self.tokens -= 1
+        return True, wait
+
+    def available(self):
+        self._refill()
+        return self.tokens
+
+    def pause(self, seconds: float):
+        # Upstream asked for a back-off; hand out nothing for ``seconds``.
+        self._refill()
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+
+def endpoint_label(path: str) -> str:
+    # "movie/550/credits" -> "movie/{id}/credits", so metric labels stay bounded.
+    return _ID_SEGMENT.sub("{id}", path.strip("/"))
+
+
+# How long (seconds) each kind of TMDB payload may be served from cache.
+# Details and credits barely change; trending/discover/search feeds move faster.
+CACHE_TTLS = {
+    "details": float(os.getenv("TMDB_CACHE_TTL_DETAILS", "86400")),
+    "credits": float(os.getenv("TMDB_CACHE_TTL_CREDITS", "86400")),
+    "trending": float(os.getenv("TMDB_CACHE_TTL_TRENDING", "3600")),
+    "discover": float(os.getenv("TMDB_CACHE_TTL_DISCOVER", "900")),
+    "search": float(os.getenv("TMDB_CACHE_TTL_SEARCH", "600")),
+}
+
+
+# One pooled, keep-alive HTTP client for every TMDB call the API makes.
+# Concurrency is bounded with a semaphore so a burst of requests queues here
+# instead of opening hundreds of sockets upstream, and 429/5xx responses are
+# retried with exponential backoff (honouring Retry-After when TMDB sends it).
+# Cacheable lookups go through a TTL/LRU cache with single-flight coalescing,
+# so a burst of requests for one movie id costs a single upstream call. Every
+# upstream attempt spends a token from a shared budget; when it runs dry,
+# cached lookups fall back to their last (expired) response and otherwise
+# UpstreamUnavailable is raised.
+class TMDBClient:
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        timeout: float = TMDB_TIMEOUT,
+        connect_timeout: float = TMDB_CONNECT_TIMEOUT,
+        max_connections: int = TMDB_MAX_CONNECTIONS,
+        max_concurrency: int = TMDB_MAX_CONCURRENCY,
+        max_retries: int = TMDB_MAX_RETRIES,
+        backoff: float = TMDB_BACKOFF,
+        rate_limit: float = TMDB_RATE_LIMIT,
+        rate_burst: int = TMDB_RATE_BURST,
+        budget_wait: float = TMDB_BUDGET_WAIT,
+        cache=None,
+    ):
+        self.base_url = base_url if base_url is not None else TMDB_BASE_URL
+        self.api_key = api_key if api_key is not None else TMDB_API_KEY
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.budget = TokenBucket(rate_limit, rate_burst) if rate_limit > 0 else None
+        self.budget_wait = budget_wait
+        self.cache = cache if cache is not None else build_cache_from_env()
+        self.coalesced = 0
+        self.stale_served = 0
+        self._inflight = {}
+        self._waiters = {}
+        self._client = None
+        self._semaphore = None
+        self._loop = None
+
+    def _ensure_client(self):
+        # The pool and semaphore belong to the event loop that created them; a
+        # new loop (e.g. a test client or a reloaded worker) gets fresh ones.
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._inflight = {}
+            self._waiters = {}
+            self._loop = loop
+        return self._client
+
+    def _retry_delay(self, attempt, response=None):
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return max(0.0, float(retry_after))
+                except ValueError:
+                    pass
+        return self.backoff * (2 ** attempt) * (0.5 + random.random())
+
+    async def get(self, path: str, params: Optional[dict] = None, cache_kind: Optional[str] = None, fresh: bool = False):
+        """GET ``{base_url}{path}`` and return the decoded JSON body, or None on failure.
+
+        ``cache_kind`` names an entry in CACHE_TTLS; when given, the response is
+        cached and concurrent identical requests share one upstream call.
+        ``fresh`` skips the cache lookup but still stores the new response, and
+        never falls back to a stale one.
+        """
+        if cache_kind is None:
+            return await self._fetch(path, params)
+
+        params = dict(params or {})
+        key = cache_key(path, params)
+        cached = None if fresh else self.cache.get(key)
+        if cached is not None:
+            trace("tmdb.cache_hit")
+            return cached
+
+        self._ensure_client()
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_and_store(key, path, params, CACHE_TTLS[cache_kind]))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _, key=key, inflight=self._inflight: inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+            trace("tmdb.coalesced")
+        # Shielded so a caller giving up (e.g. a hydration deadline) does not
+        # cancel the shared fetch other callers are still waiting on; the fetch
+        # is only cancelled once every waiter has gone.
+        waiters = self._waiters
+        waiters[key] = waiters.get(key, 0) + 1
+        try:
+            data = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if waiters.get(key) == 1 and not task.done():
+                task.cancel()
+            raise
+        except UpstreamUnavailable:
+            data = None if fresh else self._stale(key)
+            if data is None:
+                raise
+            return data
+        finally:
+            waiters[key] -= 1
+            if not waiters[key]:
+                del waiters[key]
+        if data is None and not fresh:
+            # A failed fetch still beats nothing: serve the last response, however old.
+            data = self._stale(key)
+        return data
+
+    def _stale(self, key):
+        data = self.cache.get_stale(key)
+        if data is not None:
+            self.stale_served += 1
+            trace("tmdb.stale")
+        return data
+
+    async def _spend_budget(self):
+        if self.budget is None:
+            return
+        taken, wait = self.budget.reserve(self.budget_wait)
+        if not taken:
+            increment("tmdb_budget_rejected_total")
+            raise UpstreamUnavailable(wait)
+        histogram("tmdb_budget_wait_seconds").observe(wait)
+        if wait:
+            trace("tmdb.budget_wait", wait)
+            await asyncio.sleep(wait)
+
+    async def _fetch_and_store(self, key, path, params, ttl):
+        data = await self._fetch(path, params)
+        if data is not None:
+            self.cache.set(key, data, ttl)
+        return data
+
+    async def _fetch(self, path: str, params: Optional[dict] = None):
+        client = self._ensure_client()
+        query = {"api_key": self.api_key}
+        if params:
+            query.update(params)
+        url = f"{self.base_url}{path}"
+        endpoint = endpoint_label(path)
+
+        for attempt in range(self.max_retries + 1):
+            await self._spend_budget()
+            response = None
+            status = "cancelled"
+            start = sent = time.perf_counter()
+            try:
+                async with self._semaphore:
+                    sent = time.perf_counter()
+                    response = await client.get(url, params=query)
+                status = str(response.status_code)
+            except httpx.HTTPError:
+                status = "error"
+            finally:
+                # Waiting for a semaphore slot is reported apart from the
+                # upstream round trip itself.
+                done = time.perf_counter()
+                histogram("tmdb_queue_wait_seconds").observe(sent - start)
+                histogram("tmdb_request_duration_seconds", endpoint=endpoint).observe(done - sent)
+                increment("tmdb_requests_total", endpoint=endpoint, status=status)
+                trace("tmdb.request", done - start)
+
+            if response is not None:
+                if response.status_code == 200:
+                    return response.json()
+                if response.status_code not in RETRY_STATUSES:
+                    return None
+
+            if attempt == self.max_retries:
+                break
+            delay = self._retry_delay(attempt, response)
+            if response is not None and response.status_code == 429 and self.budget is not None:
+                # TMDB's limit is per client, so every caller backs off, not just this one.
+                self.budget.pause(delay)
+            await asyncio.sleep(delay)
+        return None
+
+    def cache_stats(self):
+        stats = self.cache.stats()
+        stats["coalesced"] = self.coalesced
+        stats["inflight"] = len(self._inflight)
+        stats["stale_served"] = self.stale_served
+        return stats
+
+    async def aclose(self):
+        if self._client is not None:
+            client = self._client
+            self._client = None
+            self._loop = None
+            await client.aclose()
+
+
+tmdb_client = TMDBClient()
+
+
+def _cache_metrics():
+    stats = tmdb_client.cache_stats()
+    for tier in ("memory", "disk"):
+        tier_stats = stats.get(tier)
+        if tier_stats is None:
+            continue
+        for field in ("hits", "misses", "evictions", "expirations"):
+            yield f"tmdb_cache_{field}_total", "counter", {"tier": tier}, tier_stats[field]
+        if "size" in tier_stats:
+            yield "tmdb_cache_entries", "gauge", {"tier": tier}, tier_stats["size"]
+    yield "tmdb_coalesced_total", "counter", {}, stats["coalesced"]
+    yield "tmdb_inflight", "gauge", {}, stats["inflight"]
+    yield "tmdb_stale_served_total", "counter", {}, stats["stale_served"]
+    if tmdb_client.budget is not None:
+        yield "tmdb_budget_tokens", "gauge", {}, round(tmdb_client.budget.available(), 3)
+
+
+add_collector(_cache_metrics)
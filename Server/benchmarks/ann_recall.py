@@ -0,0 +1,92 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.models.feature_store import load_feature_store, normalise_rows
+from app.models.similarity import ExactBackend, IVFBackend, build_ivf_index
+
+# Recall@k and latency of the IVF backend against exact brute force. Synthetic
+# catalogues are drawn from the real encoded rows plus a little noise, so the
+# cluster structure (few genre combinations, skewed runtime/rating) is kept.
+# Recall counts a returned row as correct when its score reaches the exact k-th
+# score, which keeps the measure meaningful when many rows tie.
+
+
+def synthetic_matrix(base, size, seed):
+    rng = np.random.default_rng(seed)
+    rows = base[rng.integers(0, len(base), size=size)]
+    return normalise_rows(rows + rng.normal(0, 0.05, size=rows.shape).astype(np.float32))
+
+
+def sample_queries(base, count, seed):
+    rng = np.random.default_rng(seed + 1)
+    rows = base[rng.integers(0, len(base), size=count)]
+    return normalise_rows(rows + rng.normal(0, 0.1, size=rows.shape).astype(np.float32))
+
+
+def run(backend, ranges, queries, k):
+    timings = []
+    rows, scores = [], []
+    for query in queries:
+        start = time.perf_counter()
+        r, s = backend.search(ranges, query[None, :], k)
+        timings.append(time.perf_counter() - start)
+        rows.append(r[0])
+        scores.append(s[0])
+    t = np.array(timings) * 1000
+    latency = {
+        "p50_ms": round(float(np.percentile(t, 50)), 3),
+        "p99_ms": round(float(np.percentile(t, 99)), 3),
+    }
+    return np.array(scores), latency
+
+
+def recall(exact_scores, approx_scores, eps=1e-5):
+    kth = exact_scores[:, -1:]
+    return float(((approx_scores >= kth - eps).sum(axis=1) / exact_scores.shape[1]).mean())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IVF recall/latency benchmark")
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", default="1,2,4,8,16,32")
+    parser.add_argument("--json", action="store_true", help="print a machine-readable report")
+    args = parser.parse_args()
+
+    base = np.asarray(load_feature_store().features_normed)
+    queries = sample_queries(base, args.queries, 0)
+    report = {}
+    for size in map(int, args.sizes.split(",")):
+        matrix = synthetic_matrix(base, size, size)
+        ranges = [(0, size)]
+        start = time.perf_counter()
+        index = build_ivf_index(matrix)
+        build_s = time.perf_counter() - start
+
+        exact_scores, exact_latency = run(ExactBackend(matrix), ranges, queries, args.k)
+        entry = {"rows": size, "lists": len(index["centroids"]), "build_s": round(build_s, 2), "exact": exact_latency, "ivf": []}
+        for nprobe in map(int, args.nprobe.split(",")):
+            backend = IVFBackend(matrix, index, nprobe=nprobe, exact_threshold=0)
+            scores, latency = run(backend, ranges, queries, args.k)
+            entry["ivf"].append({"nprobe": nprobe, "recall": round(recall(exact_scores, scores), 4), **latency})
+        report[str(size)] = entry
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for entry in report.values():
+        print(f"{entry['rows']} rows, {entry['lists']} lists, build {entry['build_s']} s")
+        print(f"  exact           p50 {entry['exact']['p50_ms']:8.3f} ms  p99 {entry['exact']['p99_ms']:8.3f} ms")
+        for row in entry["ivf"]:
+            print(f"  nprobe {row['nprobe']:>3}  recall@{args.k} {row['recall']:.3f}  p50 {row['p50_ms']:8.3f} ms  p99 {row['p99_ms']:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import os
+import random
+import sys
+import timeit
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.utils.lookups import GENRES_FILE, LANGUAGES_FILE, GENRE_NAMES, LANGUAGE_NAMES
+from app.utils.movies import movie_card
+
+# Per-card cost of turning a TMDB list result into MovieCardDetails: the
+# previous pandas mask scans versus the shared dict lookups in app.utils.lookups.
+
+genre_details = pd.read_csv(GENRES_FILE)
+language_details = pd.read_csv(LANGUAGES_FILE)
+
+
+def legacy_movie_card(movie):
+    lang_code = movie.get("original_language")
+    lang_name = "Unknown"
+    if not language_details.loc[language_details["Language_code"] == lang_code].empty:
+        lang_name = language_details.loc[language_details["Language_code"] == lang_code, "Language_name"].values[0]
+    return {
+        "movie_id": movie.get("id"),
+        "title": movie.get("title"),
+        "genres": [
+            genre_details.loc[genre_details["Genre_id"] == genre_id, "Genre_name"].values[0]
+            for genre_id in movie.get("genre_ids", [])
+            if not genre_details.loc[genre_details["Genre_id"] == genre_id].empty
+        ],
+        "poster_path": movie.get("poster_path"),
+        "release_date": movie.get("release_date"),
+        "language": lang_name,
+    }
+
+
+def sample_results(count, seed=0):
+    rng = random.Random(seed)
+    genre_ids = list(GENRE_NAMES) + [99999]
+    languages = list(LANGUAGE_NAMES) + ["zz"]
+    return [
+        {
+            "id": i,
+            "title": f"Movie {i}",
+            "genre_ids": rng.sample(genre_ids, rng.randint(1, 3)),
+            "poster_path": f"/{i}.jpg",
+            "release_date": "2024-01-01",
+            "original_language": rng.choice(languages),
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Movie card conversion micro-benchmark")
+    parser.add_argument("--cards", type=int, default=20, help="cards per page")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    results = sample_results(args.cards)
+    for legacy, fast in zip(map(legacy_movie_card, results), map(movie_card, results)):
+        assert legacy["genres"] == fast["genres"] and legacy["language"] == fast["language"]
+
+    for name, fn in [("pandas scans", legacy_movie_card), ("dict lookups", movie_card)]:
+        seconds = min(timeit.repeat(lambda: [fn(m) for m in results], number=1, repeat=args.repeat))
+        print(f"{name:>13}: {seconds / args.cards * 1e6:9.2f} us/card  {seconds * 1e3:8.3f} ms/page of {args.cards}")
+
+
+if __name__ == "__main__":
+    main()
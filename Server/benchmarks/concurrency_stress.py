@@ -0,0 +1,64 @@
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.models.movie_model import MovieRecommender, RecommendationQuery
+
+# Times thousands of mixed queries against one shared MovieRecommender, scored
+# sequentially and then from a thread pool. Both passes call compute(), which
+# skips the result cache, so every query is actually scored. Correctness
+# (concurrent answers match sequential ones) is asserted by
+# tests/test_recommender_concurrency.py.
+
+
+def random_queries(recommender, count, seed):
+    rng = random.Random(seed)
+    genres = list(recommender.store.genres)
+    languages = ["english", "french", "japanese", "korean", "hindi", "spanish"]
+    queries = []
+    for _ in range(count):
+        year_from = rng.randint(1990, 2026)
+        queries.append(RecommendationQuery(
+            genres=tuple(rng.sample(genres, rng.randint(0, 4))),
+            runtime=rng.choice([60, 90, 100, 120, 150, 180]),
+            vote_average=rng.choice([5.0, 6.0, 7.0, 7.5, 8.0, 9.0]),
+            adult=0,
+            year_from=year_from,
+            year_to=year_from + rng.choice([0, 0, 1, 5]),
+            languages=tuple(rng.sample(languages, rng.randint(0, 2))),
+        ))
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent scoring throughput of MovieRecommender")
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    recommender = MovieRecommender()
+    queries = random_queries(recommender, args.queries, args.seed)
+
+    start = time.perf_counter()
+    for q in queries:
+        recommender.compute(q)
+    sequential_time = time.perf_counter() - start
+
+    # Shuffle submission order so neighbouring threads score unrelated queries.
+    order = list(range(len(queries)))
+    random.Random(args.seed + 1).shuffle(order)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(lambda i: recommender.compute(queries[i]), order))
+    concurrent_time = time.perf_counter() - start
+
+    print(f"queries={len(queries)} threads={args.threads}")
+    print(f"sequential={sequential_time:.2f}s concurrent={concurrent_time:.2f}s")
+
+if __name__ == "__main__":
+    main()
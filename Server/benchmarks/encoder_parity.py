@@ -0,0 +1,68 @@
+import argparse
+import os
+import random
+import sys
+import timeit
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.models.encoder import QueryEncoder
+from app.models.feature_store import DATA_DIR, load_feature_store
+
+# Compares the per-query cost of the NumPy QueryEncoder with the sklearn
+# artefacts in data/scalers. tests/test_encoder_parity.py asserts that the two
+# produce bit-identical features.
+
+
+def sklearn_encode(mlb, preprocessor, queries):
+    genres = mlb.transform([list(q[3]) for q in queries])
+    numeric = preprocessor.transform(pd.DataFrame({
+        "Runtime": [q[0] for q in queries],
+        "Vote_average": [q[1] for q in queries],
+        "Adult": [q[2] for q in queries],
+    }))
+    return np.hstack((numeric, genres))
+
+
+def numpy_encode(encoder, queries):
+    return encoder.encode([q[0] for q in queries], [q[1] for q in queries], [q[2] for q in queries], [q[3] for q in queries])
+
+
+def random_queries(classes, count, seed):
+    rng = random.Random(seed)
+    labels = list(classes) + ["Anime", "Not A Genre"]
+    return [
+        (
+            rng.choice([0, 1, 45, 90, 120, 137, 180, 600]) if rng.random() < 0.5 else rng.uniform(0, 400),
+            rng.choice([0, 5.5, 7, 10]) if rng.random() < 0.5 else rng.uniform(0, 10),
+            rng.randint(0, 1),
+            tuple(rng.sample(labels, rng.randint(0, 5))),
+        )
+        for _ in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NumPy query encoder cost")
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    mlb = joblib.load(os.path.join(DATA_DIR, "scalers", "mlb.joblib"))
+    preprocessor = joblib.load(os.path.join(DATA_DIR, "scalers", "preprocessor.joblib"))
+    encoder = QueryEncoder.from_manifest(load_feature_store().manifest)
+    queries = random_queries(mlb.classes_, args.queries, args.seed)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for label, fn in [("sklearn", lambda: sklearn_encode(mlb, preprocessor, queries[:1])),
+                          ("numpy", lambda: numpy_encode(encoder, queries[:1]))]:
+            seconds = min(timeit.repeat(fn, number=200, repeat=5)) / 200
+            print(f"{label:>8}: {seconds * 1e6:9.1f} us/query")
+
+if __name__ == "__main__":
+    main()
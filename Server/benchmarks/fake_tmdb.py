@@ -0,0 +1,140 @@
+import argparse
+import asyncio
+import os
+import random
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+# A local stand-in for the parts of the TMDB v3 API the server calls. Responses
+# are synthetic but deterministic per id/page, and latency / error injection can
+# be tuned so the client's pooling, retries and timeouts can be exercised
+# without network access. FAKE_TMDB_RATE_LIMIT (requests/s, 0 = unlimited)
+# answers calls beyond the limit with 429 + Retry-After like TMDB does. Point
+# the API at it with
+#   TMDB_BASE_URL=http://127.0.0.1:8001/ uvicorn app.main:app
+
+LATENCY_MS = float(os.getenv("FAKE_TMDB_LATENCY_MS", "20"))
+JITTER_MS = float(os.getenv("FAKE_TMDB_JITTER_MS", "5"))
+ERROR_RATE = float(os.getenv("FAKE_TMDB_ERROR_RATE", "0"))
+TOTAL_PAGES = int(os.getenv("FAKE_TMDB_TOTAL_PAGES", "50"))
+RATE_LIMIT = float(os.getenv("FAKE_TMDB_RATE_LIMIT", "0"))
+RATE_BURST = float(os.getenv("FAKE_TMDB_RATE_BURST", str(max(RATE_LIMIT, 1))))
+
+GENRE_IDS = [28, 12, 16, 35, 80, 99, 18, 10751, 14, 36, 27, 10402, 9648, 10749, 878, 10770, 53, 10752, 37]
+LANGUAGES = ["en", "fr", "ja", "ko", "hi", "es"]
+
+app = FastAPI(title="Fake TMDB")
+stats = {"requests": 0, "errors": 0, "throttled": 0}
+bucket = {"tokens": RATE_BURST, "updated": time.monotonic()}
+
+
+def _over_limit():
+    now = time.monotonic()
+    bucket["tokens"] = min(RATE_BURST, bucket["tokens"] + (now - bucket["updated"]) * RATE_LIMIT)
+    bucket["updated"] = now
+    if bucket["tokens"] < 1:
+        return True
+    bucket["tokens"] -= 1
+    return False
+
+
+def _movie(movie_id: int):
+    rng = random.Random(movie_id)
+    return {
+        "id": movie_id,
+        "title": f"Movie {movie_id}",
+        "overview": f"Synthetic overview for movie {movie_id}.",
+        "genre_ids": rng.sample(GENRE_IDS, rng.randint(1, 3)),
+        # Roughly one in five results has no poster, like real discover pages.
+        "poster_path": None if rng.random() < 0.2 else f"/poster{movie_id}.jpg",
+        "release_date": f"{rng.randint(1950, 2026)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "original_language": rng.choice(LANGUAGES),
+        "runtime": rng.randint(70, 180),
+        "vote_average": round(rng.uniform(3, 9), 1),
+        "vote_count": rng.randint(0, 20000),
+    }
+
+
+def _page(seed: str, page: int):
+    rng = random.Random(f"{seed}:{page}")
+    return {
+        "page": page,
+        "total_pages": TOTAL_PAGES,
+        "results": [] if page > TOTAL_PAGES else [_movie(rng.randint(1, 2_000_000)) for _ in range(20)],
+    }
+
+
+@app.middleware("http")
+async def simulate_upstream(request: Request, call_next):
+    stats["requests"] += 1
+    if RATE_LIMIT and request.url.path != "/_stats" and _over_limit():
+        stats["throttled"] += 1
+        return JSONResponse({"status_code": 25, "status_message": "Your request count is over the allowed limit."}, status_code=429, headers={"Retry-After": "1"})
+    delay = max(0.0, LATENCY_MS + random.uniform(-JITTER_MS, JITTER_MS)) / 1000
+    await asyncio.sleep(delay)
+    if ERROR_RATE and random.random() < ERROR_RATE:
+        stats["errors"] += 1
+        return JSONResponse({"status_message": "Injected failure"}, status_code=503)
+    return await call_next(request)
+
+
+@app.get("/movie/{movie_id}")
+async def movie_details(movie_id: int):
+    movie = _movie(movie_id)
+    movie["genres"] = [{"id": g, "name": str(g)} for g in movie.pop("genre_ids")]
+    return movie
+
+
+@app.get("/movie/{movie_id}/credits")
+async def movie_credits(movie_id: int):
+    rng = random.Random(-movie_id)
+    return {
+        "id": movie_id,
+        "cast": [
+            {
+                "id": rng.randint(1, 5_000_000),
+                "name": f"Actor {i}",
+                "character": f"Character {i}",
+                "profile_path": f"/profile{movie_id}_{i}.jpg",
+                "known_for_department": "Acting",
+                "popularity": round(rng.uniform(0, 100), 3),
+            }
+            for i in range(12)
+        ],
+    }
+
+
+@app.get("/trending/movie/week")
+async def trending(page: int = 1):
+    return _page("trending", page)
+
+
+@app.get("/discover/movie")
+async def discover(request: Request, page: int = 1):
+    params = sorted((k, v) for k, v in request.query_params.items() if k not in ("page", "api_key"))
+    return _page(f"discover:{params}", page)
+
+
+@app.get("/search/movie")
+async def search(query: str, page: int = 1):
+    data = _page(f"search:{query.lower()}", page)
+    for movie in data["results"]:
+        movie["title"] = f"{query.title()} {movie['id']}"
+    return data
+
+
+@app.get("/_stats")
+async def get_stats():
+    return stats
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local fake TMDB server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,71 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.models import movie_model
+from app.main import app
+
+# Checks that a slow model load never blocks the event loop: the model is made
+# to take --load-seconds to build, requests that need it (/recommend,
+# /similar) arrive first and trigger the load, and /health is timed while it
+# runs. The lifespan warm-up is not started, so the first request pays for
+# the load, the worst case. Exits non-zero if /health takes longer than
+# --max-health-ms.
+
+RECOMMEND_BODY = {
+    "genres": ["Action"], "release_year": 2020, "runtime": 120,
+    "vote_average": 7, "language": "english", "adult": 0,
+}
+
+
+def slow_recommender(seconds):
+    class SlowRecommender(movie_model.MovieRecommender):
+        def __init__(self, *args, **kwargs):
+            time.sleep(seconds)
+            super().__init__(*args, **kwargs)
+    return SlowRecommender
+
+
+async def run(args):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        model_requests = [
+            asyncio.create_task(client.post("/api/movies/recommend", json=RECOMMEND_BODY)),
+            asyncio.create_task(client.get("/api/movies/1771/similar")),
+        ]
+        health = []
+        while not all(task.done() for task in model_requests):
+            # Timed from when the probe is due, so a blocked event loop shows
+            # up as a slow probe rather than a late one.
+            start = time.perf_counter()
+            await asyncio.sleep(0.1)
+            response = await client.get("/health")
+            health.append((time.perf_counter() - start - 0.1) * 1000)
+            assert response.status_code == 200
+        statuses = [task.result().status_code for task in model_requests]
+    return health, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/health latency while the model loads")
+    parser.add_argument("--load-seconds", type=float, default=4.0)
+    parser.add_argument("--max-health-ms", type=float, default=250.0)
+    args = parser.parse_args()
+
+    movie_model.MovieRecommender = slow_recommender(args.load_seconds)
+    health, statuses = asyncio.run(run(args))
+    worst = max(health) if health else 0.0
+    print(f"model requests: {statuses}")
+    print(f"/health during a {args.load_seconds:g}s load: {len(health)} calls, worst {worst:.1f}ms")
+    if not health or worst > args.max_health_ms or any(status != 200 for status in statuses):
+        print("FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
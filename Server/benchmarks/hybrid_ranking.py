@@ -0,0 +1,81 @@
+import argparse
+import dataclasses
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.models.hybrid import read_ratings
+from app.models.movie_model import MovieRecommender, RecommendationQuery
+
+# Compares ranking="content" with ranking="hybrid" on random preference
+# queries: per-query latency of each mode, and how established the returned
+# films are (median vote count of the top k, share of results with fewer
+# than --few-votes votes).
+
+
+def random_queries(genres, count, seed):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        year = rng.randint(1980, 2025)
+        queries.append(RecommendationQuery(
+            genres=tuple(rng.sample(genres, rng.randint(1, 3))),
+            runtime=rng.choice([90, 105, 120, 150]),
+            vote_average=rng.choice([6, 7, 8, 9]),
+            year_from=year - rng.randint(0, 5), year_to=year,
+        ))
+    return queries
+
+
+def measure(model, queries, k, vote_counts, few_votes):
+    timings, counts = [], []
+    for query in queries:
+        start = time.perf_counter()
+        result = model.recommend(query, k)
+        timings.append(time.perf_counter() - start)
+        counts.extend(vote_counts.get(rec["Movie_id"], 0) for rec in result)
+    t = np.array(timings) * 1000
+    counts = np.array(counts)
+    return {
+        "p50_ms": round(float(np.percentile(t, 50)), 3),
+        "p99_ms": round(float(np.percentile(t, 99)), 3),
+        "median_vote_count": float(np.median(counts)) if len(counts) else 0.0,
+        "few_vote_share": round(float((counts < few_votes).mean()), 3) if len(counts) else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Content vs hybrid ranking comparison")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--few-votes", type=int, default=50)
+    parser.add_argument("--weights", default="0.1,0.2,0.4", help="popularity weights to try")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print a machine-readable report")
+    args = parser.parse_args()
+
+    model = MovieRecommender()
+    movie_ids, _, counts = read_ratings()
+    vote_counts = dict(zip(movie_ids.tolist(), counts.tolist()))
+    queries = random_queries(list(model.encoder.classes), args.queries, args.seed)
+
+    report = {"content": measure(model, queries, args.k, vote_counts, args.few_votes)}
+    for weight in map(float, args.weights.split(",")):
+        hybrid = [dataclasses.replace(q, ranking="hybrid", popularity_weight=weight) for q in queries]
+        report[f"hybrid_{weight:g}"] = measure(model, hybrid, args.k, vote_counts, args.few_votes)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{'mode':>12} {'p50 ms':>8} {'p99 ms':>8} {'median votes':>13} {'<' + str(args.few_votes) + ' votes':>10}")
+    for mode, stats in report.items():
+        print(f"{mode:>12} {stats['p50_ms']:8.3f} {stats['p99_ms']:8.3f} {stats['median_vote_count']:13.0f} {stats['few_vote_share']:10.1%}")
+
+
+if __name__ == "__main__":
+    main()
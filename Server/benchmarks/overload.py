@@ -0,0 +1,183 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, SERVER_DIR)
+from app.models.feature_store import load_feature_store
+
+# Overload test for the upstream protections: an open-loop request stream
+# (arrivals do not wait for responses) well above what a rate-limited
+# benchmarks/fake_tmdb.py can serve, against the API run twice:
+#   unprotected  no TMDB budget, no route concurrency caps, unbounded page scans
+#   protected    the defaults (token-bucket budget under the stub's limit,
+#                per-route admission control, DISCOVER_MAX_PAGES)
+# Each run reports latency percentiles and status codes per route, plus how
+# many upstream calls the stub served and how many it throttled with 429.
+# ok/s counts 200 responses with content.
+# Background feeds are off in both runs so only request traffic reaches TMDB.
+# What matters is the ratio of offered TMDB-bound load to the upstream limit;
+# the defaults (about 4x) fit a single core running all three processes.
+
+RECOMMEND_BODY = {"genres": ["Action"], "runtime": 120, "vote_average": 7, "language": "english", "adult": 0}
+GENRES = ["Action", "Drama", "Comedy", "Horror", "Romance", "Thriller", "Animation"]
+
+
+def scenarios(movie_ids, rng):
+    # TMDB-bound: ids unknown to the catalogue, cast lists, filtered discover
+    # pages and searches with no local match. Local: similar, reference lists.
+    return {
+        "details (TMDB)": (3, lambda c: c.get(f"/api/movies/{rng.randint(5_000_000, 9_000_000)}")),
+        "cast (TMDB)": (2, lambda c: c.get(f"/api/movies/{rng.choice(movie_ids)}/cast")),
+        "new_releases (TMDB)": (2, lambda c: c.get("/api/movies/new_releases", params={"genres": rng.choice(GENRES), "release_year": rng.randint(1960, 2025)})),
+        "search (TMDB)": (2, lambda c: c.get("/api/movies/search", params={"query": f"zq{rng.randint(0, 10**9)}"})),
+        "recommend": (1, lambda c: c.post("/api/movies/recommend", json=dict(RECOMMEND_BODY, release_year=rng.randint(1990, 2025)))),
+        "similar (local)": (2, lambda c: c.get(f"/api/movies/{rng.choice(movie_ids)}/similar")),
+        "categories (local)": (1, lambda c: c.get("/api/categories/list")),
+    }
+
+
+def latency_stats(timings, statuses, elapsed):
+    t = np.array(timings) * 1000
+    ok = statuses.get("200", 0)
+    return {
+        "requests": len(timings),
+        "ok_per_s": round(ok / elapsed, 1),
+        "p50_ms": round(float(np.percentile(t, 50)), 1) if len(t) else None,
+        "p95_ms": round(float(np.percentile(t, 95)), 1) if len(t) else None,
+        "p99_ms": round(float(np.percentile(t, 99)), 1) if len(t) else None,
+        "max_ms": round(float(t.max()), 1) if len(t) else None,
+        "status": dict(sorted(statuses.items())),
+    }
+
+
+async def open_loop(base_url, routes, rate, duration, seed):
+    rng = random.Random(seed)
+    names = list(routes)
+    weights = [routes[name][0] for name in names]
+    results = {name: ([], {}) for name in names}
+
+    async def one(client, name):
+        start = time.perf_counter()
+        try:
+            response = await routes[name][1](client)
+            status = str(response.status_code)
+            # Cast, search and discover answer a failed TMDB call with an
+            # empty list, which is not a success either.
+            if status == "200" and response.content == b"[]":
+                status = "200 empty"
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        timings, statuses = results[name]
+        timings.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+
+    limits = httpx.Limits(max_connections=2000, max_keepalive_connections=2000)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        tasks = []
+        start = time.perf_counter()
+        for i in range(int(rate * duration)):
+            # Fixed arrival schedule, however slow the responses get.
+            delay = start + i / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(client, rng.choices(names, weights)[0])))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    report = {name: latency_stats(timings, statuses, elapsed) for name, (timings, statuses) in results.items()}
+    all_timings = [t for timings, _ in results.values() for t in timings]
+    all_statuses = {}
+    for _, statuses in results.values():
+        for status, count in statuses.items():
+            all_statuses[status] = all_statuses.get(status, 0) + count
+    report["all"] = latency_stats(all_timings, all_statuses, elapsed)
+    report["all"]["elapsed_s"] = round(elapsed, 1)
+    return report
+
+
+def wait_for(url, deadline):
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return True
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+    return False
+
+
+def run_mode(mode, args, movie_ids):
+    env = dict(
+        os.environ,
+        TMDB_BASE_URL=f"http://127.0.0.1:{args.tmdb_port}/", TMDB_API_KEY="bench", MODEL_RELOAD_INTERVAL="0",
+        FEED_REFRESH_INTERVAL_TRENDING="0", FEED_REFRESH_INTERVAL_DISCOVER="0",
+        FAKE_TMDB_LATENCY_MS=str(args.tmdb_latency_ms), FAKE_TMDB_RATE_LIMIT=str(args.upstream_limit),
+    )
+    if mode == "unprotected":
+        env.update(TMDB_RATE_LIMIT="0", ROUTE_MAX_CONCURRENCY="1000000", ROUTE_MAX_QUEUE="1000000", DISCOVER_MAX_PAGES="500")
+    else:
+        env.update(TMDB_RATE_LIMIT=str(args.budget or args.upstream_limit * 0.8))
+    fake = subprocess.Popen([sys.executable, os.path.join(SERVER_DIR, "benchmarks", "fake_tmdb.py"), "--port", str(args.tmdb_port)],
+                            cwd=SERVER_DIR, env=env)
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "error"],
+                              cwd=SERVER_DIR, env=env)
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        deadline = time.perf_counter() + 60
+        if not (wait_for(f"http://127.0.0.1:{args.tmdb_port}/_stats", deadline) and wait_for(f"{base_url}/ready", deadline)):
+            raise SystemExit("servers did not come up")
+        before = httpx.get(f"http://127.0.0.1:{args.tmdb_port}/_stats").json()
+        routes = scenarios(movie_ids, random.Random(args.seed))
+        report = asyncio.run(open_loop(base_url, routes, args.rate, args.duration, args.seed))
+        after = httpx.get(f"http://127.0.0.1:{args.tmdb_port}/_stats").json()
+        report["upstream"] = {
+            "requests": after["requests"] - before["requests"],
+            "throttled_429": after["throttled"] - before["throttled"],
+        }
+        return report
+    finally:
+        for process in (server, fake):
+            process.terminate()
+            process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Overload test against a rate-limited fake TMDB")
+    parser.add_argument("--rate", type=float, default=60, help="offered load, requests/s")
+    parser.add_argument("--duration", type=float, default=20, help="seconds of load per run")
+    parser.add_argument("--upstream-limit", type=float, default=10, help="fake TMDB rate limit, requests/s")
+    parser.add_argument("--budget", type=float, default=None, help="TMDB_RATE_LIMIT for the protected run (default 80%% of the upstream limit)")
+    parser.add_argument("--tmdb-latency-ms", type=float, default=50)
+    parser.add_argument("--modes", default="unprotected,protected")
+    parser.add_argument("--port", type=int, default=8040)
+    parser.add_argument("--tmdb-port", type=int, default=8041)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print a machine-readable report")
+    args = parser.parse_args()
+
+    movie_ids = np.asarray(load_feature_store().movie_ids).tolist()
+    report = {mode: run_mode(mode, args, movie_ids) for mode in args.modes.split(",")}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"offered {args.rate:g} req/s for {args.duration:g}s; fake TMDB limited to {args.upstream_limit:g} req/s, {args.tmdb_latency_ms:g}ms latency")
+    for mode, runs in report.items():
+        upstream = runs.pop("upstream")
+        print(f"\n{mode}: upstream served {upstream['requests']} calls, throttled {upstream['throttled_429']} with 429")
+        print(f"  {'route':<22}{'ok/s':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  status")
+        for name, stats in runs.items():
+            print(f"  {name:<22}{stats['ok_per_s']:>8}{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}{stats['max_ms']:>9}  {stats['status']}")
+
+
+if __name__ == "__main__":
+    main()
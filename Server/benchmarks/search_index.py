@@ -0,0 +1,92 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.utils.search_index import TitleSearchIndex, build_search_index, normalise
+
+# Build time and query latency of the local title search index for synthetic
+# catalogues of growing size. Titles are recombined from the words of the real
+# catalogue, so token frequencies stay realistic as the corpus grows.
+
+
+def synthetic_catalogue(size, vocabulary, seed):
+    rng = random.Random(seed)
+    words = list(vocabulary)
+    titles = [" ".join(rng.choice(words) for _ in range(rng.randint(1, 5))).title() for _ in range(size)]
+    votes = np.random.default_rng(seed).pareto(1.2, size=size).astype(np.int64) * 10
+    return np.arange(1, size + 1), titles, votes
+
+
+def query_workload(index, count, seed):
+    rng = random.Random(seed)
+    queries = {"prefix": [], "multi": [], "typo": []}
+    for _ in range(count):
+        title = normalise(index.titles[rng.randrange(len(index))])
+        if not title:
+            continue
+        word = title[0]
+        queries["prefix"].append(word[:rng.randint(1, len(word))])
+        cut = rng.randint(1, len(title))
+        queries["multi"].append(" ".join(title[:cut - 1] + [title[cut - 1][:max(1, len(title[cut - 1]) - 1)]]))
+        if len(word) >= 4:
+            i = rng.randrange(len(word))
+            queries["typo"].append(word[:i] + word[i + 1:])
+    return queries
+
+
+def measure(index, queries, limit):
+    stats = {}
+    for kind, items in queries.items():
+        timings = []
+        for q in items:
+            start = time.perf_counter()
+            index.search(q, limit)
+            timings.append(time.perf_counter() - start)
+        t = np.array(timings) * 1000
+        stats[kind] = {
+            "queries": len(items),
+            "p50_ms": round(float(np.percentile(t, 50)), 4),
+            "p95_ms": round(float(np.percentile(t, 95)), 4),
+            "p99_ms": round(float(np.percentile(t, 99)), 4),
+        }
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Title search index benchmark")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print a machine-readable report")
+    args = parser.parse_args()
+
+    base = build_search_index()
+    report = {"real": {"titles": len(base), **measure(base, query_workload(base, args.queries, 1), args.limit)}}
+
+    for size in map(int, args.sizes.split(",")):
+        start = time.perf_counter()
+        index = TitleSearchIndex(*synthetic_catalogue(size, base.vocab, size))
+        build_s = time.perf_counter() - start
+        report[str(size)] = {
+            "titles": size,
+            "build_s": round(build_s, 2),
+            **measure(index, query_workload(index, args.queries, size), args.limit),
+        }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{'catalogue':>10} {'build s':>8} " + " ".join(f"{k + ' p50/p99 ms':>22}" for k in ("prefix", "multi", "typo")))
+    for name, row in report.items():
+        cells = " ".join(f"{row[k]['p50_ms']:>10.3f} /{row[k]['p99_ms']:>9.3f}" for k in ("prefix", "multi", "typo"))
+        print(f"{row['titles']:>10} {row.get('build_s', 0):>8} {cells}")
+
+
+if __name__ == "__main__":
+    main()
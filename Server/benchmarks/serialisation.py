@@ -0,0 +1,184 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import List
+
+import numpy as np
+from fastapi import FastAPI, Request
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.models.schemas import CategoryResponse, LanguageResponse, MovieCardDetails
+from app.utils.lookups import GENRE_RECORDS, LANGUAGE_RECORDS
+from app.utils import responses
+from app.utils.responses import StaticJSON, json_response
+
+# Per-request cost of producing response bodies, before and after the
+# pre-serialised / direct-encoding paths: each variant is a route on a bare
+# FastAPI app (no middleware) called directly as an ASGI application, so the
+# numbers are routing plus the framework's validation and encoding work, with
+# no network or HTTP client in between. Sizes are bytes on the wire.
+#   cards:  MovieCardDetails lists through response_model vs json_response,
+#           with orjson and with pydantic's encoder (the fallback)
+#   static: /categories/list and /languages/list rebuilt per request vs
+#           StaticJSON (identity, gzip, and a 304 revalidation)
+
+
+def random_cards(count, seed=0):
+    rng = random.Random(seed)
+    names = [record["Genre_name"] for record in GENRE_RECORDS]
+    return [
+        {
+            "movie_id": rng.randint(1, 2_000_000),
+            "title": f"Movie {i} " + "x" * rng.randint(0, 30),
+            "genres": rng.sample(names, rng.randint(1, 3)),
+            "poster_path": f"/poster{i}.jpg",
+            "release_date": f"{rng.randint(1950, 2026)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "language": "English",
+        }
+        for i in range(count)
+    ]
+
+
+def bench_app(sizes):
+    app = FastAPI()
+    cards = {size: random_cards(size) for size in sizes}
+    categories = StaticJSON(CategoryResponse(categories=[dict(r) for r in GENRE_RECORDS]).model_dump())
+    languages = StaticJSON(LanguageResponse(languages=[dict(r) for r in LANGUAGE_RECORDS]).model_dump())
+
+    @app.get("/cards/model/{size}", response_model=List[MovieCardDetails])
+    async def cards_model(size: int):
+        return cards[size]
+
+    @app.get("/cards/direct/{size}", response_model=List[MovieCardDetails])
+    async def cards_direct(size: int):
+        return json_response(cards[size])
+
+    @app.get("/categories/model", response_model=CategoryResponse)
+    async def categories_model():
+        return {"categories": [dict(r) for r in GENRE_RECORDS]}
+
+    @app.get("/categories/static", response_model=CategoryResponse)
+    async def categories_static(request: Request):
+        return categories.response(request)
+
+    @app.get("/languages/model", response_model=LanguageResponse)
+    async def languages_model():
+        return {"languages": [dict(r) for r in LANGUAGE_RECORDS]}
+
+    @app.get("/languages/static", response_model=LanguageResponse)
+    async def languages_static(request: Request):
+        return languages.response(request)
+
+    return app, {"categories": categories, "languages": languages}
+
+
+async def call(app, path, headers):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(key.lower().encode(), value.encode()) for key, value in headers.items()],
+        "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    start = messages[0]
+    return start["status"], dict(start["headers"])
+
+
+async def time_route(app, path, requests, headers=None):
+    headers = headers or {}
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        status, response_headers = await call(app, path, headers)
+        timings.append(time.perf_counter() - start)
+    t = np.array(timings) * 1e6
+    return {
+        "status": status,
+        "bytes": int(response_headers.get(b"content-length", 0)),
+        "p50_us": round(float(np.percentile(t, 50)), 1),
+        "p99_us": round(float(np.percentile(t, 99)), 1),
+    }
+
+
+def time_encode(encode, content, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        encode(content)
+    return round((time.perf_counter() - start) / repeats * 1e6, 2)
+
+
+async def run(args):
+    sizes = [int(size) for size in args.sizes.split(",")]
+    app, static = bench_app(sizes)
+    report = {"orjson": responses.orjson is not None, "cards": {}, "static": {}, "encode_us": {}}
+    for size in sizes:
+        row = {
+            "response_model": await time_route(app, f"/cards/model/{size}", args.requests),
+            "direct": await time_route(app, f"/cards/direct/{size}", args.requests),
+        }
+        if responses.orjson is not None:
+            saved, responses.orjson = responses.orjson, None
+            try:
+                row["direct_pydantic"] = await time_route(app, f"/cards/direct/{size}", args.requests)
+            finally:
+                responses.orjson = saved
+        report["cards"][size] = row
+
+    for name, payload in static.items():
+        report["static"][name] = {
+            "response_model": await time_route(app, f"/{name}/model", args.requests),
+            "static": await time_route(app, f"/{name}/static", args.requests),
+            "static_gzip": await time_route(app, f"/{name}/static", args.requests, {"Accept-Encoding": "gzip"}),
+            "not_modified": await time_route(app, f"/{name}/static", args.requests, {"If-None-Match": payload.etag}),
+        }
+
+    largest = random_cards(max(sizes))
+    report["encode_us"] = {
+        "cards": max(sizes),
+        "json": time_encode(lambda c: json.dumps(c, ensure_ascii=False, separators=(",", ":")), largest, args.requests),
+        "pydantic": time_encode(responses.to_json, largest, args.requests),
+    }
+    if responses.orjson is not None:
+        report["encode_us"]["orjson"] = time_encode(responses.orjson.dumps, largest, args.requests)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response serialisation cost, before and after")
+    parser.add_argument("--sizes", default="10,20,100", help="card list lengths")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per variant")
+    parser.add_argument("--json", action="store_true", help="print a machine-readable report")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"orjson: {'yes' if report['orjson'] else 'not installed'}  ({args.requests} requests per variant, p50 / p99 in us)")
+    print("\ncard lists")
+    for size, row in report["cards"].items():
+        line = "  ".join(f"{variant} {r['p50_us']:.0f}/{r['p99_us']:.0f}" for variant, r in row.items())
+        print(f"  {size:>4} cards  {line}")
+    print("\nstatic lists")
+    for name, row in report["static"].items():
+        line = "  ".join(f"{variant} {r['p50_us']:.0f}/{r['p99_us']:.0f} ({r['status']}, {r['bytes']}B)" for variant, r in row.items())
+        print(f"  {name:<10} {line}")
+    encode = report["encode_us"]
+    print(f"\nencoding {encode['cards']} cards alone: json {encode['json']}us, pydantic {encode['pydantic']}us" + (f", orjson {encode['orjson']}us" if "orjson" in encode else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Startup cost of the API: how long `import app.main` takes, how long a
+# uvicorn deployment needs until /health and /ready answer 200, and the
+# resident (RSS) and proportional (PSS, shared pages split between processes)
+# memory of every worker once warm. Linux only (reads /proc).
+
+RECOMMEND_BODY = {
+    "genres": ["Action"], "release_year": 2020, "runtime": 120,
+    "vote_average": 7, "language": "english", "adult": 0,
+}
+
+
+def import_seconds(repeat):
+    code = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+    runs = [float(subprocess.check_output([sys.executable, "-c", code], cwd=SERVER_DIR, stderr=subprocess.DEVNULL))
+            for _ in range(repeat)]
+    return round(statistics.median(runs), 3)
+
+
+def memory_kb(pid):
+    stats = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                stats["rss_mb"] = round(int(line.split()[1]) / 1024, 1)
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    stats["pss_mb"] = round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return stats
+
+
+def child_pids(pid):
+    children = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as f:
+            children.extend(int(p) for p in f.read().split())
+    return children
+
+
+def wait_for(client, path, deadline, successes=1):
+    # With several workers each request may land on a different process, so
+    # readiness needs a run of consecutive successes.
+    streak = 0
+    while time.perf_counter() < deadline:
+        try:
+            streak = streak + 1 if client.get(path).status_code == 200 else 0
+        except httpx.TransportError:
+            streak = 0
+        if streak >= successes:
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API startup time and per-worker memory report")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--repeat", type=int, default=5, help="import timing runs")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--json", action="store_true", help="print a machine-readable report")
+    args = parser.parse_args()
+
+    report = {"import_app_main_s": import_seconds(args.repeat), "workers": args.workers}
+
+    env = {**os.environ, "MODEL_RELOAD_INTERVAL": "0"}
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=SERVER_DIR, env=env,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{args.port}", timeout=5) as client:
+            deadline = start + args.timeout
+            if not wait_for(client, "/health", deadline):
+                raise SystemExit("server did not come up")
+            report["health_s"] = round(time.perf_counter() - start, 3)
+            if not wait_for(client, "/ready", deadline, successes=4 * args.workers):
+                raise SystemExit("server did not become ready")
+            report["ready_s"] = round(time.perf_counter() - start, 3)
+            report["load_seconds"] = client.get("/ready").json()["load_seconds"]
+
+            for _ in range(8 * args.workers):
+                client.post("/api/movies/recommend/batch", json={"queries": [RECOMMEND_BODY]})
+
+        pids = child_pids(server.pid) if args.workers > 1 else [server.pid]
+        report["processes"] = {str(pid): memory_kb(pid) for pid in pids}
+        report["master"] = memory_kb(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"import app.main: {report['import_app_main_s']:.3f}s (median of {args.repeat})")
+    print(f"{args.workers} workers: /health after {report['health_s']:.3f}s, /ready after {report['ready_s']:.3f}s")
+    print(f"per-worker load: {report['load_seconds']}")
+    for pid, stats in report["processes"].items():
+        print(f"  pid {pid}: RSS {stats.get('rss_mb')} MB, PSS {stats.get('pss_mb')} MB")
+
+
+if __name__ == "__main__":
+    main()
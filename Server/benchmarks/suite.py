@@ -0,0 +1,334 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, SERVER_DIR)
+from app.models.feature_store import ARRAY_NAMES, FeatureStore, load_feature_store, normalise_rows, write_generation
+from app.models.movie_model import MovieRecommender, RecommendationQuery
+
+# Benchmark suite with a machine-readable report meant to be diffed between
+# commits:
+#   recommender  MovieRecommender on synthetic catalogues (10k to 1M rows by
+#                default), single queries and batches
+#   cards        the MovieCardDetails / MovieDetails builders in app/utils/movies.py
+#   http         end-to-end load on every router through uvicorn, with
+#                benchmarks/fake_tmdb.py standing in for TMDB
+# Each entry reports throughput, p50/p95/p99 latency and memory (RSS). Run
+#   python benchmarks/suite.py --output before.json
+#   ... change things ...
+#   python benchmarks/suite.py --output after.json --baseline before.json
+
+RECOMMEND_BODY = {
+    "genres": ["Action"], "release_year": 2020, "runtime": 120,
+    "vote_average": 7, "language": "english", "adult": 0,
+}
+LANGUAGES = ["english", "french", "japanese", "korean", "hindi", "spanish"]
+
+
+def latency_stats(seconds, elapsed=None):
+    t = np.asarray(seconds) * 1000
+    stats = {
+        "count": int(t.size),
+        "p50_ms": round(float(np.percentile(t, 50)), 3),
+        "p95_ms": round(float(np.percentile(t, 95)), 3),
+        "p99_ms": round(float(np.percentile(t, 99)), 3),
+        "mean_ms": round(float(t.mean()), 3),
+    }
+    total = elapsed if elapsed is not None else float(np.sum(seconds))
+    stats["throughput_per_s"] = round(t.size / total, 1) if total else None
+    return stats
+
+
+def rss_mb(pid="self"):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    return None
+
+
+def peak_rss_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=SERVER_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def synthetic_store(base, size, data_dir, seed=0):
+    # Rows resampled from the real catalogue with a little noise on the
+    # numeric features, so partition sizes and score ties look realistic.
+    rng = np.random.default_rng(seed)
+    pick = rng.integers(0, len(base), size=size)
+    features = np.asarray(base.features)[pick].copy()
+    features[:, :2] += rng.normal(0, 0.05, size=(size, 2)).astype(features.dtype)
+    release_year = np.asarray(base.release_year)[pick]
+    language = np.asarray(base.language)[pick]
+    order = np.lexsort((language, release_year))
+    arrays = {
+        "features": features[order],
+        "features_normed": normalise_rows(features[order]),
+        "movie_ids": np.arange(1, size + 1, dtype=np.asarray(base.movie_ids).dtype),
+        "release_year": release_year[order],
+        "language": language[order],
+        "source_row": np.arange(size, dtype=np.asarray(base.source_row).dtype),
+    }
+    assert set(arrays) == set(ARRAY_NAMES)
+    manifest = dict(base.manifest, rows=size, sources={}, base_rows=size, generation=0)
+    path = write_generation(arrays, manifest, data_dir)
+    return FeatureStore(path, manifest)
+
+
+def random_queries(genres, count, seed):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        year_from = rng.randint(1990, 2026)
+        queries.append(RecommendationQuery(
+            genres=tuple(rng.sample(genres, rng.randint(0, 4))),
+            runtime=rng.choice([60, 90, 100, 120, 150, 180]),
+            vote_average=rng.choice([5.0, 6.0, 7.0, 7.5, 8.0, 9.0]),
+            year_from=year_from if rng.random() < 0.8 else None,
+            year_to=year_from + rng.choice([0, 0, 1, 5]),
+            languages=tuple(rng.sample(LANGUAGES, rng.randint(0, 2))),
+        ))
+    return queries
+
+
+def bench_recommender(sizes, n_queries, batch_size):
+    base = load_feature_store()
+    report = {}
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as data_dir:
+            start = time.perf_counter()
+            model = MovieRecommender(synthetic_store(base, size, data_dir))
+            load_s = time.perf_counter() - start
+            queries = random_queries(list(model.store.genres), n_queries, seed=size)
+
+            model.recommend_batch(queries[:8], 10)
+            timings = []
+            start = time.perf_counter()
+            for query in queries:
+                t = time.perf_counter()
+                model.recommend(query, 10)
+                timings.append(time.perf_counter() - t)
+            single = latency_stats(timings, time.perf_counter() - start)
+
+            timings = []
+            start = time.perf_counter()
+            for offset in range(0, len(queries), batch_size):
+                t = time.perf_counter()
+                model.recommend_batch(queries[offset:offset + batch_size], 10)
+                timings.append(time.perf_counter() - t)
+            elapsed = time.perf_counter() - start
+            batch = latency_stats(timings, elapsed)
+            batch["queries_per_s"] = round(len(queries) / elapsed, 1)
+
+            report[str(size)] = {
+                "rows": size,
+                "load_s": round(load_s, 3),
+                "single": single,
+                f"batch_{batch_size}": batch,
+                "rss_mb": rss_mb(),
+                "peak_rss_mb": peak_rss_mb(),
+            }
+            del model
+    return report
+
+
+def bench_cards(repeat):
+    from benchmarks.card_conversion import sample_results
+    from app.utils.catalogue import catalogue
+    from app.utils.movies import _card_from_catalogue, _details_from_catalogue, movie_card, search_local_movies
+
+    store_ids = np.asarray(load_feature_store().movie_ids)
+    ids = store_ids[:: max(1, len(store_ids) // 200)].tolist()
+    local = list(catalogue.get_movies(ids).values())
+    tmdb_page = sample_results(20)
+    cases = {
+        "movie_card": (lambda: [movie_card(m) for m in tmdb_page], len(tmdb_page)),
+        "card_from_catalogue": (lambda: [_card_from_catalogue(m) for m in local[:20]], min(20, len(local))),
+        "details_from_catalogue": (lambda: [_details_from_catalogue(m) for m in local[:20]], min(20, len(local))),
+        "catalogue_get_movies_20": (lambda: catalogue.get_movies(ids[:20]), 20),
+        "search_local_movies": (lambda: search_local_movies("the", limit=20), 20),
+    }
+    report = {}
+    for name, (fn, cards) in cases.items():
+        fn()
+        timings = []
+        for _ in range(repeat):
+            t = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - t)
+        stats = latency_stats(timings)
+        stats["us_per_card"] = round(float(np.median(timings)) / max(cards, 1) * 1e6, 3)
+        report[name] = stats
+    report["rss_mb"] = rss_mb()
+    return report
+
+
+def http_scenarios(movie_ids, rng):
+    def movie_id():
+        return rng.choice(movie_ids)
+    return {
+        "POST /api/movies/recommend": lambda c: c.post("/api/movies/recommend", json=dict(RECOMMEND_BODY, release_year=rng.randint(2000, 2025))),
+        "POST /api/movies/recommend/batch": lambda c: c.post("/api/movies/recommend/batch", json={"queries": [dict(RECOMMEND_BODY, release_year=y) for y in range(2000, 2016)], "k": 10}),
+        "GET /api/movies/trending": lambda c: c.get("/api/movies/trending"),
+        "GET /api/movies/new_releases": lambda c: c.get("/api/movies/new_releases", params={"genres": rng.choice(["Action", "Drama", "Comedy"]), "page": rng.randint(1, 5)}),
+        "GET /api/movies/search": lambda c: c.get("/api/movies/search", params={"query": rng.choice(["the", "love", "star", "night", "zzq"])}),
+        "GET /api/movies/{movie_id}": lambda c: c.get(f"/api/movies/{movie_id()}"),
+        "GET /api/movies/{movie_id}/cast": lambda c: c.get(f"/api/movies/{movie_id()}/cast"),
+        "GET /api/movies/{movie_id}/similar": lambda c: c.get(f"/api/movies/{movie_id()}/similar"),
+        "GET /api/categories/list": lambda c: c.get("/api/categories/list"),
+        "GET /api/languages/list": lambda c: c.get("/api/languages/list"),
+        "GET /api/metrics/latency": lambda c: c.get("/api/metrics/latency"),
+        "GET /metrics": lambda c: c.get("/metrics"),
+        "GET /health": lambda c: c.get("/health"),
+    }
+
+
+async def load(client, call, requests, concurrency):
+    timings, statuses = [], {}
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            t = time.perf_counter()
+            try:
+                status = (await call(client)).status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            timings.append(time.perf_counter() - t)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    stats = latency_stats(timings, time.perf_counter() - start)
+    stats["status"] = statuses
+    return stats
+
+
+def wait_for(url, deadline):
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return True
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+    return False
+
+
+def bench_http(requests, concurrency, port, tmdb_port, tmdb_latency_ms):
+    # No TMDB budget or route caps: this measures the request path, not token
+    # waits and 503s (benchmarks/overload.py covers those).
+    env = dict(os.environ, TMDB_BASE_URL=f"http://127.0.0.1:{tmdb_port}/", MODEL_RELOAD_INTERVAL="0",
+               FAKE_TMDB_LATENCY_MS=str(tmdb_latency_ms),
+               TMDB_RATE_LIMIT="0", ROUTE_MAX_CONCURRENCY="1000000", ROUTE_MAX_QUEUE="1000000")
+    fake = subprocess.Popen([sys.executable, os.path.join(SERVER_DIR, "benchmarks", "fake_tmdb.py"), "--port", str(tmdb_port)],
+                            cwd=SERVER_DIR, env=env)
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+                              cwd=SERVER_DIR, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.perf_counter() + 60
+        if not (wait_for(f"http://127.0.0.1:{tmdb_port}/_stats", deadline) and wait_for(f"{base_url}/ready", deadline)):
+            raise SystemExit("servers did not come up")
+        movie_ids = np.asarray(load_feature_store().movie_ids).tolist()
+        scenarios = http_scenarios(movie_ids, random.Random(0))
+
+        async def run_all():
+            limits = httpx.Limits(max_connections=concurrency)
+            async with httpx.AsyncClient(base_url=base_url, timeout=30, limits=limits) as client:
+                return {name: await load(client, call, requests, concurrency) for name, call in scenarios.items()}
+
+        report = asyncio.run(run_all())
+        report["server_rss_mb"] = rss_mb(server.pid)
+        report["upstream_requests"] = httpx.get(f"http://127.0.0.1:{tmdb_port}/_stats").json()["requests"]
+        return report
+    finally:
+        for process in (server, fake):
+            process.terminate()
+            process.wait()
+
+
+def compare(report, baseline, path=()):
+    # Prints every latency/throughput figure that moved by more than 5%.
+    for key, value in report.items():
+        old = baseline.get(key) if isinstance(baseline, dict) else None
+        if isinstance(value, dict):
+            compare(value, old or {}, path + (key,))
+        elif key.endswith(("_ms", "_per_s", "rss_mb")) and isinstance(value, (int, float)) and isinstance(old, (int, float)) and old:
+            change = (value - old) / old
+            if abs(change) >= 0.05:
+                print(f"  {'/'.join(path + (key,))}: {old} -> {value} ({change:+.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recommender, card helper and HTTP benchmark suite")
+    parser.add_argument("--sections", default="recommender,cards,http")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="synthetic catalogue rows")
+    parser.add_argument("--queries", type=int, default=500, help="queries per catalogue size")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--card-repeat", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=500, help="HTTP requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8020)
+    parser.add_argument("--tmdb-port", type=int, default=8021)
+    parser.add_argument("--tmdb-latency-ms", type=float, default=20)
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    args = parser.parse_args()
+
+    sections = set(args.sections.split(","))
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "cpus": os.cpu_count(),
+            "backend": os.getenv("RECOMMENDER_BACKEND", "exact"),
+        },
+    }
+    if "recommender" in sections:
+        report["recommender"] = bench_recommender([int(s) for s in args.sizes.split(",")], args.queries, args.batch_size)
+    if "cards" in sections:
+        report["cards"] = bench_cards(args.card_repeat)
+    if "http" in sections:
+        report["http"] = bench_http(args.requests, args.concurrency, args.port, args.tmdb_port, args.tmdb_latency_ms)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"Changes against {args.baseline} ({baseline.get('meta', {}).get('commit')}):", file=sys.stderr)
+        sys.stdout, stdout = sys.stderr, sys.stdout
+        try:
+            compare(report, baseline)
+        finally:
+            sys.stdout = stdout
+
+
+if __name__ == "__main__":
+    main()
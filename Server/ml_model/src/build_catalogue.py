@@ -0,0 +1,89 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+from app.utils.catalogue import CATALOGUE_PATH, build_catalogue, catalogue_row_from_tmdb, upsert_rows
+
+# Builds data/catalogue.sqlite, the local movie store the API reads before
+# falling back to TMDB. The CSVs in ml_model/data provide titles, genres,
+# ratings and artwork; overviews and full release dates come from an optional
+# TMDB JSONL dump and/or --fetch-missing, which looks them up once here so the
+# request path does not have to.
+
+
+def read_jsonl(path):
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+async def fetch_missing(path, concurrency, attempts=5):
+    from app.utils.tmdb_client import TMDBClient, UpstreamUnavailable
+
+    conn = sqlite3.connect(path)
+    ids = [row[0] for row in conn.execute("SELECT movie_id FROM movies WHERE overview IS NULL OR release_date IS NULL")]
+    # The request budget paces the backfill rather than failing it: calls wait
+    # for their slot however long that takes.
+    client = TMDBClient(max_concurrency=concurrency, budget_wait=math.inf)
+    fetched = 0
+    try:
+        for start in range(0, len(ids), 500):
+            pending = ids[start:start + 500]
+            rows = []
+            for _ in range(attempts):
+                results = await asyncio.gather(
+                    *[client.get(f"movie/{movie_id}", {"language": "en-US"}) for movie_id in pending],
+                    return_exceptions=True,
+                )
+                throttled = []
+                for movie_id, result in zip(pending, results):
+                    if isinstance(result, UpstreamUnavailable):
+                        throttled.append((movie_id, result.retry_after))
+                    elif isinstance(result, BaseException):
+                        raise result
+                    elif result:
+                        rows.append(catalogue_row_from_tmdb(result))
+                if not throttled:
+                    break
+                pending = [movie_id for movie_id, _ in throttled]
+                await asyncio.sleep(max(retry_after for _, retry_after in throttled))
+            else:
+                print(f"  gave up on {len(pending)} ids still throttled after {attempts} attempts")
+            with conn:
+                fetched += upsert_rows(conn, rows)
+            print(f"  fetched {min(start + 500, len(ids))}/{len(ids)}")
+    finally:
+        await client.aclose()
+        conn.close()
+    return fetched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the local movie catalogue")
+    parser.add_argument("--output", default=CATALOGUE_PATH)
+    parser.add_argument("--tmdb-dump", action="append", default=[], help="JSONL file of TMDB movie records (repeatable)")
+    parser.add_argument("--fetch-missing", action="store_true", help="Fetch overviews/release dates missing from the CSVs from TMDB")
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    records = (record for dump in args.tmdb_dump for record in read_jsonl(dump))
+    count = build_catalogue(args.output, records)
+    print(f"Wrote {count} rows to {os.path.abspath(args.output)} in {time.perf_counter() - start:.2f}s")
+
+    if args.fetch_missing:
+        start = time.perf_counter()
+        fetched = asyncio.run(fetch_missing(args.output, args.concurrency))
+        print(f"Filled {fetched} rows from TMDB in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
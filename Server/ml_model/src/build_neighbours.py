@@ -0,0 +1,64 @@
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+from app.models.feature_store import DATA_DIR, load_feature_store
+from app.models.neighbours import NEIGHBOUR_TABLE_PATH, NEIGHBOURS, build_neighbour_table, save_neighbour_table
+
+# Precomputes the "more like this" table behind GET /api/movies/{id}/similar:
+# the top-N cosine neighbours of every movie in the current feature store,
+# computed in blocked matrix products across all cores. Rerun after train.py
+# or ingest.py; until then movies added since the last build are scored on
+# demand. Servers read the table whenever they load a model (at startup and
+# on each new store generation).
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux.
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the item-item neighbour table")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--neighbours", type=int, default=NEIGHBOURS, help="neighbours kept per movie")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--json", action="store_true", help="print the build report as JSON")
+    args = parser.parse_args()
+
+    path = os.path.join(args.data_dir, "scalers", os.path.basename(NEIGHBOUR_TABLE_PATH))
+    store = load_feature_store(args.data_dir)
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    rows, scores = build_neighbour_table(store.features_normed, args.neighbours, args.workers)
+    build_seconds = time.perf_counter() - start
+    save_neighbour_table(store, rows, scores, path)
+
+    report = {
+        "rows": len(store),
+        "neighbours": rows.shape[1],
+        "workers": args.workers,
+        "build_s": round(build_seconds, 3),
+        "rows_per_s": round(len(store) / build_seconds) if build_seconds else None,
+        "table_mb": round((rows.nbytes + scores.nbytes) / 2**20, 2),
+        "file_mb": round(os.path.getsize(path) / 2**20, 2),
+        "peak_rss_mb": peak_rss_mb(),
+        "peak_rss_before_build_mb": rss_before,
+        "path": os.path.abspath(path),
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"Neighbour table written to {report['path']}")
+    print(f"  {report['rows']} movies x {report['neighbours']} neighbours, {report['workers']} workers")
+    print(f"  build: {report['build_s']:.3f}s ({report['rows_per_s']:,} rows/s)")
+    print(f"  table: {report['table_mb']} MB in memory, {report['file_mb']} MB on disk")
+    print(f"  peak RSS: {report['peak_rss_mb']} MB ({report['peak_rss_before_build_mb']} MB before the build)")
+
+
+if __name__ == "__main__":
+    main()
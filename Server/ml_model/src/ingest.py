@@ -0,0 +1,55 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+from app.models.ingest import ingest_records
+from app.utils.catalogue import CATALOGUE_PATH
+
+# Adds or updates movies from TMDB JSONL dumps without refitting the scalers
+# or restarting the API. Running servers load the new feature store generation
+# on their next reload check (MODEL_RELOAD_INTERVAL). When the drift report
+# recommends a refit, rerun train.py instead.
+
+
+def read_jsonl(path):
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally ingest TMDB movie records")
+    parser.add_argument("dumps", nargs="+", help="JSONL files of TMDB movie records")
+    parser.add_argument("--catalogue", default=CATALOGUE_PATH)
+    parser.add_argument("--json", action="store_true", help="print the full result as JSON")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    records = (record for dump in args.dumps for record in read_jsonl(dump))
+    result = ingest_records(records, catalogue_path=args.catalogue)
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps({**result, "seconds": round(elapsed, 3)}, indent=2))
+        return
+    print(f"Added {result['added']}, updated {result['updated']}, skipped {result['skipped']} in {elapsed:.2f}s")
+    print(f"Feature store generation: {os.path.abspath(result['store'])}")
+    drift = result["drift"]
+    if drift is None:
+        return
+    for column, stats in drift["numeric"].items():
+        print(f"  {column}: mean shift {stats['mean_shift']:.3f} std, std ratio {stats['std_ratio']:.3f}")
+    print(f"  growth since last full build: {drift['growth']:.1%}, unknown genres: {drift['unknown_genres'] or 'none'}")
+    if drift["refit_recommended"]:
+        print("Refit recommended (rerun ml_model/src/train.py):")
+        for reason in drift["reasons"]:
+            print(f"  - {reason}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,29 @@
-from Server.models.movie_recommend import *
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+from app.models.movie_model import MovieRecommender, RecommendationQuery
+from app.utils.catalogue import catalogue
 
 if __name__ == "__main__":
-    genres = ["Action", "Adventure"]
+    genres = ("Action", "Adventure")
     release_year = 2010
     runtime = 120
     vote_average = 7.5
     language = "English"
 
-    recommender = MovieRecommender(genres, release_year, runtime, vote_average, language)
-    recommendations = recommender.recommend_movies()
+    recommender = MovieRecommender()
+    query = RecommendationQuery(
+        genres=genres,
+        runtime=runtime,
+        vote_average=vote_average,
+        year_from=release_year,
+        year_to=release_year,
+        languages=(language,),
+    )
+    recommendations = recommender.recommend(query)
+    movies = catalogue.get_movies([movie["Movie_id"] for movie in recommendations])
     print("Top 5 recommended movies:")
     for movie in recommendations:
-        print(f"Movie ID: {movie['Movie_id']}, Title: {movie['Title']}")
\ No newline at end of file
+        local = movies.get(movie["Movie_id"])
+        print(f"Movie ID: {movie['Movie_id']}, Title: {local['title'] if local else 'unknown'}")
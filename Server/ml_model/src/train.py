@@ -1,36 +1,63 @@
-import pandas as pd
-from sklearn.preprocessing import StandardScaler, OneHotEncoder, MultiLabelBinarizer
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
-import numpy as np
-import joblib
-
+import argparse
+import json
 import os
-
-num_std = ["Runtime", "Vote_average"]
-
-csv_path = os.path.join(os.path.dirname(__file__), "..", "..", "data", "movie_genres.csv")
-genres = pd.read_csv(csv_path)["Genres"].apply(lambda x: eval(x) if pd.notnull(x) else [])
-
-movie_data_path = os.path.join(os.path.dirname(__file__), "..", "..", "data", "movie_data.csv")
-movie_data = pd.read_csv(movie_data_path)
-
-mlb = MultiLabelBinarizer()
-mlb.fit(genres)
-
-preprocessor = ColumnTransformer(
-    transformers=[
-        ("num", StandardScaler(), num_std),
-    ],
-    remainder="passthrough"
-)
-
-pipeline = Pipeline([
-  ('preprocessor', preprocessor),
-])
-
-pipeline.fit(movie_data[["Runtime", "Vote_average", "Adult"]])
-
-joblib.dump(mlb, os.path.join(os.path.dirname(__file__),'..','..','data','scalers','mlb.joblib'))
-joblib.dump(pipeline, os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'scalers','preprocessor.joblib'))
-
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+from app.models.feature_store import DATA_DIR, load_feature_store
+from app.models.hybrid import HYBRID_SIGNALS_PATH, RATINGS_PATH, build_hybrid_signals, save_hybrid_signals
+from app.models.preprocess import CHUNKSIZE, run_pipeline, stage
+from app.models.similarity import IVF_INDEX_PATH, build_ivf_index, save_ivf_index
+
+# Refits the genre binarizer and the Runtime/Vote_average scaler, saves them
+# to data/scalers and re-encodes the catalogue into the feature store the
+# server memory-maps, all in one streaming pass over the CSVs. Per-stage
+# timings are printed so preprocessing throughput can be tracked as the
+# catalogue grows. The popularity prior and optional item-item co-occurrence
+# used by ranking="hybrid" are rebuilt in the same run.
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit the scalers and build the feature store")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--chunksize", type=int, default=CHUNKSIZE, help="CSV rows read and encoded per block")
+    parser.add_argument("--skip-ivf", action="store_true", help="do not build the approximate nearest-neighbour index")
+    parser.add_argument("--ratings", default=RATINGS_PATH, help="CSV with Movie_id, Vote_average, Vote_count")
+    parser.add_argument("--interactions", help="optional CSV of user_id, movie_id events for item-item co-occurrence")
+    parser.add_argument("--top-neighbours", type=int, default=50, help="co-occurrence neighbours kept per movie")
+    parser.add_argument("--json", action="store_true", help="print timings as JSON")
+    args = parser.parse_args()
+
+    ivf_path = os.path.join(args.data_dir, "scalers", os.path.basename(IVF_INDEX_PATH))
+    hybrid_path = os.path.join(args.data_dir, "scalers", os.path.basename(HYBRID_SIGNALS_PATH))
+    timings = {}
+    start = time.perf_counter()
+    store_dir = run_pipeline(args.data_dir, fit=True, chunksize=args.chunksize, timings=timings)
+    store = load_feature_store(args.data_dir, rebuild_if_stale=False)
+
+    if not args.skip_ivf:
+        # Approximate nearest-neighbour index over the same rows, saved next to
+        # the scalers and used when the server runs with RECOMMENDER_BACKEND=ivf.
+        with stage(timings, "ivf"):
+            save_ivf_index(build_ivf_index(store.features_normed), store.key, ivf_path)
+    with stage(timings, "hybrid"):
+        save_hybrid_signals(build_hybrid_signals(args.ratings, args.interactions, args.top_neighbours), hybrid_path)
+    total = time.perf_counter() - start
+
+    rows = len(store)
+    if args.json:
+        print(json.dumps({"rows": rows, "store": store_dir, "total_s": round(total, 3),
+                          "stages": {name: round(seconds, 3) for name, seconds in timings.items()}}, indent=2))
+        return
+    print(f"Feature store written to {os.path.abspath(store_dir)}")
+    if not args.skip_ivf:
+        print(f"IVF index written to {os.path.abspath(ivf_path)}")
+    print(f"Hybrid ranking signals written to {os.path.abspath(hybrid_path)}")
+    for name, seconds in timings.items():
+        print(f"  {name:>12}: {seconds:8.3f}s  {rows / seconds if seconds else float('inf'):>12,.0f} rows/s")
+    print(f"  {'total':>12}: {total:8.3f}s  ({rows} rows)")
+
+
+if __name__ == "__main__":
+    main()
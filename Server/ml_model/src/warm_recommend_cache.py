@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+from pydantic import ValidationError
+
+from app.models.movie_model import MovieRecommender
+from app.models.result_cache import RECOMMEND_CACHE_SIZE, WARM_QUERIES_PATH, canonical_query, save_warm_queries
+from app.models.schemas import MovieRequest
+from app.routers.movies import to_recommendation_query
+
+# Builds the list of /api/movies/recommend query buckets preloaded into the
+# result cache whenever a server loads a model. Feed it one or more query logs
+# (JSON lines of request bodies, as written with RECOMMEND_QUERY_LOG set); the
+# most requested buckets are kept together with their current answers. The
+# answers are reused as long as the feature store has not changed and are
+# recomputed in one batch after a retrain.
+
+
+def read_queries(paths, known_genres):
+    counts = Counter()
+    lines = invalid = 0
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                lines += 1
+                try:
+                    request = MovieRequest.model_validate_json(line)
+                except ValidationError:
+                    invalid += 1
+                    continue
+                counts[canonical_query(to_recommendation_query(request), known_genres)] += 1
+    return counts, lines, invalid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the warm-up list for the recommendation result cache")
+    parser.add_argument("logs", nargs="+", help="JSON-lines files of /recommend request bodies")
+    parser.add_argument("--top", type=int, default=min(RECOMMEND_CACHE_SIZE, 5000), help="buckets kept, most requested first")
+    parser.add_argument("--k", type=int, default=5, help="recommendations per query, as served by /recommend")
+    parser.add_argument("--out", default=WARM_QUERIES_PATH)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    recommender = MovieRecommender()
+    counts, lines, invalid = read_queries(args.logs, recommender.known_genres)
+    top = counts.most_common(args.top)
+
+    start = time.perf_counter()
+    results = recommender.recommend_batch([query for query, _ in top], args.k)
+    score_seconds = time.perf_counter() - start
+    save_warm_queries([(query, count, result) for (query, count), result in zip(top, results)], recommender.store.key, args.k, args.out)
+
+    valid = lines - invalid
+    report = {
+        "lines": lines,
+        "invalid": invalid,
+        "buckets": len(counts),
+        "kept": len(top),
+        "coverage": round(sum(count for _, count in top) / valid, 4) if valid else None,
+        "score_s": round(score_seconds, 3),
+        "path": os.path.abspath(args.out),
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"Warm-up list written to {report['path']}")
+    print(f"  {report['lines']} queries read ({report['invalid']} invalid), {report['buckets']} distinct buckets")
+    if report["coverage"] is not None:
+        print(f"  kept the top {report['kept']}, covering {report['coverage']:.1%} of logged queries")
+    print(f"  answers computed in {report['score_s']:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import os
+import random
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.models.encoder import QueryEncoder
+from app.models.feature_store import DATA_DIR, load_feature_store, normalise_rows
+
+# The NumPy QueryEncoder must reproduce the sklearn artefacts in data/scalers
+# bit for bit, whether built from the joblib files or from the copy exported
+# into the feature store manifest.
+
+
+def sklearn_encode(mlb, preprocessor, queries):
+    genres = mlb.transform([list(q[3]) for q in queries])
+    numeric = preprocessor.transform(pd.DataFrame({
+        "Runtime": [q[0] for q in queries],
+        "Vote_average": [q[1] for q in queries],
+        "Adult": [q[2] for q in queries],
+    }))
+    return np.hstack((numeric, genres))
+
+
+def numpy_encode(encoder, queries):
+    return encoder.encode([q[0] for q in queries], [q[1] for q in queries], [q[2] for q in queries], [q[3] for q in queries])
+
+
+def random_queries(classes, count, seed):
+    # Bucket-edge values and arbitrary floats, plus genres the encoder has
+    # never seen.
+    rng = random.Random(seed)
+    labels = list(classes) + ["Anime", "Not A Genre"]
+    return [
+        (
+            rng.choice([0, 1, 45, 90, 120, 137, 180, 600]) if rng.random() < 0.5 else rng.uniform(0, 400),
+            rng.choice([0, 5.5, 7, 10]) if rng.random() < 0.5 else rng.uniform(0, 10),
+            rng.randint(0, 1),
+            tuple(rng.sample(labels, rng.randint(0, 5))),
+        )
+        for _ in range(count)
+    ]
+
+
+@pytest.fixture(scope="module")
+def scalers():
+    mlb = joblib.load(os.path.join(DATA_DIR, "scalers", "mlb.joblib"))
+    preprocessor = joblib.load(os.path.join(DATA_DIR, "scalers", "preprocessor.joblib"))
+    return mlb, preprocessor
+
+
+@pytest.mark.parametrize("source", ["joblib", "manifest"])
+def test_encoder_matches_sklearn(scalers, source):
+    mlb, preprocessor = scalers
+    if source == "joblib":
+        encoder = QueryEncoder.from_sklearn(mlb, preprocessor)
+    else:
+        encoder = QueryEncoder.from_manifest(load_feature_store().manifest)
+    queries = random_queries(mlb.classes_, 5000, seed=0)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        expected = sklearn_encode(mlb, preprocessor, queries)
+        single = np.vstack([sklearn_encode(mlb, preprocessor, [q]) for q in queries[:200]])
+
+    actual = numpy_encode(encoder, queries)
+    assert actual.dtype == expected.dtype
+    assert np.array_equal(actual, expected)
+    assert np.array_equal(normalise_rows(actual), normalise_rows(expected))
+    assert np.array_equal(np.vstack([numpy_encode(encoder, [q]) for q in queries[:200]]), single)
@@ -0,0 +1,40 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from app.models.movie_model import MovieRecommender, RecommendationQuery
+
+
+def random_queries(genres, count, seed):
+    rng = random.Random(seed)
+    languages = ["english", "french", "japanese", "korean", "hindi", "spanish"]
+    queries = []
+    for _ in range(count):
+        year_from = rng.randint(1990, 2026)
+        queries.append(RecommendationQuery(
+            genres=tuple(rng.sample(genres, rng.randint(0, 4))),
+            runtime=rng.choice([60, 90, 100, 120, 150, 180]),
+            vote_average=rng.choice([5.0, 6.0, 7.0, 7.5, 8.0, 9.0]),
+            adult=0,
+            year_from=year_from,
+            year_to=year_from + rng.choice([0, 0, 1, 5]),
+            languages=tuple(rng.sample(languages, rng.randint(0, 2))),
+            ranking=rng.choice(["content", "hybrid"]),
+        ))
+    return queries
+
+
+def test_concurrent_queries_match_sequential():
+    # One shared recommender driven from many threads must give every query
+    # the answer it gets alone. compute() skips the result cache, so each
+    # query is really scored in both passes.
+    recommender = MovieRecommender()
+    queries = random_queries(list(recommender.store.genres), 1000, seed=7)
+    expected = [recommender.compute(query) for query in queries]
+
+    order = list(range(len(queries)))
+    random.Random(8).shuffle(order)
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        results = dict(zip(order, pool.map(lambda i: recommender.compute(queries[i]), order)))
+
+    mismatches = [queries[i] for i in range(len(queries)) if results[i] != expected[i]]
+    assert not mismatches, f"{len(mismatches)} concurrent results differ, e.g. {mismatches[:3]}"
@@ -0,0 +1,19 @@
+import pytest
+
+from app.utils.responses import _accepts_gzip
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate, br", True),
+    ("GZIP;Q=0.8", True),
+    ("x-gzip", True),
+    ("br, *;q=0.5", True),
+    ("", False),
+    ("deflate, br", False),
+    ("gzip;q=0", False),
+    ("gzip; q=0.0, br", False),
+    ("gzip;q=0, *", False),
+    ("*;q=0", False),
+])
+def test_accepts_gzip(header, expected):
+    assert _accepts_gzip(header) is expected